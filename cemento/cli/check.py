@@ -0,0 +1,52 @@
+import sys
+
+from cemento.draw_io.io import get_error_check_path
+from cemento.draw_io.read_diagram import validate_drawio
+
+
+def register(subparsers):
+    parser = subparsers.add_parser(
+        "check",
+        help="subcommand for checking drawio files for diagram errors without converting them.",
+    )
+
+    parser.add_argument(
+        "input",
+        help="the path to the input drawio diagram file.",
+        metavar="input_file_path",
+    )
+    parser.add_argument(
+        "-vc",
+        "--validation-cache",
+        help="Set whether to keep the diagram check results and only recheck the diagram elements that changed since the last run, along with their neighbours. The cache is kept next to the diagram, or in the given folder.",
+        nargs="?",
+        const=True,
+        default=False,
+        metavar="cache_folder_path",
+    )
+    parser.add_argument(
+        "-dwe",
+        "--dont-write-error-diagram",
+        help="Set whether to generate a diagram with errors indicated when the check fails.",
+        action="store_false",
+    )
+    parser.set_defaults(_handler=run)
+
+
+def run(args):
+    errors = validate_drawio(
+        args.input,
+        validation_cache=args.validation_cache,
+        write_error_diagram=args.dont_write_error_diagram,
+    )
+    if not errors:
+        print(f"no diagram errors found in {args.input}.")
+        return
+
+    for elem_id, error in errors:
+        print(elem_id, error)
+    if args.dont_write_error_diagram:
+        print(
+            f"Problematic elements are in red in the generated file at {get_error_check_path(args.input)}."
+        )
+    sys.exit(1)
@@ -8,6 +8,9 @@ def get_version():
         return None
 
 
+# exit status of the conversion commands when every output was left unchanged
+UNCHANGED_EXIT_CODE = 3
+
 DEFAULT_DOWNLOADS = {
     # cco as the default download
     "cco": "https://raw.githubusercontent.com/CommonCoreOntology/CommonCoreOntologies/refs/heads/develop/src/cco-merged/CommonCoreOntologiesMerged.ttl"
@@ -1,3 +1,6 @@
+import sys
+
+from cemento.cli.constants import UNCHANGED_EXIT_CODE
 from cemento.rdf.drawio_to_rdf import convert_drawio_to_rdf
 from cemento.utils.constants import RDFFormat
 from cemento.utils.io import (
@@ -23,13 +26,22 @@ def register(subparsers):
         help="the path to the desired output file.",
         metavar="output_file_path",
     )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="the path to another output file, in the format of its file extension. Repeat it to write several formats from one conversion.",
+        action="append",
+        default=[],
+        dest="extra_outputs",
+        metavar="output_file_path",
+    )
     parser.add_argument(
         "-f",
         "--format",
         choices=RDFFormat.get_valid_rdf_formats(),
         default=None,
         metavar="file_format",
-        help="the format which rdflib will use to parse the file (default: turtle)",
+        help="the format which rdflib will use to parse the file, for every output (default: inferred from each file extension)",
     )
     parser.add_argument(
         "-r",
@@ -55,7 +67,7 @@ def register(subparsers):
     parser.add_argument(
         "-lsp",
         "--log-substitution-path",
-        help="the path to a csv file containing substitution results from term matching.",
+        help="the path to a file containing substitution results from term matching. Writes csv by default, or json lines for .jsonl files. Add .gz to compress the log.",
         default=None,
         metavar="log_file_path",
     )
@@ -65,6 +77,42 @@ def register(subparsers):
         help="Set whether to check for diagram errors and to generate a diagram with errors indicated.",
         action="store_false",
     )
+    parser.add_argument(
+        "-vc",
+        "--validation-cache",
+        help="Set whether to keep the diagram check results and only recheck the diagram elements that changed since the last run, along with their neighbours. The cache is kept next to the diagram, or in the given folder.",
+        nargs="?",
+        const=True,
+        default=False,
+        metavar="cache_folder_path",
+    )
+    parser.add_argument(
+        "-et",
+        "--embed-terms",
+        help="Set whether to write the resolved IRI of every term back into the diagram, so unchanged terms are not matched again on the next conversion.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-so",
+        "--stream-output",
+        help="Set whether to write the triples to the output as they are made, instead of building the whole graph first. Only works for N-Triples output, add .gz to the output path to compress it.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-mc",
+        "--match-cache",
+        help="Set whether to keep the term matches of this run in a cache file, so the next run skips matching for terms whose label is unchanged. The rest of the conversion always runs. The cache is kept next to the diagram, or in the given folder.",
+        nargs="?",
+        const=True,
+        default=False,
+        metavar="cache_folder_path",
+    )
+    parser.add_argument(
+        "-su",
+        "--skip-unchanged",
+        help=f"Set whether to leave outputs that already hold the same triples untouched. Exits with status {UNCHANGED_EXIT_CODE} when no output was written.",
+        action="store_true",
+    )
     parser.add_argument(
         "-cdr",
         "--collect-domains-ranges",
@@ -75,10 +123,13 @@ def register(subparsers):
 
 
 def run(args):
-    print(f"converting {args.input} into an RDF-compliant file at {args.output}...")
-    convert_drawio_to_rdf(
+    output_paths = [args.output, *args.extra_outputs]
+    print(
+        f"converting {args.input} into an RDF-compliant file at {', '.join(output_paths)}..."
+    )
+    has_written_outputs = convert_drawio_to_rdf(
         args.input,
-        args.output,
+        output_paths,
         file_format=args.format,
         onto_ref_folder=args.onto_ref_folder_path,
         defaults_folder=args.defaults_folder_path,
@@ -86,4 +137,12 @@ def run(args):
         check_errors=args.dont_check_errors,
         collect_domains_ranges=args.collect_domains_ranges,
         log_substitution_path=args.log_substitution_path,
+        validation_cache=args.validation_cache,
+        embed_terms=args.embed_terms,
+        match_cache=args.match_cache,
+        skip_unchanged=args.skip_unchanged,
+        stream_output=args.stream_output,
     )
+    if args.skip_unchanged and not has_written_outputs:
+        print("the triples are unchanged, so the output was left as is.")
+        sys.exit(UNCHANGED_EXIT_CODE)
@@ -0,0 +1,133 @@
+import sys
+
+from cemento.cli.constants import UNCHANGED_EXIT_CODE
+from cemento.rdf.drawio_to_rdf import merge_drawio_to_rdf
+from cemento.utils.constants import RDFFormat
+from cemento.utils.io import (
+    get_default_defaults_folder,
+    get_default_prefixes_file,
+    get_default_references_folder,
+)
+
+
+def register(subparsers):
+    parser = subparsers.add_parser(
+        "merge_drawio",
+        aliases=["merge-drawio"],
+        help="subcommand for converting several drawio files into a single rdf file, with the terms they share resolved once.",
+    )
+
+    parser.add_argument(
+        "output",
+        help="the path to the desired output file.",
+        metavar="output_file_path",
+    )
+    parser.add_argument(
+        "inputs",
+        help="the paths to the input drawio diagram files.",
+        nargs="+",
+        metavar="input_file_path",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="the path to another output file, in the format of its file extension. Repeat it to write several formats from one conversion.",
+        action="append",
+        default=[],
+        dest="extra_outputs",
+        metavar="output_file_path",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=RDFFormat.get_valid_rdf_formats(),
+        default=None,
+        metavar="file_format",
+        help="the format which rdflib will use to parse the file, for every output (default: inferred from each file extension)",
+    )
+    parser.add_argument(
+        "-r",
+        "--onto-ref-folder-path",
+        help="the path to the folder containing the reference ontologies.",
+        metavar="ref_ontologies_folder_path",
+        default=get_default_references_folder(),
+    )
+    parser.add_argument(
+        "-d",
+        "--defaults-folder-path",
+        help="the path to the folder containing the ttl files of the default namespaces.",
+        default=get_default_defaults_folder(),
+        metavar="default_ontologies_folder_path",
+    )
+    parser.add_argument(
+        "-p",
+        "--prefix-file-path",
+        help="the path to the json file containing prefixes.",
+        default=get_default_prefixes_file(),
+        metavar="prefix_file_path",
+    )
+    parser.add_argument(
+        "-lsp",
+        "--log-substitution-path",
+        help="the path to a file containing substitution results from term matching. Writes csv by default, or json lines for .jsonl files. Add .gz to compress the log.",
+        default=None,
+        metavar="log_file_path",
+    )
+    parser.add_argument(
+        "-dce",
+        "--dont-check-errors",
+        help="Set whether to check for diagram errors and to generate a diagram with errors indicated.",
+        action="store_false",
+    )
+    parser.add_argument(
+        "-vc",
+        "--validation-cache",
+        help="Set whether to keep the diagram check results and only recheck the diagram elements that changed since the last run, along with their neighbours. The cache is kept next to each diagram, or in the given folder.",
+        nargs="?",
+        const=True,
+        default=False,
+        metavar="cache_folder_path",
+    )
+    parser.add_argument(
+        "-as",
+        "--annotate-sources",
+        help="Set whether to annotate every term with the diagram files it was drawn in, using dcterms:source.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-su",
+        "--skip-unchanged",
+        help=f"Set whether to leave outputs that already hold the same triples untouched. Exits with status {UNCHANGED_EXIT_CODE} when no output was written.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-cdr",
+        "--collect-domains-ranges",
+        help="Set whether to aggregate instances that are in the domain and range of a custom object property (Class inference coming soon).",
+        action="store_true",
+    )
+    parser.set_defaults(_handler=run)
+
+
+def run(args):
+    output_paths = [args.output, *args.extra_outputs]
+    print(
+        f"merging {', '.join(args.inputs)} into an RDF-compliant file at {', '.join(output_paths)}..."
+    )
+    has_written_outputs = merge_drawio_to_rdf(
+        args.inputs,
+        output_paths,
+        file_format=args.format,
+        onto_ref_folder=args.onto_ref_folder_path,
+        defaults_folder=args.defaults_folder_path,
+        prefixes_path=args.prefix_file_path,
+        check_errors=args.dont_check_errors,
+        collect_domains_ranges=args.collect_domains_ranges,
+        log_substitution_path=args.log_substitution_path,
+        validation_cache=args.validation_cache,
+        annotate_sources=args.annotate_sources,
+        skip_unchanged=args.skip_unchanged,
+    )
+    if args.skip_unchanged and not has_written_outputs:
+        print("the triples are unchanged, so the output was left as is.")
+        sys.exit(UNCHANGED_EXIT_CODE)
@@ -76,6 +76,12 @@ def register(subparsers):
         help="set whether to to append a unique id to each encountered literal term. Affects labels, definitions and any other literal values.",
         action="store_true",
     )
+    parser.add_argument(
+        "-et",
+        "--embed-terms",
+        help="set whether to keep the IRI of every term on its diagram cell, so converting the diagram back needs no term matching.",
+        action="store_true",
+    )
     parser.set_defaults(_handler=run)
 
 
@@ -92,4 +98,5 @@ def run(args):
         defaults_folder=args.defaults_folder_path,
         prefixes_path=args.prefix_file_path,
         set_unique_literals=args.unique_literals,
+        embed_terms=args.embed_terms,
     )
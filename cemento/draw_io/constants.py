@@ -1,7 +1,10 @@
+from collections.abc import Iterable, Iterator, Mapping
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 from math import atan2, pi
+from types import MappingProxyType
 from typing import NamedTuple
 
 
@@ -10,6 +13,18 @@ class DiagramKey(Enum):
     LABEL = "label"
 
 
+class TermAttr(Enum):
+    # custom cell attributes that keep the resolution of a term inside the diagram
+    IRI = "cemento_iri"
+    TYPE = "cemento_type"
+    SCORE = "cemento_score"
+    LABEL = "cemento_label"
+
+
+# draw.io wraps cells that carry custom attributes in one of these tags
+USER_OBJECT_TAGS = {"UserObject", "object"}
+
+
 class ShapeType(Enum):
     LITERAL = "literal"
     CLASS = "class"
@@ -29,6 +44,10 @@ FILL_COLOR = "#f2f3f4"
 STROKE_COLOR = "#000000"
 x_padding = 10
 y_padding = 20
+# bump whenever the diagram checks or their messages change
+VALIDATION_CACHE_VERSION = 1
+# page name for diagrams that are not written to a named file
+DEFAULT_DIAGRAM_NAME = "Page-1"
 
 
 def get_timestamp_str():
@@ -74,6 +93,7 @@ class Connector(DiagramObject):
     is_dashed: bool = 0
     is_curved: bool = 0
     template_key: str = "connector"
+    term_attrs: dict[str, str] = None
 
     @staticmethod
     def center_coordinates(
@@ -151,6 +171,7 @@ class Shape:
     stroke_color: str = STROKE_COLOR
     tree_folding: int = TreeFolding.FOLD.value
     template_key: str = "shape"
+    term_attrs: dict[str, str] = None
 
 
 @dataclass
@@ -190,6 +211,146 @@ class Line(DiagramObject):
     template_key: str = "line"
 
 
+EMPTY_STYLE_ATTRS = MappingProxyType(dict())
+
+
+@dataclass(slots=True)
+class DiagramElement(Mapping):
+    # compact record for a draw.io cell. The style string is only parsed when it is needed.
+    # The mapping interface exposes the cell the same way the old attribute dicts did.
+    id: str
+    parent: str = None
+    value: str = None
+    source: str = None
+    target: str = None
+    is_vertex: bool = False
+    is_edge: bool = False
+    x: str = None
+    y: str = None
+    width: str = None
+    height: str = None
+    style: str = None
+    extra_attrs: dict[str, str] = field(default_factory=dict)
+    _style_attrs: Mapping[str, str] = field(default=None, repr=False, compare=False)
+    _tags: tuple[str, ...] = field(default=None, repr=False, compare=False)
+
+    CELL_FIELDS = ("id", "parent", "value", "source", "target")
+    GEOMETRY_FIELDS = ("x", "y", "width", "height")
+
+    @staticmethod
+    @lru_cache(maxsize=2**12)
+    def parse_style(style: str) -> tuple[Mapping[str, str], tuple[str, ...]]:
+        # the same few styles repeat across cells, so every distinct string is parsed
+        # once and the read-only result is shared by all the cells that use it
+        style_term_pairs = [style.split("=") for style in style.split(";")]
+        style_terms = {pair[0]: pair[1] for pair in style_term_pairs if len(pair) > 1}
+        style_tags = tuple(
+            pair[0] for pair in style_term_pairs if len(pair) <= 1 and pair[0]
+        )
+        return MappingProxyType(style_terms), style_tags
+
+    def _load_style(self) -> None:
+        if self._style_attrs is None:
+            self._style_attrs, self._tags = (
+                DiagramElement.parse_style(self.style)
+                if self.style is not None
+                else (EMPTY_STYLE_ATTRS, ())
+            )
+
+    @property
+    def style_attrs(self) -> Mapping[str, str]:
+        self._load_style()
+        return self._style_attrs
+
+    @property
+    def tags(self) -> tuple[str, ...]:
+        self._load_style()
+        return self._tags
+
+    @property
+    def is_edge_label(self) -> bool:
+        # skip parsing styles that cannot contain the tag, unless tags were added on top
+        if self._tags is None and (self.style is None or "edgeLabel" not in self.style):
+            return False
+        return "edgeLabel" in self.tags
+
+    def add_tags(self, tags: Iterable[str]) -> None:
+        # the parsed tags are shared with other cells, so extend a copy
+        self._load_style()
+        self._tags = (*self._tags, *tags)
+
+    def get_cell_attr(self, key: str) -> str | None:
+        if key in DiagramElement.CELL_FIELDS or key in DiagramElement.GEOMETRY_FIELDS:
+            return getattr(self, key)
+        if key == "vertex":
+            return "1" if self.is_vertex else None
+        if key == "edge":
+            return "1" if self.is_edge else None
+        if key == "style":
+            return self.style
+        return self.extra_attrs.get(key, None)
+
+    def __getitem__(self, key: str) -> any:
+        if key == "tags":
+            return self.tags
+        if key in self.style_attrs:
+            return self.style_attrs[key]
+        if (value := self.get_cell_attr(key)) is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        cell_keys = (
+            *DiagramElement.CELL_FIELDS,
+            "vertex",
+            "edge",
+            *DiagramElement.GEOMETRY_FIELDS,
+            "style",
+        )
+        present_cell_keys = filter(
+            lambda key: self.get_cell_attr(key) is not None, cell_keys
+        )
+        return iter(
+            dict.fromkeys(
+                (*present_cell_keys, *self.extra_attrs, *self.style_attrs, "tags")
+            )
+        )
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __bool__(self) -> bool:
+        # a record always stands for a cell, skip counting its keys
+        return True
+
+
+@dataclass(slots=True)
+class DiagramIndex:
+    # everything the diagram error rules look up, gathered in one pass over the diagram
+    elements: dict[str, DiagramElement]
+    term_ids: set[str]
+    rel_ids: set[str]
+    edge_ids: list[str] = field(default_factory=list)
+    connected_ids: set[str] = field(default_factory=set)
+    containers: dict[str, list[str]] = field(default_factory=dict)
+    container_content: set[str] = None
+    container_subject_ids: list[str] = field(default_factory=list)
+    connected_container_ids: set[str] = field(default_factory=set)
+    nested_container_ids: set[str] = field(default_factory=set)
+
+
+@dataclass(slots=True)
+class DiagramPage:
+    # the parsed elements of a single page, shared between the error check and the graph
+    elements: dict[str, DiagramElement]
+    containers: dict[str, list[str]]
+    container_content: set[str]
+    non_container_elements: dict[str, DiagramElement]
+    term_ids: set[str]
+    rel_ids: set[str]
+    error_exemptions: set[str]
+
+
 class NxEdge(NamedTuple):
     subj: any
     obj: any
@@ -212,12 +373,36 @@ class WrongFileFormatError(Exception):
 
 
 class BadDiagramError(Exception):
-    def __init__(self, output_file_path):
-        self.message = f"The diagram has several syntax issues that needs to be resolved. Please refer to generated file at {output_file_path}. Problematic elements are in red! Refer to earlier output for list of errors."
+    def __init__(self, output_file_path, error_diagram: bytes = None):
+        # diagrams read from memory get their error diagram back on the exception
+        self.error_diagram = error_diagram
+        if output_file_path is None:
+            self.message = "The diagram has several syntax issues that needs to be resolved. Problematic elements are in red in the error_diagram of this exception! Refer to earlier output for list of errors."
+        else:
+            self.message = f"The diagram has several syntax issues that needs to be resolved. Please refer to generated file at {output_file_path}. Problematic elements are in red! Refer to earlier output for list of errors."
         super().__init__(self.message)
 
 
-class DisconnectedTermError(Exception):
+class DiagramError(Exception):
+    # keeps the arguments an error was made with, so errors sent back from worker
+    # processes are rebuilt through their own constructor. Errors found on a page of
+    # a multi-page file are tagged with the page name.
+    page_name = None
+
+    def __new__(cls, *args, **kwargs):
+        error = super().__new__(cls, *args)
+        error._init_args = args
+        return error
+
+    def __reduce__(self):
+        return self.__class__, self._init_args, self.__dict__
+
+    def __str__(self):
+        message = super().__str__()
+        return message if self.page_name is None else f"[{self.page_name}] {message}"
+
+
+class DisconnectedTermError(DiagramError):
     def __init__(self, term_id, term_content):
         if term_content is None or not term_content.strip():
             self.message = f"Term with id {term_id} is not connected to any other term."
@@ -226,7 +411,7 @@ class DisconnectedTermError(Exception):
         super().__init__(self.message)
 
 
-class DisconnectedEdgeError(Exception):
+class DisconnectedEdgeError(DiagramError):
     def __init__(self, message):
         super().__init__(message)
 
@@ -257,7 +442,7 @@ class MissingChildEdgeError(DisconnectedEdgeError):
         super().__init__(self.message)
 
 
-class BidirectionalEdgeError(Exception):
+class BidirectionalEdgeError(DiagramError):
     def __init__(self, edge_id, edge_content, parent_content, child_content):
         message_start = f"Edge with id: {edge_id}"
         message_end = (
@@ -277,7 +462,7 @@ class BidirectionalEdgeError(Exception):
         super().__init__(self.message)
 
 
-class InvertedEdgeError(Exception):
+class InvertedEdgeError(DiagramError):
     def __init__(self, edge_id, edge_content, parent_content, child_content):
         message_start = f"Edge with id: {edge_id}"
         message_end = " is inverted! Please make sure to use end-arrows only for ontology diagrams."
@@ -315,7 +500,7 @@ class CircularEdgeError(DisconnectedEdgeError):
         super().__init__(self.message)
 
 
-class BlankLabelError(Exception):
+class BlankLabelError(DiagramError):
     def __init__(self, message):
         super().__init__(message)
 
@@ -335,7 +520,7 @@ class BlankEdgeLabelError(BlankLabelError):
         super().__init__(self.message)
 
 
-class BaseContainerError(Exception):
+class BaseContainerError(DiagramError):
     def __init__(self, message):
         super().__init__(message)
 
@@ -1,32 +1,186 @@
+import base64
+import hashlib
 import importlib.resources as pkg_resources
+import json
 import os
-from collections.abc import Iterable
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
 from pathlib import Path
 from string import Template
+from typing import BinaryIO
+from urllib.parse import quote, unquote_to_bytes
+from xml.etree.ElementTree import Element, ElementTree, tostring
 
 from defusedxml import ElementTree as ET
 
+from cemento.draw_io.constants import (
+    USER_OBJECT_TAGS,
+    VALIDATION_CACHE_VERSION,
+    TermAttr,
+)
+from cemento.utils.io import is_path_source, open_source
+from cemento.utils.utils import fst
 
-def get_diagram_headers(file_path: str | Path) -> dict[str, str]:
-    # retrieve diagram headers
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-    graph_model_tag = next(root.iter("mxGraphModel"))
-    diagram_tag = next(root.iter("diagram"))
-    diagram_headers = {
-        "modify_date": (
-            root.attrib["modified"] if "modified" in root.attrib else "July 1, 2024"
-        ),
-        "diagram_name": diagram_tag.attrib["name"],
-        "diagram_id": diagram_tag.attrib["id"],
-        "grid_dx": graph_model_tag.attrib["dx"] if "dx" in graph_model_tag else 0,
-        "grid_dy": graph_model_tag.attrib["dy"] if "dy" in graph_model_tag else 0,
-        "grid_size": int(graph_model_tag.attrib["gridSize"]),
-        "page_width": int(graph_model_tag.attrib["pageWidth"]),
-        "page_height": int(graph_model_tag.attrib["pageHeight"]),
-    }
-
-    return diagram_headers
+
+class DecodedDiagramStream:
+    # minimal file-like wrapper so iterparse can pull decoded chunks as it needs them
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        # pull chunks until there is enough to return, and keep the rest for later
+        while size is None or size < 0 or len(self._buffer) < size:
+            if (chunk := next(self._chunks, None)) is None:
+                break
+            self._buffer += chunk
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def is_compressed_diagram(diagram_element: Element) -> bool:
+    return (
+        diagram_element.tag == "diagram"
+        and len(diagram_element) == 0
+        and bool(diagram_element.text and diagram_element.text.strip())
+    )
+
+
+def iter_decoded_diagram_chunks(
+    payload: str, chunk_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    # compressed payloads are url-encoded, raw-deflated and then base64-encoded
+    payload = "".join(payload.split())
+    # keep the chunks aligned to whole base64 quanta
+    chunk_size -= chunk_size % 4
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    pending = b""
+    for chunk_start in range(0, len(payload), chunk_size):
+        compressed_chunk = base64.b64decode(
+            payload[chunk_start : chunk_start + chunk_size]
+        )
+        decoded = pending + decompressor.decompress(compressed_chunk)
+        # hold back a percent escape that was split between chunks
+        split_idx = decoded.find(b"%", max(len(decoded) - 2, 0))
+        split_idx = len(decoded) if split_idx == -1 else split_idx
+        pending = decoded[split_idx:]
+        yield unquote_to_bytes(decoded[:split_idx])
+    yield unquote_to_bytes(pending + decompressor.flush())
+
+
+def decode_diagram_payload(payload: str) -> bytes:
+    return b"".join(iter_decoded_diagram_chunks(payload))
+
+
+def encode_diagram_payload(graph_model_tag: Element) -> str:
+    # the reverse of decode_diagram_payload, escaping like javascript's encodeURIComponent
+    payload = quote(tostring(graph_model_tag, encoding="unicode"), safe="-_.!~*'()")
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    compressed_payload = (
+        compressor.compress(payload.encode("ascii")) + compressor.flush()
+    )
+    return base64.b64encode(compressed_payload).decode("ascii")
+
+
+def inflate_compressed_diagram(diagram_tag: Element) -> Element:
+    graph_model_tag = ET.fromstring(decode_diagram_payload(diagram_tag.text))
+    diagram_tag.text = None
+    diagram_tag.append(graph_model_tag)
+    return diagram_tag
+
+
+def compress_inflated_diagram(diagram_tag: Element) -> Element:
+    # a copy of the page with its graph model compressed again, leaving the page as is
+    compressed_tag = Element(diagram_tag.tag, diagram_tag.attrib)
+    compressed_tag.text = encode_diagram_payload(diagram_tag.find("mxGraphModel"))
+    compressed_tag.tail = diagram_tag.tail
+    return compressed_tag
+
+
+def get_diagram_headers(file_path: str | Path, page_idx: int = 0) -> dict[str, str]:
+    return DrawioDocument(file_path).get_headers(page_idx)
+
+
+def get_user_object_attrs(user_object_attrs: dict[str, str]) -> dict[str, str]:
+    # user objects keep the cell id and label, the wrapped cell keeps everything else
+    cell_attrs = dict(user_object_attrs)
+    if "label" in cell_attrs:
+        cell_attrs["value"] = cell_attrs.pop("label")
+    return cell_attrs
+
+
+def iter_diagram_events(
+    file_path: str | Path | bytes | BinaryIO | DecodedDiagramStream,
+) -> Iterator[tuple[str, dict[str, str]]]:
+    # stream the cells instead of parsing the whole tree, merging geometry as it arrives.
+    # a ("page", diagram_attrs) event follows the cells of every diagram page.
+    element_stack = []
+    cell_attrs = None
+    for event, element in ET.iterparse(open_source(file_path), events=("start", "end")):
+        if event == "start":
+            parent_tag = element_stack[-1].tag if element_stack else None
+            if element.tag == "mxCell" and parent_tag == "root":
+                cell_attrs = dict(element.attrib)
+            elif element.tag in USER_OBJECT_TAGS and parent_tag == "root":
+                cell_attrs = get_user_object_attrs(element.attrib)
+            elif (
+                element.tag == "mxCell"
+                and parent_tag in USER_OBJECT_TAGS
+                and cell_attrs is not None
+            ):
+                cell_attrs.update(element.attrib)
+            elif (
+                element.tag == "mxGeometry"
+                and parent_tag == "mxCell"
+                and cell_attrs is not None
+            ):
+                cell_attrs.update(element.attrib)
+            element_stack.append(element)
+            continue
+
+        element_stack.pop()
+        if element.tag == "diagram":
+            if is_compressed_diagram(element):
+                yield from iter_diagram_events(
+                    DecodedDiagramStream(iter_decoded_diagram_chunks(element.text))
+                )
+            yield "page", dict(element.attrib)
+            element.clear()
+        elif (
+            (element.tag == "mxCell" or element.tag in USER_OBJECT_TAGS)
+            and cell_attrs is not None
+            and element_stack[-1].tag == "root"
+        ):
+            yield "cell", cell_attrs
+            cell_attrs = None
+            # drop everything read so far so the tree never builds up in memory
+            element_stack[-1].clear()
+
+
+def iter_diagram_cells(
+    file_path: str | Path | bytes | BinaryIO | DecodedDiagramStream,
+) -> Iterator[dict[str, str]]:
+    return (attrs for event, attrs in iter_diagram_events(file_path) if event == "cell")
+
+
+def iter_diagram_pages(
+    file_path: str | Path | bytes | BinaryIO,
+) -> Iterator[tuple[dict[str, str], list[dict[str, str]]]]:
+    # cell ids are only unique within a page, so keep every page's cells apart
+    page_cells = []
+    for event, attrs in iter_diagram_events(file_path):
+        if event == "cell":
+            page_cells.append(attrs)
+        else:
+            yield attrs, page_cells
+            page_cells = []
+    # bare mxGraphModel files have no diagram tag to close the page
+    if page_cells:
+        yield dict(), page_cells
 
 
 def get_template_files() -> dict[str, str | Path]:
@@ -48,36 +202,266 @@ def get_template_files() -> dict[str, str | Path]:
     return template_dict
 
 
-def write_error_diagram(
-    file_path: str | Path, errors: Iterable[tuple[str, BaseException]]
-) -> Path:
+@lru_cache(maxsize=2**12)
+def get_error_style(style: str) -> str:
+    # flagged cells mostly share a style, so each one is rewritten only once
+    styles = list(map(lambda x: x.strip().split("="), style.strip().split(";")))
+    styles = filter(lambda style: style[0], styles)
+    style_dict = {style[0]: "" if len(style) < 2 else style[1] for style in styles}
+    style_dict["strokeColor"] = "#ff0000"
+
+    new_style = [
+        f"{key}={value}" if value else f"{key}" for key, value in style_dict.items()
+    ]
+    return ";".join(new_style)
+
+
+def get_error_check_path(file_path: str | Path) -> Path:
     file_path = Path(file_path)
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-    for elem_id, _ in errors:
-        for element in root.findall(f".//*[@id='{elem_id}']"):
-
-            styles = list(
-                map(
-                    lambda x: x.strip().split("="),
-                    element.get("style").strip().split(";"),
-                )
-            )
-            styles = filter(lambda style: style[0], styles)
-            style_dict = {
-                style[0]: "" if len(style) < 2 else style[1] for style in styles
-            }
-            style_dict["strokeColor"] = "#ff0000"
-
-        new_style = [
-            f"{key}={value}" if value else f"{key}" for key, value in style_dict.items()
+    if "error_check" in file_path.stem:
+        return file_path
+    return file_path.parent / f"{file_path.stem}-error_check{file_path.suffix}"
+
+
+class DrawioDocument:
+    # a draw.io file parsed once, with compressed pages inflated and every element
+    # indexed by page and id so headers, cells and error styling share the same tree
+    def __init__(self, file_path: str | Path | bytes | BinaryIO):
+        # documents read from memory have no file to write back to
+        self.file_path = Path(file_path) if is_path_source(file_path) else None
+        self.tree = ET.parse(open_source(file_path))
+        self.root = self.tree.getroot()
+        # compressed pages are inflated to be read and edited, and compressed again
+        # when the document is written so it keeps the format it was saved in
+        self.compressed_pages = [
+            inflate_compressed_diagram(diagram_tag)
+            for diagram_tag in filter(is_compressed_diagram, self.root.iter("diagram"))
         ]
-        new_style = ";".join(new_style)
-        element.set("style", new_style)
+        # bare mxGraphModel files are a single page without headers
+        self.pages = (
+            self.root.findall("diagram") if self.root.tag == "mxfile" else [self.root]
+        )
+        self._id_index = None
+
+    def get_saved_root(self) -> Element:
+        if not self.compressed_pages:
+            return self.root
+        saved_root = Element(self.root.tag, self.root.attrib)
+        saved_root.text, saved_root.tail = self.root.text, self.root.tail
+        saved_root.extend(
+            (
+                compress_inflated_diagram(child_tag)
+                if any(child_tag is page_tag for page_tag in self.compressed_pages)
+                else child_tag
+            )
+            for child_tag in self.root
+        )
+        return saved_root
+
+    @property
+    def id_index(self) -> list[dict[str, list[Element]]]:
+        # ids are only unique within a page, so there is one index per page
+        if self._id_index is None:
+            self._id_index = [
+                self._get_page_id_index(page_tag) for page_tag in self.pages
+            ]
+        return self._id_index
+
+    @staticmethod
+    def _get_page_id_index(page_tag: Element) -> dict[str, list[Element]]:
+        page_index = dict()
+        for element in page_tag.iter():
+            if element is not page_tag and (elem_id := element.get("id")) is not None:
+                page_index.setdefault(elem_id, []).append(element)
+        return page_index
+
+    def get_page_headers(self, page_idx: int) -> dict[str, str]:
+        page_tag = self.pages[page_idx]
+        return dict(page_tag.attrib) if page_tag.tag == "diagram" else dict()
+
+    def get_headers(self, page_idx: int = 0) -> dict[str, str]:
+        diagram_tag = self.pages[page_idx]
+        graph_model_tag = next(diagram_tag.iter("mxGraphModel"))
+        return {
+            "modify_date": (
+                self.root.attrib["modified"]
+                if "modified" in self.root.attrib
+                else "July 1, 2024"
+            ),
+            "diagram_name": diagram_tag.attrib["name"],
+            "diagram_id": diagram_tag.attrib["id"],
+            "grid_dx": graph_model_tag.attrib["dx"] if "dx" in graph_model_tag else 0,
+            "grid_dy": graph_model_tag.attrib["dy"] if "dy" in graph_model_tag else 0,
+            "grid_size": int(graph_model_tag.attrib["gridSize"]),
+            "page_width": int(graph_model_tag.attrib["pageWidth"]),
+            "page_height": int(graph_model_tag.attrib["pageHeight"]),
+        }
+
+    def iter_page_cells(self, page_idx: int) -> Iterator[dict[str, str]]:
+        # same records as iter_diagram_cells, read from the parsed tree
+        for root_tag in self.pages[page_idx].iter("root"):
+            for child_tag in root_tag:
+                if child_tag.tag == "mxCell":
+                    cell_attrs = dict(child_tag.attrib)
+                    cell_tag = child_tag
+                elif child_tag.tag in USER_OBJECT_TAGS:
+                    cell_attrs = get_user_object_attrs(child_tag.attrib)
+                    cell_tag = child_tag.find("mxCell")
+                    if cell_tag is None:
+                        yield cell_attrs
+                        continue
+                    cell_attrs.update(cell_tag.attrib)
+                else:
+                    continue
+                for geometry_tag in cell_tag.iterfind("mxGeometry"):
+                    cell_attrs.update(geometry_tag.attrib)
+                yield cell_attrs
+
+    def iter_pages(self) -> Iterator[tuple[dict[str, str], list[dict[str, str]]]]:
+        for page_idx in range(len(self.pages)):
+            page_cells = list(self.iter_page_cells(page_idx))
+            if self.pages[page_idx].tag == "diagram" or page_cells:
+                yield self.get_page_headers(page_idx), page_cells
+
+    def get_page_idx(self, page_id: str) -> int:
+        return next(
+            page_idx
+            for page_idx, page_tag in enumerate(self.pages)
+            if page_tag.get("id") == page_id
+        )
+
+    def set_error_styles(self, elem_ids: Iterable[str], page_idx: int = None) -> None:
+        page_indices = self.id_index if page_idx is None else [self.id_index[page_idx]]
+        for elem_id in elem_ids:
+            for page_index in page_indices:
+                for element in page_index.get(elem_id, []):
+                    # the style of a user object is kept on the cell it wraps
+                    if element.tag in USER_OBJECT_TAGS:
+                        element = element.find("mxCell")
+                        if element is None:
+                            continue
+                    element.set("style", get_error_style(element.get("style", "")))
+
+    def set_cell_attrs(
+        self, page_idx: int, cell_attrs: dict[str, dict[str, str]]
+    ) -> None:
+        for root_tag in self.pages[page_idx].iter("root"):
+            for child_idx, child_tag in enumerate(root_tag):
+                if (attrs := cell_attrs.get(child_tag.get("id"))) is None:
+                    continue
+                if child_tag.tag in USER_OBJECT_TAGS:
+                    child_tag.attrib.update(attrs)
+                elif child_tag.tag == "mxCell":
+                    # plain cells cannot hold custom attributes, so wrap them
+                    root_tag[child_idx] = wrap_user_object(child_tag, attrs)
+        # wrapped cells moved, so the index is rebuilt when it is needed again
+        self._id_index = None
+
+    def write(self, file_path: str | Path = None) -> Path:
+        file_path = self.file_path if file_path is None else Path(file_path)
+        if file_path is None:
+            raise ValueError(
+                "The diagram was read from memory. Please provide a path to write it to, or use to_bytes instead."
+            )
+        ElementTree(self.get_saved_root()).write(file_path)
+        return file_path
+
+    def to_bytes(self) -> bytes:
+        return tostring(self.get_saved_root(), encoding="utf-8")
+
+    def write_error_diagram(
+        self,
+        errors: Iterable[tuple[str, BaseException]],
+        page_errors: dict[str, Iterable[tuple[str, BaseException]]] = None,
+    ) -> Path | None:
+        self.set_error_styles(map(fst, errors))
+        # page errors are scoped to their own page since ids repeat across pages
+        if page_errors:
+            for page_id, errors in page_errors.items():
+                self.set_error_styles(map(fst, errors), self.get_page_idx(page_id))
+
+        # in-memory documents keep the styling, to be read back with to_bytes
+        if self.file_path is None:
+            return None
+        new_file_path = get_error_check_path(self.file_path)
+        ElementTree(self.get_saved_root()).write(new_file_path)
+        return new_file_path
+
+
+def wrap_user_object(cell: Element, cell_attrs: dict[str, str]) -> Element:
+    user_object = Element("UserObject")
+    if (value := cell.attrib.pop("value", None)) is not None:
+        user_object.set("label", value)
+    user_object.set("id", cell.attrib.pop("id"))
+    user_object.attrib.update(cell_attrs)
+    user_object.tail, cell.tail = cell.tail, None
+    user_object.append(cell)
+    return user_object
+
+
+def wrap_user_object_content(
+    content: str,
+    cell_attrs: dict[str, str],
+    clean_label: Callable[[str], str] = None,
+) -> str:
+    # wrap the first cell of a rendered template, leaving any cells after it alone
+    root = ET.fromstring(f"<root>{content}</root>")
+    cell = root[0]
+    if clean_label is not None:
+        # edges keep their label on a child cell, which the reader folds into the edge
+        value = next(
+            (
+                child.get("value")
+                for child in root
+                if child.get("value") is not None
+                and (child is cell or child.get("parent") == cell.get("id"))
+            ),
+            None,
+        )
+        cell_attrs = {**cell_attrs, TermAttr.LABEL.value: clean_label(value or "")}
+    root[0] = wrap_user_object(cell, cell_attrs)
+    return (root.text or "") + "".join(
+        tostring(child, encoding="unicode") for child in root
+    )
+
+
+def write_error_diagram(
+    file_path: str | Path,
+    errors: Iterable[tuple[str, BaseException]],
+    page_errors: dict[str, Iterable[tuple[str, BaseException]]] = None,
+) -> Path:
+    return DrawioDocument(file_path).write_error_diagram(errors, page_errors)
+
+
+def get_validation_cache_path(
+    input_path: str | Path, cache_location: bool | str | Path = True
+) -> Path:
+    input_path = Path(input_path)
+    if cache_location is True:
+        return input_path.parent / f".{input_path.name}.validation.json"
+    # diagrams in a shared cache folder are told apart by their full path
+    path_hash = hashlib.blake2b(
+        str(input_path.resolve()).encode(), digest_size=8
+    ).hexdigest()
+    return Path(cache_location) / f"{input_path.stem}-{path_hash}.validation.json"
+
+
+def read_validation_cache(cache_path: str | Path) -> dict[str, dict[str, str]]:
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return dict()
+    # fingerprints from another version of the checks cannot be trusted
+    if not isinstance(cache, dict) or cache.get("version") != VALIDATION_CACHE_VERSION:
+        return dict()
+    return cache.get("pages", dict())
 
-    new_file_path = file_path
-    if "error_check" not in file_path.stem:
-        new_file_path = file_path.parent / f"{file_path.stem}-error_check{file_path.suffix}"
-    tree.write(new_file_path)
 
-    return new_file_path
+def write_validation_cache(
+    cache_path: str | Path, page_fingerprints: dict[str, dict[str, str]]
+) -> None:
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, "w") as f:
+        json.dump({"version": VALIDATION_CACHE_VERSION, "pages": page_fingerprints}, f)
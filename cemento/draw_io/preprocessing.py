@@ -1,6 +1,10 @@
 import html
 import re
+from collections import Counter
 from collections.abc import Container, Iterable
+from functools import lru_cache
+from hashlib import blake2b
+from html.parser import HTMLParser
 
 import networkx as nx
 from bs4 import BeautifulSoup
@@ -13,6 +17,8 @@ from cemento.draw_io.constants import (
     CircularEdgeError,
     Connector,
     ContainerSubjectError,
+    DiagramElement,
+    DiagramIndex,
     DisconnectedTermError,
     FloatingContainerError,
     FloatingEdgeError,
@@ -69,12 +75,61 @@ def clean_term_preserving_quotes(term: str) -> str:
     return new_value
 
 
+class LabelTextParser(HTMLParser):
+    # collects label text the same way BeautifulSoup's get_text(separator="", strip=True) does,
+    # every run of text between two tags is one string that gets stripped on its own.
+    # markup it does not mirror BeautifulSoup on is flagged so the caller can fall back.
+    SKIPPED_TEXT_TAGS = {"script", "style", "template"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.text_chunks = []
+        self.requires_fallback = False
+        self._data = []
+
+    def _end_data(self) -> None:
+        if self._data:
+            self.text_chunks.append("".join(self._data).strip())
+            self._data = []
+
+    def _flag_fallback(self, *args) -> None:
+        self.requires_fallback = True
+
+    handle_comment = handle_decl = unknown_decl = handle_pi = _flag_fallback
+    handle_charref = handle_entityref = _flag_fallback
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str]]) -> None:
+        self.requires_fallback |= tag in self.SKIPPED_TEXT_TAGS
+        self._end_data()
+
+    def handle_endtag(self, tag: str) -> None:
+        self._end_data()
+
+    def handle_data(self, data: str) -> None:
+        self._data.append(data)
+
+    def get_text(self) -> str:
+        self._end_data()
+        return "".join(self.text_chunks)
+
+
+def get_label_text(term: str) -> str:
+    if "<" not in term and "&" not in term:
+        return term.strip()
+    parser = LabelTextParser()
+    parser.feed(term)
+    parser.close()
+    if parser.requires_fallback:
+        soup = BeautifulSoup(term, "html.parser")
+        return soup.get_text(separator="", strip=True)
+    return parser.get_text()
+
+
+@lru_cache(maxsize=2**16)
 def clean_term(term: str) -> str:
     while (reduced_term := html.unescape(term).strip()) != term:
         term = reduced_term
-    soup = BeautifulSoup(term, "html.parser")
-    term_text = soup.get_text(separator="", strip=True)
-    return term_text
+    return get_label_text(term)
 
 
 def replace_quotes(input_str: str) -> str:
@@ -91,18 +146,15 @@ def remove_quotes(input_str: str) -> str:
     return remove_html_quote(input_str.replace('"', "").strip())
 
 
-def is_line(element: dict[str, any]) -> bool:
-    return ("endArrow" in element and element["endArrow"].lower() == "none") and (
-        "startArrow" not in element or element["startArrow"].lower() == "none"
+def is_line(element: DiagramElement) -> bool:
+    style = element.style_attrs
+    return ("endArrow" in style and style["endArrow"].lower() == "none") and (
+        "startArrow" not in style or style["startArrow"].lower() == "none"
     )
 
 
-def get_diagram_error_exemptions(elements: dict[str, dict[str, any]]) -> set[str]:
-    edges = {
-        key: value
-        for key, value in elements.items()
-        if "edge" in value and value["edge"] == "1"
-    }
+def get_diagram_error_exemptions(elements: dict[str, DiagramElement]) -> set[str]:
+    edges = {key: value for key, value in elements.items() if value.is_edge}
     term_ids = elements.keys() - edges.keys()
     terms = {key: value for key, value in elements.items() if key in term_ids}
 
@@ -115,13 +167,47 @@ def get_diagram_error_exemptions(elements: dict[str, dict[str, any]]) -> set[str
         term_id
         for term_id, term_element in terms.items()
         for reserved_term in reserved_term_annotations
-        if "value" in term_element
-        and reserved_term in term_element["value"].strip().lower()
+        if term_element.value is not None
+        and reserved_term in term_element.value.strip().lower()
     }
 
     return lines | reserved_terms
 
 
+def get_diagram_index(
+    elements: dict[str, DiagramElement],
+    term_ids: set[str],
+    rel_ids: set[str],
+    containers: dict[str, list[str]] = None,
+    container_content: Container[str] = None,
+) -> DiagramIndex:
+    containers = containers if containers is not None else dict()
+    index = DiagramIndex(
+        elements,
+        term_ids,
+        rel_ids,
+        edge_ids=[key for key, element in elements.items() if element.is_edge],
+        containers=containers,
+        container_content=container_content,
+    )
+    for rel_id in rel_ids:
+        rel = elements[rel_id]
+        index.connected_ids.update((rel.source, rel.target))
+        if rel.source is not None and rel.source in containers:
+            index.container_subject_ids.append(rel.source)
+        if rel.source in containers or rel.target in containers:
+            index.connected_container_ids.update((rel.source, rel.target))
+    index.connected_ids -= {None, ""}
+    index.connected_container_ids -= {None, ""}
+    index.nested_container_ids = {
+        member
+        for members in containers.values()
+        for member in members
+        if member in containers
+    }
+    return index
+
+
 def get_connected_term_error_message(element_id, elements):
     error_message = None
 
@@ -129,73 +215,130 @@ def get_connected_term_error_message(element_id, elements):
         return error_message
 
     term = elements.get(element_id, None)
-    value = term.get("value", None) if term else None
+    value = term.value if term else None
     if term and value:
         error_message = f"{value} ({element_id})"
     else:
         error_message = f"container with {element_id}"
 
-    error_message = f"{error_message} located in ({term.get('x', 'Unknown')}, {term.get('y', 'Unknown')})"
+    term_x = term.x if term.x is not None else "Unknown"
+    term_y = term.y if term.y is not None else "Unknown"
+    error_message = f"{error_message} located in ({term_x}, {term_y})"
     return error_message
 
 
-def find_edge_errors_diagram_content(
-    elements: dict[str, dict[str, any]],
-    serious_only: bool = False,
-) -> list[tuple[str, BaseException]]:
-    edges = {
-        key: value
-        for key, value in elements.items()
-        if "edge" in value and value["edge"] == "1"
-    }
+def get_edge_connected_terms(
+    edge: DiagramElement, elements: dict[str, DiagramElement]
+) -> set[str]:
+    return {
+        get_connected_term_error_message(edge.source, elements),
+        get_connected_term_error_message(edge.target, elements),
+    } - {None, ""}
 
-    errors = []
 
-    for edge_id, edge_attr in edges.items():
+def get_element_fingerprints(
+    index: DiagramIndex, error_exemptions: Container[str] = None
+) -> dict[str, str]:
+    # covers everything the rules read about an element and its neighbours, so an element
+    # that kept the fingerprint it had when it passed a check passes it again
+    error_exemptions = error_exemptions if error_exemptions is not None else set()
+    container_content = (
+        index.container_content if index.container_content is not None else set()
+    )
+    container_subject_counts = Counter(index.container_subject_ids)
+
+    def get_neighbour_state(element_id):
+        element = index.elements.get(element_id, None)
+        return None if element is None else (element.value, element.x, element.y)
+
+    states = dict()
+    for term_id in index.term_ids:
+        term = index.elements[term_id]
+        states[term_id] = (
+            "term",
+            term.value,
+            term_id in index.connected_ids,
+            term_id in container_content,
+        )
+    for edge_id in index.edge_ids:
+        edge = index.elements[edge_id]
+        states[edge_id] = states.get(edge_id, ()) + (
+            "edge",
+            edge.value,
+            edge.style,
+            edge.source,
+            edge.target,
+            get_neighbour_state(edge.source),
+            get_neighbour_state(edge.target),
+        )
+    for container_id, members in index.containers.items():
+        container = index.elements.get(container_id, None)
+        states[container_id] = states.get(container_id, ()) + (
+            "container",
+            None if container is None else container.value,
+            tuple(members),
+            tuple(map(get_neighbour_state, members)),
+            container_subject_counts[container_id],
+            container_id in index.connected_container_ids,
+            container_id in index.nested_container_ids,
+        )
+    return {
+        element_id: blake2b(
+            repr((element_id, element_id in error_exemptions, state)).encode(),
+            digest_size=8,
+        ).hexdigest()
+        for element_id, state in states.items()
+    }
+
 
-        source_id = edge_attr.get("source", None)
-        target_id = edge_attr.get("target", None)
-        connected_terms = {
-            get_connected_term_error_message(source_id, elements),
-            get_connected_term_error_message(target_id, elements),
-        } - {None, ""}
+def find_edge_errors(
+    index: DiagramIndex,
+    serious_only: bool = False,
+    checked_ids: Container[str] = None,
+) -> list[tuple[str, BaseException]]:
+    errors = []
+    for edge_id in index.edge_ids:
+        if checked_ids is not None and edge_id not in checked_ids:
+            continue
+        edge = index.elements[edge_id]
+        edge_style = edge.style_attrs
+        start_arrow = edge_style.get("startArrow", None)
+        end_arrow = edge_style.get("endArrow", None)
+        has_start_arrow = start_arrow is not None and start_arrow.lower() != "none"
+        is_bidirectional = has_start_arrow and (
+            end_arrow is None or end_arrow.lower() != "none"
+        )
+        is_inverted = has_start_arrow and not is_bidirectional
+        is_circular = bool(edge.source and edge.target) and edge.source == edge.target
+        # draw.io reports circular edges that aren't there, the serious check skips them
+        if serious_only and is_circular:
+            continue
+        if (
+            edge.value
+            and not is_bidirectional
+            and not is_inverted
+            and edge.source
+            and edge.target
+            and not is_circular
+        ):
+            continue
 
-        edge_content = edge_attr.get("value", None)
+        # only format the messages for edges that actually have an error
+        connected_terms = get_edge_connected_terms(edge, index.elements)
+        edge_content = edge.value
 
-        if "value" not in edge_attr or not edge_attr["value"]:
+        if not edge.value:
             errors.append((edge_id, BlankEdgeLabelError(edge_id, connected_terms)))
 
-        if (
-            ("startArrow" in edge_attr and edge_attr["startArrow"].lower() != "none")
-            and ("endArrow" in edge_attr and edge_attr["endArrow"].lower() != "none")
-            or (
-                (
-                    "startArrow" in edge_attr
-                    and edge_attr["startArrow"].lower() != "none"
-                )
-                and "endArrow" not in edge_attr
+        if is_bidirectional or is_inverted:
+            ErrorType = (
+                BidirectionalEdgeError if is_bidirectional else InvertedEdgeError
             )
-        ):
             connected_terms_iter = iter(connected_terms)
             errors.append(
                 (
                     edge_id,
-                    BidirectionalEdgeError(
-                        edge_id,
-                        edge_content,
-                        next(connected_terms_iter, None),
-                        next(connected_terms_iter, None),
-                    ),
-                )
-            )
-        elif (
-            "startArrow" in edge_attr and edge_attr["startArrow"].lower() != "none"
-        ) and ("endArrow" in edge_attr and edge_attr["endArrow"].lower() == "none"):
-            connected_terms_iter = iter(connected_terms)
-            errors.append(
-                (
-                    edge_id,
-                    InvertedEdgeError(
+                    ErrorType(
                         edge_id,
                         edge_content,
                         next(connected_terms_iter, None),
@@ -204,16 +347,9 @@ def find_edge_errors_diagram_content(
                 )
             )
 
-        if all(
-            [
-                "source" not in edge_attr or not edge_attr["source"],
-                "target" not in edge_attr or not edge_attr["target"],
-            ]
-        ):
+        if not edge.source and not edge.target:
             errors.append((edge_id, FloatingEdgeError(edge_id, edge_content)))
-            continue
-
-        if "source" not in edge_attr or not edge_attr["source"]:
+        elif not edge.source:
             errors.append(
                 (
                     edge_id,
@@ -222,9 +358,7 @@ def find_edge_errors_diagram_content(
                     ),
                 )
             )
-            continue
-
-        if "target" not in edge_attr or not edge_attr["target"]:
+        elif not edge.target:
             errors.append(
                 (
                     edge_id,
@@ -233,155 +367,142 @@ def find_edge_errors_diagram_content(
                     ),
                 )
             )
-            continue
-
-        if (
-            "target" in edge_attr
-            and "source" in edge_attr
-            and edge_attr["target"] == edge_attr["source"]
-        ):
+        elif is_circular:
             errors.append((edge_id, CircularEdgeError(edge_id, edge_content)))
-
-    if serious_only:
-        # hide the errors related to circular edges (false positive bug with draw.io)
-        circular_edge_errors = filter(
-            lambda error: isinstance(snd(error), CircularEdgeError), errors
-        )
-        non_affected_ids = {id for id, error in circular_edge_errors}
-        errors = list(filter(lambda error: fst(error) not in non_affected_ids, errors))
-
     return errors
 
 
-# TODO: memoize
-def get_connected_terms(elements: dict[str, dict[str, any]], rel_ids: set[str]):
-    return {
-        term
-        for rel_id in rel_ids
-        for term in (
-            elements[rel_id].get("source", None),
-            elements[rel_id].get("target", None),
-        )
-    } - {None, ""}
-
-
-def find_shape_errors_diagram_content(
-    elements: dict[str, dict[str, any]],
-    term_ids: set[str],
-    rel_ids: set[str],
-    container_content: Container[str] = None,
+def find_shape_errors(
+    index: DiagramIndex, checked_ids: Container[str] = None
 ) -> list[tuple[str, BaseException]]:
-    connected_terms = get_connected_terms(elements, rel_ids)
-
     errors = []
-    for term_id in term_ids:
-        term = elements[term_id]
-        if term_id not in connected_terms:
-            if container_content is None or term_id not in container_content:
-                errors.append((term_id, DisconnectedTermError(term_id, term["value"])))
+    for term_id in index.term_ids:
+        if checked_ids is not None and term_id not in checked_ids:
+            continue
+        term = index.elements[term_id]
+        if term_id not in index.connected_ids and (
+            index.container_content is None or term_id not in index.container_content
+        ):
+            errors.append((term_id, DisconnectedTermError(term_id, term.value)))
 
-        if "value" not in term or not term["value"]:
+        if not term.value:
             errors.append((term_id, BlankTermLabelError(term_id)))
     return errors
 
 
-def map_element_values(
-    elements: dict[str, dict[str, any]], element_ids: Iterable[str]
-) -> Iterable[str]:
-    return (
-        (
-            element_attr["value"]
-            if "value" in (element_attr := elements[element_id])
-            else None
-        )
-        for element_id in element_ids
-    )
-
-
-def find_container_errors_diagram_content(
-    elements: dict[str, dict[str, any]],
-    containers: dict[str, list[str]],
-    rel_ids: set[str],
+def find_container_errors(
+    index: DiagramIndex, checked_ids: Container[str] = None
 ) -> list[tuple[str, BaseException]]:
     errors = []
-    if containers is None:
-        return errors
-
-    for container_id, members in containers.items():
+    for container_id, members in index.containers.items():
+        if checked_ids is not None and container_id not in checked_ids:
+            continue
         for member_id in members:
-            member = elements[member_id].get("value", None)
+            member = index.elements[member_id].value
             if member is None or not member.strip():
                 errors.append((container_id, NestedSyntaxSugarError))
 
-    collection_subject_rels = list(
-        filter(
-            lambda x: "source" in elements[x] and elements[x]["source"] in containers,
-            rel_ids,
-        )
-    )
-    for rel_id in collection_subject_rels:
-        container_id = elements[rel_id]["source"]
+    for container_id in index.container_subject_ids:
+        if checked_ids is not None and container_id not in checked_ids:
+            continue
         errors.append((container_id, ContainerSubjectError))
 
-    connected_containers = set()
-    for rel_id in rel_ids:
-        source = elements[rel_id].get("source", None)
-        target = elements[rel_id].get("target", None)
-        if source in containers or target in containers:
-            connected_containers.add(source)
-            connected_containers.add(target)
-
-    connected_containers -= {None, ""}
-
-    nested_containers = set()
-    for members in containers.values():
-        for member in members:
-            if member in containers:
-                nested_containers.add(member)
     floating_containers = (
-        set(containers.keys()) - connected_containers - nested_containers
+        index.containers.keys()
+        - index.connected_container_ids
+        - index.nested_container_ids
     )
-
     for container_id in floating_containers:
+        if checked_ids is not None and container_id not in checked_ids:
+            continue
         errors.append((container_id, FloatingContainerError))
 
     submit_errors = []
     for container_id, ErrorType in errors:
-        members = list(
-            map(
-                lambda member_id: (member_id, elements[member_id].get("value", None)),
-                containers[container_id],
-            )
-        )
-        member_ids, member_values = zip(*members, strict=True)
-        container_value = elements[container_id].get("value", None)
+        member_ids = list(index.containers[container_id])
+        member_values = list(map_element_values(index.elements, member_ids))
+        container_value = index.elements[container_id].value
         submit_errors.append(
             (
                 container_id,
-                ErrorType(
-                    container_id, container_value, list(member_ids), list(member_values)
-                ),
+                ErrorType(container_id, container_value, member_ids, member_values),
             )
         )
-
     return submit_errors
 
 
+def find_edge_errors_diagram_content(
+    elements: dict[str, DiagramElement],
+    serious_only: bool = False,
+) -> list[tuple[str, BaseException]]:
+    index = get_diagram_index(elements, set(), set())
+    return find_edge_errors(index, serious_only=serious_only)
+
+
+def get_connected_terms(elements: dict[str, DiagramElement], rel_ids: set[str]):
+    return get_diagram_index(elements, set(), rel_ids).connected_ids
+
+
+def find_shape_errors_diagram_content(
+    elements: dict[str, DiagramElement],
+    term_ids: set[str],
+    rel_ids: set[str],
+    container_content: Container[str] = None,
+) -> list[tuple[str, BaseException]]:
+    index = get_diagram_index(
+        elements, term_ids, rel_ids, container_content=container_content
+    )
+    return find_shape_errors(index)
+
+
+def map_element_values(
+    elements: dict[str, DiagramElement], element_ids: Iterable[str]
+) -> Iterable[str]:
+    return (elements[element_id].value for element_id in element_ids)
+
+
+def find_container_errors_diagram_content(
+    elements: dict[str, DiagramElement],
+    containers: dict[str, list[str]],
+    rel_ids: set[str],
+) -> list[tuple[str, BaseException]]:
+    if containers is None:
+        return []
+    index = get_diagram_index(elements, set(), rel_ids, containers=containers)
+    return find_container_errors(index)
+
+
 def find_errors_diagram_content(
-    elements: dict[str, dict[str, any]],
+    elements: dict[str, DiagramElement],
     term_ids: set[str],
     rel_ids: set[str],
     serious_only: bool = False,
     containers: dict[str, list[str]] = None,
     container_content: Container[str] = None,
     error_exemptions: set[str] = None,
+) -> list[tuple[str, BaseException]]:
+    index = get_diagram_index(
+        elements,
+        term_ids,
+        rel_ids,
+        containers=containers,
+        container_content=container_content,
+    )
+    return find_index_errors(
+        index, serious_only=serious_only, error_exemptions=error_exemptions
+    )
+
+
+def find_index_errors(
+    index: DiagramIndex,
+    serious_only: bool = False,
+    error_exemptions: set[str] = None,
+    checked_ids: Container[str] = None,
 ) -> list[tuple[str, BaseException]]:
     errors = (
-        find_shape_errors_diagram_content(
-            elements, term_ids, rel_ids, container_content
-        )
-        + find_edge_errors_diagram_content(elements, serious_only=serious_only)
-        + find_container_errors_diagram_content(elements, containers, rel_ids)
+        find_shape_errors(index, checked_ids=checked_ids)
+        + find_edge_errors(index, serious_only=serious_only, checked_ids=checked_ids)
+        + find_container_errors(index, checked_ids=checked_ids)
     )
     if error_exemptions is not None:
         errors = list(
@@ -1,13 +1,29 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from itertools import chain
 from pathlib import Path
+from typing import BinaryIO
 
+import networkx as nx
 from networkx import DiGraph
 
-from cemento.draw_io.constants import BadDiagramError, DiagramKey
-from cemento.draw_io.io import write_error_diagram
+from cemento.draw_io.constants import (
+    BadDiagramError,
+    DiagramKey,
+    DiagramPage,
+)
+from cemento.draw_io.io import (
+    DrawioDocument,
+    get_validation_cache_path,
+    iter_diagram_pages,
+    read_validation_cache,
+    write_validation_cache,
+)
 from cemento.draw_io.preprocessing import (
-    find_errors_diagram_content,
+    find_index_errors,
     get_diagram_error_exemptions,
+    get_diagram_index,
+    get_element_fingerprints,
 )
 from cemento.draw_io.transforms import (
     extract_elements,
@@ -15,27 +31,218 @@ from cemento.draw_io.transforms import (
     get_container_collection_types,
     get_container_values,
     link_container_members,
+    parse_cell_elements,
     parse_containers,
-    parse_elements,
+    relabel_container_nodes,
     relabel_graph_nodes_with_node_attr,
 )
+from cemento.term_matching.resolver import TermResolver
 from cemento.term_matching.transforms import get_prefixes, get_strat_predicates_str
 from cemento.utils.io import (
     get_default_defaults_folder,
     get_default_prefixes_file,
     get_default_references_folder,
+    is_path_source,
+    read_source,
 )
+from cemento.utils.utils import fst, snd
 
 
-def read_drawio(
-    input_path: str | Path,
+def parse_drawio_page(cells: list[dict[str, str]]) -> DiagramPage:
+    elements = parse_cell_elements(cells)
+    containers = parse_containers(elements)
+    non_container_elements = dict(
+        filter(lambda item: item[0] not in containers.keys(), elements.items())
+    )
+    term_ids, rel_ids = extract_elements(non_container_elements)
+    return DiagramPage(
+        elements=elements,
+        containers=containers,
+        container_content=set(chain(*containers.values())),
+        non_container_elements=non_container_elements,
+        term_ids=term_ids,
+        rel_ids=rel_ids,
+        error_exemptions=get_diagram_error_exemptions(non_container_elements),
+    )
+
+
+def add_page_name(
+    errors: list[tuple[str, BaseException]], page_name: str = None
+) -> list[tuple[str, BaseException]]:
+    # the errors keep their type, with the page they were found on attached
+    if page_name is not None:
+        for _, error in errors:
+            error.page_name = page_name
+    return errors
+
+
+def check_drawio_page(
+    cells: list[dict[str, str]],
+    page_name: str = None,
+    clean_fingerprints: dict[str, str] = None,
+    keep_page: bool = True,
+) -> tuple[list[tuple[str, BaseException]], DiagramPage | None, dict[str, str] | None]:
+    page = parse_drawio_page(cells)
+    index = get_diagram_index(
+        page.elements,
+        page.term_ids,
+        page.rel_ids,
+        containers=page.containers,
+        container_content=page.container_content,
+    )
+    fingerprints, checked_ids = None, None
+    if clean_fingerprints is not None:
+        # only recheck the elements that changed, or whose neighbours changed, since
+        # they last passed the check
+        fingerprints = get_element_fingerprints(index, page.error_exemptions)
+        checked_ids = {
+            element_id
+            for element_id, fingerprint in fingerprints.items()
+            if clean_fingerprints.get(element_id, None) != fingerprint
+        }
+    errors = find_index_errors(
+        index,
+        serious_only=True,
+        error_exemptions=page.error_exemptions,
+        checked_ids=checked_ids,
+    )
+    if fingerprints is not None:
+        error_ids = set(map(fst, errors))
+        fingerprints = {
+            element_id: fingerprint
+            for element_id, fingerprint in fingerprints.items()
+            if element_id not in error_ids
+        }
+    return (
+        add_page_name(errors, page_name),
+        page if keep_page else None,
+        fingerprints,
+    )
+
+
+def check_drawio_pages(
+    page_headers: list[dict[str, str]],
+    page_cells: list[list[dict[str, str]]],
+    max_workers: int = 1,
+    keep_pages: bool = True,
+    cache_path: str | Path = None,
+) -> tuple[dict[str, list[tuple[str, BaseException]]], list[DiagramPage | None]]:
+    page_ids = [headers.get("id", "") for headers in page_headers]
+    page_caches = read_validation_cache(cache_path) if cache_path else None
+    page_clean_fingerprints = [
+        page_caches.get(page_id, dict()) if page_caches is not None else None
+        for page_id in page_ids
+    ]
+    is_multi_page = len(page_cells) > 1
+    # only prefix errors with the page name when there is more than one page
+    page_names = [
+        headers.get("name", f"Page-{page_idx + 1}") if is_multi_page else None
+        for page_idx, headers in enumerate(page_headers)
+    ]
+
+    if is_multi_page and max_workers != 1:
+        # parsed pages are too big to send back, so the graphs are built from the cells
+        check_page = partial(check_drawio_page, keep_page=False)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(
+                executor.map(
+                    check_page, page_cells, page_names, page_clean_fingerprints
+                )
+            )
+    else:
+        check_page = partial(check_drawio_page, keep_page=keep_pages)
+        results = list(map(check_page, page_cells, page_names, page_clean_fingerprints))
+
+    if cache_path:
+        write_validation_cache(
+            cache_path,
+            {
+                page_id: fingerprints
+                for page_id, (_, _, fingerprints) in zip(page_ids, results)
+            },
+        )
+    page_errors = {
+        headers.get("id"): errors
+        for headers, (errors, _, _) in zip(page_headers, results)
+        if errors
+    }
+    return page_errors, list(map(snd, results))
+
+
+def get_check_cache_path(
+    input_path: str | Path | bytes | BinaryIO,
+    validation_cache: bool | str | Path = False,
+) -> Path | None:
+    # diagrams read from memory have nowhere to keep a cache
+    if not validation_cache or not is_path_source(input_path):
+        return None
+    return get_validation_cache_path(input_path, validation_cache)
+
+
+def write_page_errors(
+    document: DrawioDocument, page_errors: dict[str, list[tuple[str, BaseException]]]
+) -> Path | None:
+    if len(document.pages) > 1:
+        return document.write_error_diagram([], page_errors=page_errors)
+    return document.write_error_diagram(list(chain(*page_errors.values())))
+
+
+def validate_drawio(
+    input_path: str | Path | bytes | BinaryIO,
+    max_workers: int = 1,
+    write_error_diagram: bool = False,
+    validation_cache: bool | str | Path = False,
+) -> list[tuple[str, BaseException]]:
+    input_path = read_source(input_path)
+    # only the cells are needed to check a diagram, so the references are never loaded
+    pages = list(iter_diagram_pages(input_path))
+    page_errors, _ = check_drawio_pages(
+        list(map(fst, pages)),
+        list(map(snd, pages)),
+        max_workers=max_workers,
+        keep_pages=False,
+        cache_path=get_check_cache_path(input_path, validation_cache),
+    )
+    if page_errors and write_error_diagram:
+        write_page_errors(DrawioDocument(input_path), page_errors)
+    return list(chain(*page_errors.values()))
+
+
+def read_drawio_page(
+    cells: list[dict[str, str]],
+    strat_props: set[str] = None,
+    relabel_key: DiagramKey = DiagramKey.LABEL,
+    inverted_rank_arrow: bool = False,
+    page: DiagramPage = None,
+) -> DiGraph:
+    page = parse_drawio_page(cells) if page is None else page
+    container_labels = get_container_values(page.containers, page.elements)
+    graph = generate_graph(
+        page.non_container_elements,
+        page.term_ids,
+        page.rel_ids,
+        strat_terms=strat_props,
+        exempted_elements=page.error_exemptions,
+        inverted_rank_arrow=inverted_rank_arrow,
+    )
+    graph = get_container_collection_types(graph, container_labels, page.containers)
+    graph = link_container_members(graph, page.containers)
+    graph = relabel_graph_nodes_with_node_attr(graph, new_attr_label=relabel_key.value)
+    return graph
+
+
+def read_drawio_pages(
+    input_path: str | Path | bytes | BinaryIO,
     onto_ref_folder: str | Path = None,
     prefixes_file: str | Path = None,
     defaults_folder: str | Path = None,
     relabel_key: DiagramKey = DiagramKey.LABEL,
     check_errors: bool = False,
     inverted_rank_arrow: bool = False,
-) -> DiGraph:
+    term_resolver: TermResolver = None,
+    max_workers: int = 1,
+    validation_cache: bool | str | Path = False,
+) -> list[DiGraph]:
     prefixes_file = get_default_prefixes_file() if not prefixes_file else prefixes_file
     defaults_folder = (
         get_default_defaults_folder() if not defaults_folder else defaults_folder
@@ -44,52 +251,102 @@ def read_drawio(
         get_default_references_folder() if not onto_ref_folder else onto_ref_folder
     )
 
-    elements = parse_elements(input_path)
-    containers = parse_containers(elements)
-    container_content = set(chain(*containers.values()))
-    container_labels = get_container_values(containers, elements)
-    non_container_elements = dict(
-        filter(lambda item: item[0] not in containers.keys(), elements.items())
-    )
-    term_ids, rel_ids = extract_elements(non_container_elements)
-    strat_props = None
-    prefixes, inv_prefixes = get_prefixes(prefixes_file, onto_ref_folder)
-    strat_props = get_strat_predicates_str(
-        onto_ref_folder, defaults_folder, inv_prefixes
-    )
-
-    error_exemptions = get_diagram_error_exemptions(non_container_elements)
+    # the cells are streamed, and the tree is only parsed to write an error diagram.
+    # in-memory sources are read up front so they can be parsed a second time.
+    input_path = read_source(input_path) if check_errors else input_path
+    pages = list(iter_diagram_pages(input_path))
+    page_headers = list(map(fst, pages))
+    page_cells = list(map(snd, pages))
+    is_multi_page = len(pages) > 1
 
+    # check the diagram before loading the references, so a bad diagram fails early
+    parsed_pages = [None] * len(pages)
     if check_errors:
         print("Checking for diagram errors...")
-        errors = find_errors_diagram_content(
-            elements,
-            term_ids,
-            rel_ids,
-            serious_only=True,
-            containers=containers,
-            container_content=container_content,
-            error_exemptions=error_exemptions,
+        page_errors, parsed_pages = check_drawio_pages(
+            page_headers,
+            page_cells,
+            max_workers=max_workers,
+            cache_path=get_check_cache_path(input_path, validation_cache),
         )
-        if errors:
-            checked_diagram_path = write_error_diagram(input_path, errors)
+        if page_errors:
+            document = DrawioDocument(input_path)
+            checked_diagram_path = write_page_errors(document, page_errors)
+            error_diagram = (
+                document.to_bytes() if checked_diagram_path is None else None
+            )
             print(
                 "The inputted file came down with the following problems. Please fix them appropriately."
             )
-            for elem_id, error in errors:
+            for elem_id, error in chain(*page_errors.values()):
                 print(elem_id, error)
-            raise BadDiagramError(checked_diagram_path)
+            raise BadDiagramError(checked_diagram_path, error_diagram=error_diagram)
+
+    strat_props = None
+    if term_resolver is not None:
+        strat_props = term_resolver.strat_terms
+    else:
+        prefixes, inv_prefixes = get_prefixes(prefixes_file, onto_ref_folder)
+        strat_props = get_strat_predicates_str(
+            onto_ref_folder, defaults_folder, inv_prefixes
+        )
 
     print("generating graph...")
-    graph = generate_graph(
-        non_container_elements,
-        term_ids,
-        rel_ids,
-        strat_terms=strat_props,
-        exempted_elements=error_exemptions,
+    read_page = partial(
+        read_drawio_page,
+        strat_props=strat_props,
+        relabel_key=relabel_key,
         inverted_rank_arrow=inverted_rank_arrow,
     )
-    graph = get_container_collection_types(graph, container_labels, containers)
-    graph = link_container_members(graph, containers)
-    graph = relabel_graph_nodes_with_node_attr(graph, new_attr_label=relabel_key.value)
+    if is_multi_page and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            graphs = list(executor.map(read_page, page_cells))
+    else:
+        graphs = [
+            read_page(cells, page=page) for cells, page in zip(page_cells, parsed_pages)
+        ]
+
+    for page_idx, (graph, headers) in enumerate(zip(graphs, page_headers)):
+        graph.graph["page_name"] = headers.get("name", f"Page-{page_idx + 1}")
+        graph.graph["page_id"] = headers.get("id")
+    return graphs
+
+
+def read_drawio(
+    input_path: str | Path | bytes | BinaryIO,
+    onto_ref_folder: str | Path = None,
+    prefixes_file: str | Path = None,
+    defaults_folder: str | Path = None,
+    relabel_key: DiagramKey = DiagramKey.LABEL,
+    check_errors: bool = False,
+    inverted_rank_arrow: bool = False,
+    term_resolver: TermResolver = None,
+    max_workers: int = 1,
+    validation_cache: bool | str | Path = False,
+) -> DiGraph:
+    graphs = read_drawio_pages(
+        input_path,
+        onto_ref_folder=onto_ref_folder,
+        prefixes_file=prefixes_file,
+        defaults_folder=defaults_folder,
+        relabel_key=relabel_key,
+        check_errors=check_errors,
+        inverted_rank_arrow=inverted_rank_arrow,
+        term_resolver=term_resolver,
+        max_workers=max_workers,
+        validation_cache=validation_cache,
+    )
+    return compose_drawio_pages(graphs)
+
+
+def compose_drawio_pages(graphs: list[DiGraph]) -> DiGraph:
+    if len(graphs) == 1:
+        return graphs[0]
+    # nodes are keyed by their label, so the same term on different pages is unified,
+    # while containers are kept apart since their cell ids repeat on copied pages
+    graph = nx.compose_all(
+        relabel_container_nodes(page_graph, str(page_idx))
+        for page_idx, page_graph in enumerate(graphs)
+    )
+    graph.graph = {"pages": [page_graph.graph["page_name"] for page_graph in graphs]}
     return graph
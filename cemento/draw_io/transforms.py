@@ -1,12 +1,14 @@
 from collections import defaultdict
 from collections.abc import Callable, Iterable
 from dataclasses import asdict
-from functools import partial, reduce
+from functools import partial
 from itertools import accumulate, starmap
 from pathlib import Path
+from string import Template
+from sys import intern
+from typing import BinaryIO
 
 import networkx as nx
-from defusedxml import ElementTree as ET
 from networkx import DiGraph
 
 from cemento.draw_io.constants import (
@@ -17,6 +19,7 @@ from cemento.draw_io.constants import (
     ClassShape,
     Connector,
     DiagramInfo,
+    DiagramElement,
     DiagramKey,
     DiagramObject,
     InstanceShape,
@@ -27,14 +30,20 @@ from cemento.draw_io.constants import (
     NxStringEdge,
     Shape,
     ShapeType,
+    TermAttr,
+)
+from cemento.draw_io.io import (
+    get_template_files,
+    iter_diagram_cells,
+    wrap_user_object_content,
 )
-from cemento.draw_io.io import get_template_files
 from cemento.draw_io.preprocessing import (
     clean_term_preserving_quotes,
     remove_predicate_quotes,
 )
 from cemento.term_matching.constants import RANK_PROPS
 from cemento.term_matching.transforms import substitute_term
+from cemento.utils.constants import valid_collection_types
 from cemento.utils.utils import (
     filter_graph,
     fst,
@@ -45,120 +54,110 @@ from cemento.utils.utils import (
 )
 
 
-def clean_element_values(
-    elements: dict[str, dict[str, any]],
-) -> dict[str, dict[str, any]]:
-    return {
-        key: (
-            {
-                **element_attr,
-                "value": (
-                    quotes_preserved
-                    if (
-                        quotes_preserved := clean_term_preserving_quotes(
-                            element_attr["value"]
-                        )
-                    )
-                    != '""'
-                    else ""
-                ),
-            }
-            if "value" in element_attr
-            else element_attr
-        )
-        for key, element_attr in elements.items()
-    }
-
-
-def replace_element_value_html_quotes(
-    elements: dict[str, dict[str, any]],
-) -> dict[str, dict[str, any]]:
-    return {
-        key: (
-            {**element_attr, "value": element_attr["value"].replace("&quot;", '"')}
-            if "value" in element_attr
-            else element_attr
-        )
-        for key, element_attr in elements.items()
-    }
-
-
-def parse_elements(file_path: str | Path) -> dict[str, dict[str, any]]:
-    elements = retrieve_elements(file_path)
-    elements = assign_edge_label_attrs(elements)
-    elements = clean_element_values(elements)
-    elements = replace_element_value_html_quotes(elements)
-    return elements
-
+def clean_element_value(value: str) -> str:
+    quotes_preserved = clean_term_preserving_quotes(value)
+    value = quotes_preserved if quotes_preserved != '""' else ""
+    return value.replace("&quot;", '"')
+
+
+def parse_elements(
+    file_path: str | Path | bytes | BinaryIO,
+) -> dict[str, DiagramElement]:
+    return parse_cell_elements(iter_diagram_cells(file_path))
+
+
+def get_cell_element(cell_attrs: dict[str, str]) -> DiagramElement:
+    # the remaining attributes stay in the cell dict, which is kept as the record's extras
+    value = cell_attrs.pop("value", None)
+    # cells share a handful of styles, so keep one copy of each style string
+    style = cell_attrs.pop("style", None)
+    return DiagramElement(
+        id=cell_attrs.pop("id", None),
+        parent=cell_attrs.pop("parent", None),
+        value=clean_element_value(value) if value is not None else None,
+        source=cell_attrs.pop("source", None),
+        target=cell_attrs.pop("target", None),
+        is_vertex=cell_attrs.pop("vertex", None) == "1",
+        is_edge=cell_attrs.pop("edge", None) == "1",
+        x=cell_attrs.pop("x", None),
+        y=cell_attrs.pop("y", None),
+        width=cell_attrs.pop("width", None),
+        height=cell_attrs.pop("height", None),
+        style=intern(style) if style is not None else None,
+        extra_attrs=cell_attrs,
+    )
 
-def retrieve_elements(file_path: str | Path) -> dict[str, dict[str, any]]:
-    # parse elements
-    tree = ET.parse(file_path)
 
+def parse_cell_elements(cells: Iterable[dict[str, str]]) -> dict[str, DiagramElement]:
     elements = dict()
-    all_cells = [
-        child for root in tree.iter("root") for child in root.findall("mxCell")
-    ]
-
-    for cell in all_cells:
-        cell_attrs = dict()
-        cell_attrs.update(cell.attrib)
-
-        nested_attrs = reduce(
-            lambda acc, subcell: acc | subcell.attrib,
-            cell.findall("mxGeometry"),
-            dict(),
-        )
-        cell_attrs.update(nested_attrs)
-
-        style_attrib_str = (
-            cell_attrs["style"].split(";") if "style" in cell_attrs else []
-        )
-        style_term_pairs = [tuple(style.split("=")) for style in style_attrib_str]
-        style_terms = reduce(
-            lambda acc, style_pair: acc | {fst(style_pair): snd(style_pair)},
-            filter(lambda style_pair: len(style_pair) > 1, style_term_pairs),
-            dict(),
-        )
-        style_tags = reduce(
-            lambda acc, style: acc + [fst(style)],
-            filter(lambda tag: len(tag) <= 1 and fst(tag), style_term_pairs),
-            list(),
+    edge_labels = []
+    for cell_attrs in cells:
+        element = get_cell_element(cell_attrs)
+        if element.is_edge_label:
+            edge_labels.append(element)
+        else:
+            elements[element.id] = element
+    # edge labels are folded into the edge they annotate
+    for edge_label in edge_labels:
+        rel = elements[edge_label.parent]
+        rel.add_tags(edge_label.tags)
+        rel.value = edge_label.value
+        rel.extra_attrs.update(
+            (attr.value, edge_label.extra_attrs[attr.value])
+            for attr in TermAttr
+            if attr.value in edge_label.extra_attrs
         )
-        cell_attrs.update(style_terms)
-        cell_attrs["tags"] = style_tags
-        elements[cell_attrs["id"]] = cell_attrs
-
     return elements
 
 
-def assign_edge_label_attrs(
-    elements: dict[str, dict[str, any]],
-) -> dict[str, dict[str, any]]:
-    new_elements = elements
-    to_remove = set()
-    for label_id, data in elements.items():
-        if "tags" in data and "edgeLabel" in data["tags"]:
-            rel_id = data["parent"]
-            new_elements[rel_id]["tags"] += data["tags"]
-            new_elements[rel_id]["value"] = data["value"]
-            to_remove.add(label_id)
-    new_elements = {
-        key: value for key, value in new_elements.items() if key not in to_remove
-    }
-    return new_elements
+def get_element_term_attrs(element: DiagramElement) -> dict[str, any]:
+    # a stored resolution is only trusted while the label it was made for is unchanged
+    cell_attrs = element.extra_attrs
+    if (
+        TermAttr.IRI.value not in cell_attrs
+        or cell_attrs.get(TermAttr.LABEL.value, None) != element.value
+    ):
+        return dict()
+    term_attrs = {"iri": cell_attrs[TermAttr.IRI.value]}
+    if cell_attrs.get(TermAttr.TYPE.value, None):
+        term_attrs["term_type"] = cell_attrs[TermAttr.TYPE.value]
+    if cell_attrs.get(TermAttr.SCORE.value, None):
+        term_attrs["match_score"] = float(cell_attrs[TermAttr.SCORE.value])
+    return term_attrs
+
+
+def get_cell_term_attrs(
+    term_attrs: dict[str, any], label: str = None
+) -> dict[str, str]:
+    if not term_attrs.get("iri", None):
+        return dict()
+    cell_attrs = {TermAttr.IRI.value: str(term_attrs["iri"])}
+    if term_attrs.get("term_type", None):
+        cell_attrs[TermAttr.TYPE.value] = term_attrs["term_type"]
+    if term_attrs.get("match_score", None) is not None:
+        cell_attrs[TermAttr.SCORE.value] = f"{term_attrs['match_score']:g}"
+    if label is not None:
+        cell_attrs[TermAttr.LABEL.value] = label
+    return cell_attrs
+
+
+def get_element_style_attrs(cell_attrs: dict[str, any]) -> dict[str, any]:
+    style_terms, style_tags = (
+        DiagramElement.parse_style(cell_attrs["style"])
+        if "style" in cell_attrs
+        else (dict(), [])
+    )
+    return {**style_terms, "tags": style_tags}
 
 
 def extract_elements(
-    elements: dict[str, dict[str, any]],
+    elements: dict[str, DiagramElement],
 ) -> tuple[set[str], set[str]]:
     term_ids = set(
         map(
             fst,
             filter(
-                lambda x: "vertex" in (attrs := snd(x))
-                and attrs["vertex"] == "1"
-                and ("tags" not in attrs or "edgeLabel" not in attrs["tags"]),
+                lambda x: (element := snd(x)).is_vertex and not element.is_edge_label,
                 elements.items(),
             ),
         )
@@ -168,11 +167,11 @@ def extract_elements(
             fst,
             filter(
                 lambda x: (
-                    "value" in (attrs := snd(x))
-                    and "source" in attrs
-                    and "target" in attrs
+                    (element := snd(x)).value is not None
+                    and element.source is not None
+                    and element.target is not None
                 )
-                or ("tags" in attrs and "edgeLabel" in attrs["tags"]),
+                or element.is_edge_label,
                 elements.items(),
             ),
         )
@@ -185,7 +184,7 @@ def extract_elements(
 
 
 def generate_graph(
-    elements: dict[str, dict[str, any]],
+    elements: dict[str, DiagramElement],
     term_ids: set[str],
     relationship_ids: set[str],
     strat_terms: set[str] = None,
@@ -206,31 +205,27 @@ def generate_graph(
         relationship_ids,
     )
     for term_id in term_ids:
-        term = elements[term_id]["value"]
+        term = elements[term_id].value
         # TODO: find more sophisticated method to detect literals, or mention method in the docs
         graph.add_node(
             term_id,
             term_id=term_id,
             label=term,
             is_literal=('"' in term or "&quot;" in term),
-            parent=(
-                term_info["parent"]
-                if "parent" in (term_info := elements[term_id])
-                else None
-            ),
+            parent=elements[term_id].parent,
+            **get_element_term_attrs(elements[term_id]),
         )
 
     # add all relationships
     for rel_id in relationship_ids:
-        try:
-            subj_id = elements[rel_id]["source"]
-            obj_id = elements[rel_id]["target"]
-        except KeyError as e:
+        subj_id, obj_id = elements[rel_id].source, elements[rel_id].target
+        if subj_id is None or obj_id is None:
+            missing_attr = "source" if subj_id is None else "target"
             raise ValueError(
-                f"cannot access {e.args[0]} from the attributes of a relationship in the elements dictionary. Please take a look at relationship with id {rel_id}"
-            ) from KeyError
+                f"cannot access {missing_attr} from the attributes of a relationship in the elements dictionary. Please take a look at relationship with id {rel_id}"
+            )
 
-        pred = elements[rel_id]["value"]
+        pred = elements[rel_id].value
 
         if strat_terms:
             pred, is_strat = substitute_term(pred, strat_terms)
@@ -253,6 +248,7 @@ def generate_graph(
             is_strat=is_strat,
             is_rank=is_rank,
             is_predicate=True,
+            **get_element_term_attrs(elements[rel_id]),
         )
 
     return graph
@@ -266,24 +262,19 @@ def add_node_to_digraph(graph: DiGraph, node: tuple[any, dict[str, any]]) -> DiG
 
 # function for generating container lists
 # just store the ids
-def parse_containers(elements: dict[str, dict[str, any]]) -> dict[str, list[str]]:
+def parse_containers(elements: dict[str, DiagramElement]) -> dict[str, list[str]]:
     containers = defaultdict(list)
-    for element, attr in elements.items():
-        if "parent" in attr and attr["parent"] not in {"0", "1"}:
-            containers[attr["parent"]].append(element)
+    for element_id, element in elements.items():
+        if element.parent is not None and element.parent not in {"0", "1"}:
+            containers[element.parent].append(element_id)
     return containers
 
 
 def get_container_values(
-    containers: dict[str, list[str]], elements: dict[str, dict[str, any]]
+    containers: dict[str, list[str]], elements: dict[str, DiagramElement]
 ) -> dict[str, str]:
     return {
-        container_id: (
-            attrs["value"]
-            if (attrs := elements[container_id]) and "value" in attrs
-            else None
-        )
-        for container_id in containers.keys()
+        container_id: elements[container_id].value for container_id in containers.keys()
     }
 
 
@@ -295,6 +286,17 @@ def link_container_members(graph: DiGraph, containers: dict[str, list[str]]) ->
     return graph
 
 
+def relabel_container_nodes(graph: DiGraph, key: str) -> DiGraph:
+    # containers are keyed by their cell id, which is only unique within a page
+    container_nodes = {
+        container_id
+        for collection_type in valid_collection_types
+        if collection_type in graph
+        for container_id in graph.successors(collection_type)
+    }
+    return nx.relabel_nodes(graph, {node: f"{key}/{node}" for node in container_nodes})
+
+
 def get_container_collection_types(
     graph: DiGraph, container_labels: dict[str, str], containers: dict[str, list[str]]
 ) -> dict[str, str]:
@@ -634,6 +636,17 @@ def translate_coords(
     return ((x_pos + origin_x) * grid_x, (y_pos + origin_y) * grid_y)
 
 
+def render_diagram_object(obj: DiagramObject, templates: dict[str, Template]) -> str:
+    content = templates[obj.template_key].substitute(asdict(obj))
+    term_attrs = getattr(obj, "term_attrs", None)
+    if not term_attrs:
+        return content
+    # the label is stored the way the reader cleans it, so it is trusted on re-read
+    return wrap_user_object_content(
+        content, term_attrs, clean_label=clean_element_value
+    )
+
+
 def generate_diagram_content(
     diagram_name: str, diagram_uid: str, *diagram_objects: list[DiagramObject]
 ) -> str:
@@ -643,7 +656,7 @@ def generate_diagram_content(
     templates = get_template_files()
     diagram_content += "".join(
         [
-            templates[obj.template_key].substitute(asdict(obj))
+            render_diagram_object(obj, templates)
             for objects in diagram_objects
             for obj in objects
         ]
@@ -1,14 +1,21 @@
 from itertools import chain
 from pathlib import Path
+from typing import BinaryIO
 from uuid import uuid4
 
 from networkx import DiGraph, selfloop_edges
 
-from cemento.draw_io.constants import Connector, DiagramObject, Shape
+from cemento.draw_io.constants import (
+    DEFAULT_DIAGRAM_NAME,
+    Connector,
+    DiagramObject,
+    Shape,
+)
 from cemento.draw_io.preprocessing import (
     escape_shape_content,
     remove_literal_connector_id,
     remove_literal_shape_id,
+    remove_quotes,
     replace_term_quotes,
 )
 from cemento.draw_io.transforms import (
@@ -19,6 +26,7 @@ from cemento.draw_io.transforms import (
     flip_edges,
     flip_edges_of_graphs,
     generate_diagram_content,
+    get_cell_term_attrs,
     get_divider_line_annotations,
     get_non_ranked_strat_edges,
     get_predicate_connectors,
@@ -35,13 +43,14 @@ from cemento.draw_io.transforms import (
     invert_tree,
     split_multiple_inheritances,
 )
+from cemento.utils.io import is_path_source
 from cemento.utils.utils import get_graph_root_nodes, get_subgraphs
 
 
 def draw_diagram(
     shapes: list[Shape],
     connectors: list[Connector],
-    diagram_output_path: str | Path,
+    diagram_output_path: str | Path | BinaryIO,
     *extra_elements: list[DiagramObject],
     diagram_uid: str = None,
 ) -> None:
@@ -53,24 +62,33 @@ def draw_diagram(
 
     connectors = map(remove_literal_connector_id, connectors)
 
+    # diagrams written to a stream have no file name to title the page with
+    diagram_name = (
+        Path(diagram_output_path).stem
+        if is_path_source(diagram_output_path)
+        else DEFAULT_DIAGRAM_NAME
+    )
     write_content = generate_diagram_content(
-        diagram_output_path.stem, diagram_uid, connectors, shapes, *extra_elements
+        diagram_name, diagram_uid, connectors, shapes, *extra_elements
     )
 
+    if not is_path_source(diagram_output_path):
+        diagram_output_path.write(write_content.encode("utf-8"))
+        return
     with open(diagram_output_path, "w") as write_file:
         write_file.write(write_content)
 
 
 def draw_tree(
     graph: DiGraph,
-    diagram_output_path: str | Path,
+    diagram_output_path: str | Path | BinaryIO,
     translate_x: int = 0,
     translate_y: int = 0,
     classes_only: bool = False,
     demarcate_boxes: bool = False,
     horizontal_tree: bool = False,
+    embed_terms: bool = False,
 ) -> None:
-    diagram_output_path = Path(diagram_output_path)
     demarcate_boxes = demarcate_boxes and not classes_only
     # replace quotes to match shape content
     # TODO: prioritize is_rank terms over non-rank predicates when cutting
@@ -192,6 +210,21 @@ def draw_tree(
         )
     all_connectors = rank_connectors + predicate_connectors + severed_link_connectors
 
+    if embed_terms:
+        # keep the IRI of every term on its cell, so reading the diagram needs no matching
+        for shape in shapes:
+            shape.term_attrs = (
+                get_cell_term_attrs(graph.nodes[shape.shape_content])
+                if shape.shape_content in graph
+                else None
+            )
+        predicate_attrs = {
+            remove_quotes(data["label"]): get_cell_term_attrs(data)
+            for _, _, data in graph.edges(data=True)
+        }
+        for connector in all_connectors:
+            connector.term_attrs = predicate_attrs.get(connector.connector_val, None)
+
     divider_lines, divider_annotations = [], []
     if demarcate_boxes:
         divider_lines = [
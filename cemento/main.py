@@ -1,9 +1,11 @@
 import argparse
 import sys
 
+import cemento.cli.check as check
 import cemento.cli.download as download
 import cemento.cli.drawio_rdf as drawio_rdf
 import cemento.cli.drawio_ttl as drawio_ttl
+import cemento.cli.merge_drawio as merge_drawio
 import cemento.cli.rdf_drawio as rdf_drawio
 import cemento.cli.ttl_drawio as ttl_drawio
 from cemento.cli.constants import header
@@ -25,6 +27,8 @@ def main():
     rdf_drawio.register(subparsers)
     ttl_drawio.register(subparsers)
     drawio_ttl.register(subparsers)
+    merge_drawio.register(subparsers)
+    check.register(subparsers)
     download.register(subparsers)
 
     if len(sys.argv) <= 1:
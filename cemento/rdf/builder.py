@@ -0,0 +1,89 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+
+from more_itertools import unique_everseen
+from rdflib import RDF, Graph, Literal, Namespace, URIRef
+
+
+class TripleBuilder(ABC):
+    # takes triples like an rdflib graph and hands them to write in one go per triple.
+    # triples that would be removed at the end are dropped as they come in instead:
+    # those with an excluded subject, and the generic property type of terms that
+    # end up with another type. The rdf:type triples are kept for term lookups.
+    def __init__(self, generic_property: URIRef = None):
+        self.generic_property = generic_property
+        self.excluded_subjects = set()
+        self.type_graph = Graph()
+        self.added = 0
+        self.removed = 0
+        self.deduplicated = 0
+        self._generic_subjects = []
+
+    def bind(self, prefix: str, namespace: URIRef | Namespace, *args, **kwargs):
+        return None
+
+    def add(self, triple: tuple[URIRef, URIRef, URIRef | Literal]):
+        subj, pred, obj = triple
+        if pred == RDF.type:
+            self.type_graph.add(triple)
+            # the generic property type is only written if no other type shows up
+            if self.generic_property is not None and obj == self.generic_property:
+                self._generic_subjects.append(subj)
+                return self
+        self._add_triple(triple)
+        return self
+
+    def addN(self, quads: Iterable[tuple[URIRef, URIRef, URIRef | Literal, Graph]]):
+        for subj, pred, obj, _ in quads:
+            self.add((subj, pred, obj))
+        return self
+
+    def _add_triple(self, triple: tuple[URIRef, URIRef, URIRef | Literal]) -> None:
+        if triple[0] in self.excluded_subjects:
+            self.removed += 1
+        elif self.write(triple):
+            self.added += 1
+        else:
+            self.deduplicated += 1
+
+    @abstractmethod
+    def write(self, triple: tuple[URIRef, URIRef, URIRef | Literal]) -> bool: ...
+
+    @abstractmethod
+    def flush(self) -> None: ...
+
+    def commit(self) -> None:
+        for subj in unique_everseen(self._generic_subjects):
+            if len(set(self.type_graph.objects(subj, RDF.type))) == 1:
+                self._add_triple((subj, RDF.type, self.generic_property))
+            else:
+                self.removed += 1
+        self._generic_subjects = []
+        self.flush()
+
+
+class GraphTripleBuilder(TripleBuilder):
+    # collects the triples in a set and adds them to the graph in bulk on commit
+    def __init__(self, rdf_graph: Graph = None, generic_property: URIRef = None):
+        super().__init__(generic_property=generic_property)
+        self.rdf_graph = Graph() if rdf_graph is None else rdf_graph
+        self._triples = set()
+
+    def bind(self, prefix: str, namespace: URIRef | Namespace, *args, **kwargs):
+        return self.rdf_graph.bind(prefix, namespace, *args, **kwargs)
+
+    def write(self, triple: tuple[URIRef, URIRef, URIRef | Literal]) -> bool:
+        if triple in self._triples:
+            return False
+        self._triples.add(triple)
+        return True
+
+    def flush(self) -> None:
+        self.rdf_graph.addN((*triple, self.rdf_graph) for triple in self._triples)
+        # triples already in the graph with an excluded subject are removed in one
+        # pattern per subject, and counted by how much the graph shrank
+        graph_size = len(self.rdf_graph)
+        for subj in self.excluded_subjects:
+            self.rdf_graph.remove((subj, None, None))
+        self.removed += graph_size - len(self.rdf_graph)
+        self._triples = set()
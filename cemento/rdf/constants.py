@@ -1,6 +1,77 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
 valid_collection_types = {
     "owl:unionOf",
     "owl:intersectionOf",
     "owl:complementOf",
     "mds:tripleSyntaxSugar",
 }
+
+# smallest number of unmatched terms worth sending to another process for matching
+COMPONENT_BATCH_MIN_TERMS = 32
+
+# bump whenever the match cache holds something else or term matching changes
+MATCH_CACHE_VERSION = 1
+
+# bump whenever the output fingerprint is computed differently
+OUTPUT_FINGERPRINT_VERSION = 1
+
+# number of rows the N-Triples writer holds before writing them out
+NTRIPLES_BUFFER_ROWS = 4096
+
+SUBSTITUTE_LOG_COLUMNS = (
+    "original_term",
+    "search_key",
+    "search_result",
+    "score",
+    "matched_term",
+)
+
+# substitution log formats by file extension, csv is written for any other extension
+SUBSTITUTE_LOG_FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+@dataclass(slots=True)
+class TermEntry:
+    label: str
+    aliases: list[str]
+    is_literal: bool
+    search_keys: list[str]
+    prefix: str | None
+    is_predicate: bool = False
+
+
+@dataclass(slots=True)
+class TermTable:
+    # every unique diagram term with what the conversion reads about it, gathered in one pass
+    entries: dict[str, TermEntry] = field(default_factory=dict)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self.entries
+
+    def __getitem__(self, term: str) -> TermEntry:
+        return self.entries[term]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def literal_terms(self) -> set[str]:
+        return {term for term, entry in self.entries.items() if entry.is_literal}
+
+    @property
+    def search_keys(self) -> dict[str, list[str]]:
+        return {term: entry.search_keys for term, entry in self.entries.items()}
+
+    def set_predicates(self, predicate_terms: Iterable[str]) -> None:
+        for term in predicate_terms:
+            if term in self.entries:
+                self.entries[term].is_predicate = True
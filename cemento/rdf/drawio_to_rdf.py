@@ -1,13 +1,76 @@
+from functools import partial
+from itertools import chain
+from io import BytesIO
 from pathlib import Path
+from typing import BinaryIO
 
-from cemento.draw_io.read_diagram import read_drawio
-from cemento.rdf.graph_to_rdf import convert_graph_to_rdf_file
+import networkx as nx
+from networkx import DiGraph
+from rdflib import DCTERMS, Graph, Literal, URIRef
+
+from cemento.draw_io.io import DrawioDocument
+from cemento.draw_io.read_diagram import compose_drawio_pages, read_drawio_pages
+from cemento.draw_io.transforms import get_cell_term_attrs, parse_cell_elements
+from cemento.rdf.filters import term_not_in_default_namespace
+from cemento.rdf.graph_to_rdf import (
+    convert_graph_to_rdf_file,
+    convert_graph_to_rdf_graph,
+    write_rdf_outputs,
+)
+from cemento.rdf.io import (
+    get_match_cache_path,
+    read_match_cache,
+    write_match_cache,
+)
+from cemento.rdf.transforms import add_rdf_triples, get_collection_nodes
+from cemento.term_matching.constants import get_default_namespace_prefixes
+from cemento.term_matching.resolver import TermResolver
 from cemento.utils.constants import RDFFormat
+from cemento.utils.io import (
+    get_output_paths,
+    get_rdf_format,
+    is_path_source,
+    read_source,
+)
 
 
-def convert_drawio_to_rdf(
+def get_page_cell_terms(graph: DiGraph) -> dict[str, str]:
+    # the diagram cell each term and predicate was read from
+    term_cells = (
+        (data["term_id"], term)
+        for term, data in graph.nodes(data=True)
+        if "term_id" in data
+    )
+    predicate_cells = (
+        (data["pred_id"], data["label"])
+        for _, _, data in graph.edges(data=True)
+        if "pred_id" in data
+    )
+    return dict(chain(term_cells, predicate_cells))
+
+
+def embed_diagram_terms(
     input_path: str | Path,
-    output_path: str | Path,
+    term_attrs: dict[str, dict[str, any]],
+    page_cell_terms: dict[str, dict[str, str]],
+) -> Path:
+    document = DrawioDocument(input_path)
+    for page_idx, (page_headers, cells) in enumerate(document.iter_pages()):
+        cell_terms = page_cell_terms.get(page_headers.get("id"), dict())
+        cell_attrs = {
+            elem_id: get_cell_term_attrs(
+                term_attrs[cell_terms[elem_id]], label=element.value
+            )
+            for elem_id, element in parse_cell_elements(cells).items()
+            if cell_terms.get(elem_id, None) in term_attrs
+        }
+        document.set_cell_attrs(page_idx, cell_attrs)
+    return document.write()
+
+
+def convert_drawio_to_rdf(
+    input_path: str | Path | bytes | BinaryIO,
+    output_path: str | Path | BinaryIO | list[str | Path | BinaryIO],
     file_format: str | RDFFormat = None,
     onto_ref_folder: str | Path = None,
     defaults_folder: str | Path = None,
@@ -15,15 +78,53 @@ def convert_drawio_to_rdf(
     check_errors: bool = False,
     collect_domains_ranges: bool = False,
     log_substitution_path: str | Path = None,
-) -> None:
-    graph = read_drawio(
+    term_resolver: TermResolver = None,
+    validation_cache: bool | str | Path = False,
+    embed_terms: bool = False,
+    stream_output: bool = False,
+    max_workers: int = 1,
+    skip_unchanged: bool = False,
+    match_cache: bool | str | Path = False,
+) -> bool:
+    if embed_terms and not is_path_source(input_path):
+        raise ValueError(
+            "Terms can only be embedded into a diagram file. Please pass the path to the diagram instead."
+        )
+    # the term matches of the last run are loaded into the resolver, the same way
+    # embedded terms skip matching but without writing into the diagram
+    cache_path = (
+        get_match_cache_path(input_path, match_cache)
+        if match_cache and is_path_source(input_path)
+        else None
+    )
+    if cache_path and term_resolver is None:
+        term_resolver = TermResolver.from_folders(
+            prefixes_path=prefixes_path,
+            onto_ref_folder=onto_ref_folder,
+            defaults_folder=defaults_folder,
+        )
+    if cache_path:
+        term_resolver.add_resolutions(
+            read_match_cache(cache_path, term_resolver.reference_fingerprint)
+        )
+    input_path = read_source(input_path)
+    graphs = read_drawio_pages(
         input_path,
         onto_ref_folder=onto_ref_folder,
         prefixes_file=prefixes_path,
         defaults_folder=defaults_folder,
         check_errors=check_errors,
+        term_resolver=term_resolver,
+        max_workers=max_workers,
+        validation_cache=validation_cache,
     )
-    convert_graph_to_rdf_file(
+    page_cell_terms = {
+        page_graph.graph["page_id"]: get_page_cell_terms(page_graph)
+        for page_graph in (graphs if embed_terms else [])
+    }
+    graph = compose_drawio_pages(graphs)
+    term_attrs = dict()
+    has_written_outputs = convert_graph_to_rdf_file(
         graph,
         output_path,
         file_format=file_format,
@@ -32,4 +133,186 @@ def convert_drawio_to_rdf(
         defaults_folder=defaults_folder,
         prefixes_path=prefixes_path,
         log_substitution_path=log_substitution_path,
+        term_resolver=term_resolver,
+        stream_output=stream_output,
+        max_workers=max_workers,
+        skip_unchanged=skip_unchanged,
+        resolution_logger=term_attrs.__setitem__ if embed_terms else None,
+    )
+    if embed_terms:
+        embed_diagram_terms(input_path, term_attrs, page_cell_terms)
+    if cache_path:
+        # only the terms still in the diagram are kept, so the cache stays small
+        write_match_cache(
+            cache_path,
+            term_resolver.reference_fingerprint,
+            term_resolver.get_resolutions(sorted(get_source_terms(graph))),
+        )
+    return has_written_outputs
+
+
+def convert_drawio_to_rdf_bytes(
+    input_diagram: str | Path | bytes | BinaryIO,
+    file_format: str | RDFFormat = RDFFormat.TURTLE.value,
+    onto_ref_folder: str | Path = None,
+    defaults_folder: str | Path = None,
+    prefixes_path: str | Path = None,
+    check_errors: bool = False,
+    collect_domains_ranges: bool = False,
+    log_substitution_path: str | Path = None,
+    term_resolver: TermResolver = None,
+) -> bytes:
+    output = BytesIO()
+    convert_drawio_to_rdf(
+        input_diagram,
+        output,
+        file_format=file_format,
+        onto_ref_folder=onto_ref_folder,
+        defaults_folder=defaults_folder,
+        prefixes_path=prefixes_path,
+        check_errors=check_errors,
+        collect_domains_ranges=collect_domains_ranges,
+        log_substitution_path=log_substitution_path,
+        term_resolver=term_resolver,
+    )
+    return output.getvalue()
+
+
+def get_source_terms(graph: DiGraph) -> set[str]:
+    edge_labels = (data.get("label", None) for _, _, data in graph.edges(data=True))
+    return set(filter(None, chain(graph.nodes, edge_labels)))
+
+
+def relabel_collection_nodes(graph: DiGraph, source_key: str) -> DiGraph:
+    # collection nodes are keyed by their cell id, which other diagrams can reuse
+    return nx.relabel_nodes(
+        graph,
+        {node: f"{source_key}/{node}" for node in get_collection_nodes(graph)},
+    )
+
+
+def add_source_annotations(
+    rdf_graph: Graph,
+    term_attrs: dict[str, dict[str, any]],
+    source_terms: dict[str, set[str]],
+    term_resolver: TermResolver,
+) -> Graph:
+    # every term is annotated with the diagrams it was drawn in
+    term_iris = {term: URIRef(data["iri"]) for term, data in term_attrs.items()}
+    term_not_in_default_namespace_filter = partial(
+        term_not_in_default_namespace,
+        inv_prefixes=term_resolver.inv_prefixes,
+        default_namespace_prefixes=get_default_namespace_prefixes(),
+    )
+    rdf_graph.bind("dcterms", DCTERMS)
+    return add_rdf_triples(
+        rdf_graph,
+        (
+            (term_iris[term], DCTERMS.source, Literal(source))
+            for source, terms in source_terms.items()
+            for term in sorted(terms)
+            if term in term_iris
+            and term_not_in_default_namespace_filter(term_iris[term])
+        ),
+    )
+
+
+def merge_drawio_to_rdf_graph(
+    input_paths: list[str | Path],
+    onto_ref_folder: str | Path = None,
+    defaults_folder: str | Path = None,
+    prefixes_path: str | Path = None,
+    check_errors: bool = False,
+    collect_domains_ranges: bool = False,
+    log_substitution_path: str | Path = None,
+    term_resolver: TermResolver = None,
+    validation_cache: bool | str | Path = False,
+    annotate_sources: bool = False,
+    max_workers: int = 1,
+) -> Graph:
+    # the references are loaded once, and the diagrams are merged into one graph keyed
+    # by label before the conversion, so every term is resolved once for all of them
+    if term_resolver is None:
+        term_resolver = TermResolver.from_folders(
+            prefixes_path=prefixes_path,
+            onto_ref_folder=onto_ref_folder,
+            defaults_folder=defaults_folder,
+        )
+    source_graphs = []
+    source_terms = dict()
+    for source_idx, input_path in enumerate(input_paths):
+        graphs = read_drawio_pages(
+            input_path,
+            onto_ref_folder=onto_ref_folder,
+            prefixes_file=prefixes_path,
+            defaults_folder=defaults_folder,
+            check_errors=check_errors,
+            term_resolver=term_resolver,
+            max_workers=max_workers,
+            validation_cache=validation_cache,
+        )
+        graph = relabel_collection_nodes(compose_drawio_pages(graphs), str(source_idx))
+        source_terms[str(input_path)] = get_source_terms(graph)
+        source_graphs.append(graph)
+    graph = nx.compose_all(source_graphs)
+
+    term_attrs = dict()
+    rdf_graph = convert_graph_to_rdf_graph(
+        graph,
+        collect_domains_ranges=collect_domains_ranges,
+        onto_ref_folder=onto_ref_folder,
+        defaults_folder=defaults_folder,
+        prefixes_path=prefixes_path,
+        log_substitution_path=log_substitution_path,
+        term_resolver=term_resolver,
+        max_workers=max_workers,
+        resolution_logger=term_attrs.__setitem__ if annotate_sources else None,
+    )
+    if annotate_sources:
+        rdf_graph = add_source_annotations(
+            rdf_graph, term_attrs, source_terms, term_resolver
+        )
+    return rdf_graph
+
+
+def merge_drawio_to_rdf(
+    input_paths: list[str | Path],
+    output_path: str | Path | BinaryIO | list[str | Path | BinaryIO],
+    file_format: str | RDFFormat = None,
+    onto_ref_folder: str | Path = None,
+    defaults_folder: str | Path = None,
+    prefixes_path: str | Path = None,
+    check_errors: bool = False,
+    collect_domains_ranges: bool = False,
+    log_substitution_path: str | Path = None,
+    term_resolver: TermResolver = None,
+    validation_cache: bool | str | Path = False,
+    annotate_sources: bool = False,
+    max_workers: int = 1,
+    skip_unchanged: bool = False,
+) -> bool:
+    output_paths = get_output_paths(output_path)
+    rdf_formats = [
+        get_rdf_format(output_path, file_format=file_format)
+        for output_path in output_paths
+    ]
+    rdf_graph = merge_drawio_to_rdf_graph(
+        input_paths,
+        onto_ref_folder=onto_ref_folder,
+        defaults_folder=defaults_folder,
+        prefixes_path=prefixes_path,
+        check_errors=check_errors,
+        collect_domains_ranges=collect_domains_ranges,
+        log_substitution_path=log_substitution_path,
+        term_resolver=term_resolver,
+        validation_cache=validation_cache,
+        annotate_sources=annotate_sources,
+        max_workers=max_workers,
+    )
+    return write_rdf_outputs(
+        rdf_graph,
+        output_paths,
+        rdf_formats,
+        max_workers=max_workers,
+        skip_unchanged=skip_unchanged,
     )
@@ -1,28 +1,35 @@
+import os
+import pickle
 from collections import defaultdict
-from copy import deepcopy
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from functools import partial, reduce
-from itertools import chain, filterfalse
+from itertools import chain, filterfalse, repeat
 from pathlib import Path
+from typing import BinaryIO
 
 import networkx as nx
-import rdflib
-from more_itertools import unique_everseen
 from networkx import DiGraph
 from rdflib import OWL, RDF, RDFS, BNode, Graph, Literal, URIRef
 
+from cemento.draw_io.constants import ShapeType
 from cemento.rdf.filters import term_in_search_results, term_not_in_default_namespace
+from cemento.rdf.builder import GraphTripleBuilder, TripleBuilder
+from cemento.rdf.constants import COMPONENT_BATCH_MIN_TERMS
 from cemento.rdf.io import (
-    get_diagram_terms_iter,
-    get_diagram_terms_iter_with_pred,
+    get_diagram_term_attrs,
     get_properties_in_file,
-    save_substitute_log,
-)
-from cemento.rdf.preprocessing import (
-    get_term_aliases,
+    get_rdf_fingerprint,
+    get_rdf_stream_format,
+    is_rdf_output_unchanged,
+    open_ntriples_writer,
+    open_substitute_log,
+    write_output_fingerprint,
 )
+from cemento.rdf.preprocessing import get_term_table
 from cemento.rdf.transforms import (
     add_collection_links_to_graph,
-    add_domains_ranges,
     add_labels,
     add_rdf_triples,
     bind_prefixes,
@@ -33,29 +40,26 @@ from cemento.rdf.transforms import (
     get_collection_nodes,
     get_collection_subgraph,
     get_collection_triples_and_targets,
+    get_component_term_batches,
     get_domains_ranges,
+    get_domains_ranges_index,
+    get_domains_ranges_triples,
     get_literal_data_type,
     get_literal_lang_annotation,
-    get_xsd_terms,
-    remove_generic_property,
 )
 from cemento.term_matching.constants import get_default_namespace_prefixes
-from cemento.term_matching.io import get_rdf_file_iter
+from cemento.term_matching.resolver import TermResolver
 from cemento.term_matching.transforms import (
     add_exact_matches,
-    combine_graphs,
-    get_prefixes,
-    get_search_terms,
-    get_substitute_mapping,
-    get_term_search_keys,
+    get_graph_union_view,
     get_term_types,
 )
 from cemento.utils.constants import NullTermError, RDFFormat, valid_collection_types
 from cemento.utils.io import (
-    get_default_defaults_folder,
     get_default_prefixes_file,
-    get_default_references_folder,
+    get_output_paths,
     get_rdf_format,
+    is_path_source,
 )
 from cemento.utils.utils import (
     chain_filter,
@@ -73,16 +77,59 @@ def convert_graph_to_rdf_graph(
     defaults_folder: str | Path = None,
     prefixes_path: str | Path = None,
     log_substitution_path: str | Path = None,
+    term_resolver: TermResolver = None,
+    max_workers: int = 1,
+    resolution_logger: Callable[[str, dict[str, any]], None] = None,
 ) -> Graph:
-    onto_ref_folder = (
-        get_default_references_folder() if not onto_ref_folder else onto_ref_folder
-    )
-    defaults_folder = (
-        get_default_defaults_folder() if not defaults_folder else defaults_folder
+    rdf_builder = write_graph_rdf_triples(
+        graph,
+        GraphTripleBuilder(),
+        collect_domains_ranges=collect_domains_ranges,
+        onto_ref_folder=onto_ref_folder,
+        defaults_folder=defaults_folder,
+        prefixes_path=prefixes_path,
+        log_substitution_path=log_substitution_path,
+        term_resolver=term_resolver,
+        max_workers=max_workers,
+        resolution_logger=resolution_logger,
     )
-    prefixes_path = get_default_prefixes_file() if not prefixes_path else prefixes_path
-    prefixes, inv_prefixes = get_prefixes(prefixes_path, onto_ref_folder)
-    search_terms = get_search_terms(inv_prefixes, onto_ref_folder, defaults_folder)
+    return rdf_builder.rdf_graph
+
+
+def write_graph_rdf_triples(
+    graph: DiGraph,
+    rdf_builder: TripleBuilder,
+    collect_domains_ranges: bool = False,
+    onto_ref_folder: str | Path = None,
+    defaults_folder: str | Path = None,
+    prefixes_path: str | Path = None,
+    log_substitution_path: str | Path = None,
+    term_resolver: TermResolver = None,
+    max_workers: int = 1,
+    resolution_logger: Callable[[str, dict[str, any]], None] = None,
+) -> TripleBuilder:
+    # the triples are handed to the builder as they are made, which either adds them
+    # to an rdflib graph in bulk or streams them straight to the output
+    if term_resolver is None:
+        term_resolver = TermResolver.from_folders(
+            prefixes_path=prefixes_path,
+            onto_ref_folder=onto_ref_folder,
+            defaults_folder=defaults_folder,
+        )
+    # an existing resolver already decides which reference set is used
+    onto_ref_folder = term_resolver.onto_ref_folder
+    defaults_folder = term_resolver.defaults_folder
+    prefixes_path = term_resolver.prefixes_path
+    prefixes, inv_prefixes = term_resolver.prefixes, term_resolver.inv_prefixes
+    search_terms = term_resolver.search_terms
+
+    # only IRIs read from the diagram cells are trusted, and the graph is copied so
+    # nothing the conversion does shows up in the caller's graph
+    graph = graph.copy()
+    diagram_term_attrs = get_diagram_term_attrs(graph)
+    trusted_terms = {
+        term: URIRef(data["iri"]) for term, data in diagram_term_attrs.items()
+    }
 
     # TODO: reference from constants file once moved
     # TODO: replace with proper-cased terms once substitute issue is resolved
@@ -94,78 +141,43 @@ def convert_graph_to_rdf_graph(
             filter(lambda x: "label" in x[2], collection_in_edges),
         )
     )
-    collection_in_edge_labels_iter = map(
-        lambda x: (enforce_camel_case(x), True), collection_in_edge_labels
-    )
     nodes_to_remove = set(collection_nodes.keys()) | valid_collection_types
     collection_subgraph = get_collection_subgraph(set(collection_nodes.keys()), graph)
     graph.remove_nodes_from(nodes_to_remove)
 
-    aliases = {
-        term: aliases
-        for term, aliases in map(
-            lambda term: (term, get_term_aliases(term)),
-            unique_everseen(
-                chain(get_diagram_terms_iter(graph), collection_in_edge_labels)
-            ),
-        )
-    }
-
-    # TODO: assign literal terms IDs so identical values get treated separately
-    literal_terms = {
-        term
-        for term in filter(
-            lambda term: ('"' in term),
-            unique_everseen(
-                chain(get_diagram_terms_iter(graph), collection_in_edge_labels)
-            ),
-        )
-    }
-
-    # process search keys now for partial substitution and full substitution later on
-    search_keys = {
-        term: search_key
-        for term, search_key in map(
-            lambda term: (term, get_term_search_keys(term, inv_prefixes)),
-            unique_everseen(
-                chain(get_diagram_terms_iter(graph), collection_in_edge_labels)
-            ),
-        )
-    }
+    # read every term once, with its aliases, search keys and prefix, and have the
+    # later steps look them up instead of walking the graph again
+    term_table = get_term_table(
+        graph,
+        term_resolver.get_search_keys,
+        predicate_labels=collection_in_edge_labels,
+    )
+    literal_terms = term_table.literal_terms
 
     # retrieve list of property terms in file to enforce camel case appropriately
     # TODO: determine if user can toggle camel case enforcement for their term
     property_terms = get_properties_in_file(
-        search_keys,
-        chain(get_diagram_terms_iter(graph), collection_in_edge_labels),
+        term_table.search_keys,
+        term_table,
         graph,
         defaults_folder,
         inv_prefixes,
+        prop_family=term_resolver.prop_family,
     )
+    term_table.set_predicates(property_terms)
 
     # get the list of terms from which to consruct URIRefs and Literals and create them
     construct_term_inputs = list(
-        filter(
-            lambda x: fst(x) not in literal_terms,
-            chain(
-                get_diagram_terms_iter_with_pred(graph, property_terms),
-                collection_in_edge_labels_iter,
-            ),
-        )
+        filter(lambda entry: not entry.is_literal, term_table.entries.values())
     )
     try:
         constructed_terms = {
-            term: term_uri_ref
-            for term, term_uri_ref in map(
-                lambda term_info: (
-                    fst(term_info),
-                    construct_term_uri(
-                        *get_abbrev_term(fst(term_info), is_predicate=snd(term_info)),
-                        prefixes=prefixes,
-                    ),
-                ),
-                construct_term_inputs,
+            entry.label: construct_term_uri(
+                entry.prefix,
+                snd(get_abbrev_term(entry.label, is_predicate=entry.is_predicate)),
+                prefixes=prefixes,
             )
+            for entry in construct_term_inputs
         }
     except KeyError as e:
         offending_key = e.args[0]
@@ -187,24 +199,23 @@ def convert_graph_to_rdf_graph(
             "A null term has been detected. Please make sure all your arrows and shapes are labelled properly."
         ) from NullTermError
 
-    substitution_results = get_substitute_mapping(
-        search_keys,
-        search_terms,
-        chain(get_diagram_terms_iter(graph), collection_in_edge_labels),
-        log_results=bool(log_substitution_path),
+    substitute_log = (
+        open_substitute_log(log_substitution_path)
+        if log_substitution_path
+        else nullcontext()
     )
-
-    if log_substitution_path:
-        save_substitute_log(substitution_results, log_substitution_path)
-        substitution_results = {
-            key: matched_term
-            for key, (
-                matched_term,
-                _,
-                _,
-            ) in substitution_results.items()
-            if matched_term is not None
-        }
+    constructed_terms.update(trusted_terms)
+    substitution_terms = list(
+        filter(lambda term: term not in trusted_terms, term_table)
+    )
+    prefetch_term_resolutions(
+        graph, substitution_terms, term_resolver, max_workers=max_workers
+    )
+    with substitute_log as log_substitution_result:
+        substitution_results = term_resolver.resolve(
+            substitution_terms,
+            result_logger=log_substitution_result,
+        )
 
     preferred_alias_keyed_inv_constructed_terms = dict()
     for key, value in constructed_terms.items():
@@ -215,33 +226,30 @@ def convert_graph_to_rdf_graph(
 
     constructed_terms.update(substitution_results)
 
-    # get datatypes in graph first
-    datatype_search_terms = get_xsd_terms()
-    datatype_search_terms.update(search_terms)
+    # datatypes are resolved once per annotation instead of once per literal
     constructed_literal_terms = {
         term: construct_literal(
             term,
             lang=get_literal_lang_annotation(term),
-            datatype=get_literal_data_type(term, datatype_search_terms),
+            datatype=get_literal_data_type(
+                term, datatype_resolver=term_resolver.resolve_datatype
+            ),
         )
         for term in literal_terms
     }
     constructed_terms.update(constructed_literal_terms)
 
-    # # create the rdf graph to store the ttl output
-    rdf_graph = rdflib.Graph()
-
     # create the output graph to store valid graph triples
     output_graph = nx.DiGraph()
 
     # create rdf triples from the collections
     # sort the collection via dfs postorder to start with innermost collection
     collection_triples, collection_targets = get_collection_triples_and_targets(
-        collection_nodes, collection_subgraph, rdf_graph, constructed_terms
+        collection_nodes, collection_subgraph, constructed_terms
     )
 
     for triple in collection_triples:
-        rdf_graph.add(triple)
+        rdf_builder.add(triple)
 
     graph = add_collection_links_to_graph(
         collection_in_edges, collection_targets, graph
@@ -270,24 +278,33 @@ def convert_graph_to_rdf_graph(
     )
     all_terms = (output_graph_nodes | predicate_terms) - literal_terms
 
+    term_not_in_default_namespace_filter = partial(
+        term_not_in_default_namespace,
+        inv_prefixes=inv_prefixes,
+        default_namespace_prefixes=get_default_namespace_prefixes(),
+    )
+    default_terms = list(filterfalse(term_not_in_default_namespace_filter, all_terms))
+    # terms already in the default namespace are not written as subjects, and
+    # predicate types replace owl:ObjectProperty if another type is defined
+    rdf_builder.excluded_subjects = set(default_terms)
+    rdf_builder.generic_property = OWL.ObjectProperty
+
     # bind prefixes to namespaces for the rdf graph
-    rdf_graph = bind_prefixes(rdf_graph, prefixes)
+    rdf_builder = bind_prefixes(rdf_builder, prefixes)
 
     # add all of the class terms as a type
-    rdf_graph = add_rdf_triples(
-        rdf_graph, ((term, RDF.type, OWL.Class) for term in class_terms)
+    rdf_builder = add_rdf_triples(
+        rdf_builder, ((term, RDF.type, OWL.Class) for term in class_terms)
     )
 
     # if the term is a predicate and is not part of the default namespaces, add an object property type to the ttl file
-    ref_graph = deepcopy(rdf_graph)
-    if onto_ref_folder:
-        ref_graph += combine_graphs(get_rdf_file_iter(onto_ref_folder))
-    term_types = get_term_types(ref_graph)
-    term_not_in_default_namespace_filter = partial(
-        term_not_in_default_namespace,
-        inv_prefixes=inv_prefixes,
-        default_namespace_prefixes=get_default_namespace_prefixes(),
+    # the reference graphs are only looked up, so read them through a view
+    # instead of copying them and the output graph into a new one
+    # the builder keeps the types added so far for the lookups
+    ref_graph = get_graph_union_view(
+        [rdf_builder.type_graph, *term_resolver.reference_graphs]
     )
+    term_types = get_term_types(ref_graph)
     term_type_subs = {
         key: value
         for key, value in map(
@@ -299,8 +316,8 @@ def convert_graph_to_rdf_graph(
             filter(term_not_in_default_namespace_filter, predicate_terms),
         )
     }
-    rdf_graph = add_rdf_triples(
-        rdf_graph,
+    rdf_builder = add_rdf_triples(
+        rdf_builder,
         (
             (term, RDF.type, term_type_subs[term])
             for term in filter(term_not_in_default_namespace_filter, predicate_terms)
@@ -330,79 +347,239 @@ def convert_graph_to_rdf_graph(
         for key, prop, value in exact_match_property_tuples:
             exact_match_properties[key][prop] = value
 
-        rdf_graph = reduce(
-            lambda rdf_graph, graph_term: add_exact_matches(
+        rdf_builder = reduce(
+            lambda rdf_builder, graph_term: add_exact_matches(
                 term=graph_term,
                 match_properties=exact_match_properties[graph_term],
-                rdf_graph=rdf_graph,
+                rdf_graph=rdf_builder,
             ),
             exact_match_candidates,
-            rdf_graph,
+            rdf_builder,
         )
 
-    rdf_graph = reduce(
-        lambda rdf_graph, graph_term: add_labels(
+    rdf_builder = reduce(
+        lambda rdf_builder, graph_term: add_labels(
             term=graph_term,
-            labels=aliases[preferred_alias_keyed_inv_constructed_terms[graph_term]],
-            rdf_graph=rdf_graph,
+            labels=term_table[
+                preferred_alias_keyed_inv_constructed_terms[graph_term]
+            ].aliases,
+            rdf_graph=rdf_builder,
         ),
         filter(
             term_not_in_default_namespace_filter,
             filterfalse(term_in_search_results_filter, all_terms),
         ),
-        rdf_graph,
+        rdf_builder,
     )
 
     if collect_domains_ranges:
+        # index the edges once instead of scanning them again for every predicate
+        domains_ranges_index = get_domains_ranges_index(output_graph)
         predicate_domains_ranges = map(
-            partial(get_domains_ranges, graph=output_graph),
+            partial(get_domains_ranges, domains_ranges_index=domains_ranges_index),
             filter(
-                term_not_in_default_namespace_filter,
-                filterfalse(term_in_search_results_filter, predicate_terms),
+                lambda term: term in domains_ranges_index,
+                filter(
+                    term_not_in_default_namespace_filter,
+                    filterfalse(term_in_search_results_filter, predicate_terms),
+                ),
             ),
         )
-        rdf_graph = reduce(
-            lambda rdf_graph, triples: add_domains_ranges(triples, rdf_graph),
-            predicate_domains_ranges,
-            rdf_graph,
+        domains_ranges_triples = chain.from_iterable(
+            map(get_domains_ranges_triples, predicate_domains_ranges)
         )
+        rdf_builder.addN((*triple, rdf_builder) for triple in domains_ranges_triples)
 
     # now add the triples from the drawio diagram
     for domain_term, range_term, data in output_graph.edges(data=True):
         predicate_term = data["label"]
-        rdf_graph.add((domain_term, predicate_term, range_term))
+        rdf_builder.add((domain_term, predicate_term, range_term))
+
+    # hand how every term was resolved to the caller, to be written back to the diagram
+    if resolution_logger is not None:
+        match_scores = {
+            term: diagram_term_attrs[term].get("match_score", None)
+            for term in trusted_terms.keys()
+        }
+        match_scores.update(
+            {term: term_resolver.explain(term).score for term in substitution_results}
+        )
+        for term in term_table:
+            if isinstance(constructed_terms.get(term, None), URIRef):
+                resolution_logger(
+                    term,
+                    get_term_resolution_attrs(
+                        constructed_terms[term],
+                        match_scores.get(term, None),
+                        class_terms,
+                        predicate_terms,
+                    ),
+                )
 
-    # replace predicate types if another type than owl:ObjectProperty is defined
-    rdf_graph = remove_generic_property(rdf_graph, default_property=OWL.ObjectProperty)
+    rdf_builder.commit()
+    return rdf_builder
 
-    # remove terms that are already in the default namespace if they are subjects
-    default_terms = list(filterfalse(term_not_in_default_namespace_filter, all_terms))
-    redundant_default_triples = rdf_graph.triples_choices((default_terms, None, None))
-    rdf_graph = reduce(
-        lambda rdf_graph, triple: rdf_graph.remove(triple),
-        redundant_default_triples,
-        rdf_graph,
-    )
 
-    return rdf_graph
+def prefetch_term_resolutions(
+    graph: DiGraph,
+    terms: Iterable[str],
+    term_resolver: TermResolver,
+    max_workers: int = 1,
+) -> None:
+    # matching is by far the slowest step, and only depends on the term and the
+    # reference terms, so when a pool is asked for, big diagrams are matched on it in
+    # batches of whole components. The results go into the resolver, so the conversion
+    # and the order of the substitution log are the same as in a single process.
+    if max_workers == 1:
+        return
+    terms = term_resolver.get_unresolved_terms(terms)
+    worker_count = max_workers if max_workers is not None else os.cpu_count() or 1
+    batch_count = min(worker_count, len(terms) // COMPONENT_BATCH_MIN_TERMS)
+    if batch_count < 2:
+        return
+    batches = get_component_term_batches(graph, terms, batch_count)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for resolutions in executor.map(term_resolver.explain_all, batches):
+            term_resolver.add_resolutions(resolutions)
+
+
+def get_term_resolution_attrs(
+    term: URIRef,
+    match_score: float | None,
+    class_terms: set[URIRef],
+    predicate_terms: set[URIRef],
+) -> dict[str, any]:
+    term_type = ShapeType.INSTANCE.value
+    if term in predicate_terms:
+        term_type = "predicate"
+    elif term in class_terms:
+        term_type = ShapeType.CLASS.value
+    return {"iri": term, "term_type": term_type, "match_score": match_score}
+
+
+def serialize_rdf_graph(
+    rdf_graph: Graph, output_path: str | Path | BinaryIO, rdf_format: str
+) -> None:
+    rdf_graph.serialize(destination=output_path, format=rdf_format)
+
+
+def serialize_pickled_rdf_graph(
+    pickled_rdf_graph: bytes, output_path: str | Path, rdf_format: str
+) -> None:
+    serialize_rdf_graph(pickle.loads(pickled_rdf_graph), output_path, rdf_format)
+
+
+def write_rdf_outputs(
+    rdf_graph: Graph,
+    output_paths: list[str | Path | BinaryIO],
+    rdf_formats: list[str],
+    max_workers: int = 1,
+    skip_unchanged: bool = False,
+) -> bool:
+    # the outputs are written one after the other unless a process pool is asked for.
+    # Streams cannot be sent to another process, so they are always written here.
+    outputs = list(zip(output_paths, rdf_formats, strict=True))
+    all_file_outputs = [output for output in outputs if is_path_source(fst(output))]
+    if skip_unchanged:
+        # files that already hold the same triples are left alone, so they only get a
+        # new modification time when the triples change
+        fingerprint = get_rdf_fingerprint(rdf_graph)
+        outputs = [
+            (output_path, rdf_format)
+            for output_path, rdf_format in outputs
+            if not is_path_source(output_path)
+            or not is_rdf_output_unchanged(output_path, rdf_format, fingerprint)
+        ]
+    has_written_outputs = len(outputs) > 0
+    file_outputs = [output for output in outputs if is_path_source(fst(output))]
+    if len(file_outputs) > 1 and max_workers != 1:
+        # the graph is pickled once and the same bytes are sent with every output
+        pickled_rdf_graph = pickle.dumps(rdf_graph)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(
+                executor.map(
+                    serialize_pickled_rdf_graph,
+                    repeat(pickled_rdf_graph),
+                    map(fst, file_outputs),
+                    map(snd, file_outputs),
+                )
+            )
+        outputs = [output for output in outputs if not is_path_source(fst(output))]
+    for output_path, rdf_format in outputs:
+        serialize_rdf_graph(rdf_graph, output_path, rdf_format)
+    if skip_unchanged:
+        for output_path, rdf_format in all_file_outputs:
+            write_output_fingerprint(output_path, fingerprint, rdf_format)
+    return has_written_outputs
 
 
 def convert_graph_to_rdf_file(
     graph: DiGraph,
-    output_path: str | Path,
+    output_path: str | Path | BinaryIO | list[str | Path | BinaryIO],
     file_format: str | RDFFormat = None,
     collect_domains_ranges: bool = False,
     onto_ref_folder: str | Path = None,
     defaults_folder: str | Path = None,
     prefixes_path: str | Path = None,
     log_substitution_path: str | Path = None,
-):
-    rdf_format = get_rdf_format(output_path, file_format=file_format)
+    term_resolver: TermResolver = None,
+    stream_output: bool = False,
+    max_workers: int = 1,
+    skip_unchanged: bool = False,
+    resolution_logger: Callable[[str, dict[str, any]], None] = None,
+) -> bool:
+    # the graph is built once and written to every output in its own format
+    output_paths = get_output_paths(output_path)
+    if stream_output and skip_unchanged:
+        raise ValueError(
+            "Streamed output is written before the whole graph is known, so it cannot be compared with the existing output. Please turn off either streaming or skipping unchanged outputs."
+        )
+    if stream_output:
+        if len(output_paths) > 1:
+            raise ValueError(
+                "Only a single output can be streamed. Please pass one output path when streaming."
+            )
+        rdf_format, compressed = get_rdf_stream_format(
+            output_paths[0], file_format=file_format
+        )
+        if rdf_format != RDFFormat.NT:
+            raise ValueError(
+                f"Only N-Triples output can be streamed, but the output format is {rdf_format.value}. Please write to a .nt or .nt.gz file, or set the format to nt."
+            )
+        with open_ntriples_writer(output_paths[0], compressed=compressed) as writer:
+            write_graph_rdf_triples(
+                graph,
+                writer,
+                collect_domains_ranges=collect_domains_ranges,
+                onto_ref_folder=onto_ref_folder,
+                defaults_folder=defaults_folder,
+                prefixes_path=prefixes_path,
+                log_substitution_path=log_substitution_path,
+                term_resolver=term_resolver,
+                max_workers=max_workers,
+                resolution_logger=resolution_logger,
+            )
+        return True
+
+    rdf_formats = [
+        get_rdf_format(output_path, file_format=file_format)
+        for output_path in output_paths
+    ]
     rdf_graph = convert_graph_to_rdf_graph(
         graph,
+        collect_domains_ranges=collect_domains_ranges,
         onto_ref_folder=onto_ref_folder,
         defaults_folder=defaults_folder,
         prefixes_path=prefixes_path,
         log_substitution_path=log_substitution_path,
+        term_resolver=term_resolver,
+        max_workers=max_workers,
+        resolution_logger=resolution_logger,
+    )
+    return write_rdf_outputs(
+        rdf_graph,
+        output_paths,
+        rdf_formats,
+        max_workers=max_workers,
+        skip_unchanged=skip_unchanged,
     )
-    rdf_graph.serialize(destination=output_path, format=rdf_format)
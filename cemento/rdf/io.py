@@ -1,20 +1,35 @@
-from collections.abc import Iterable
+import csv
+import gzip
+import json
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager, nullcontext
+from hashlib import blake2b
 from itertools import chain
 from pathlib import Path
+from typing import BinaryIO
 
-import networkx as nx
-import pandas as pd
-from more_itertools import unique_everseen
 from networkx import DiGraph
-from rdflib import RDF, RDFS, Namespace, URIRef
+from rdflib import RDF, RDFS, BNode, Graph, Literal, Namespace, URIRef
+from rdflib.compare import to_isomorphic
 from rdflib.namespace import split_uri
 
+from cemento.rdf.builder import TripleBuilder
+from cemento.rdf.constants import (
+    MATCH_CACHE_VERSION,
+    NTRIPLES_BUFFER_ROWS,
+    OUTPUT_FINGERPRINT_VERSION,
+    SUBSTITUTE_LOG_COLUMNS,
+    SUBSTITUTE_LOG_FORMATS,
+)
+from cemento.term_matching.constants import TermResolution
 from cemento.term_matching.transforms import (
     get_entire_prop_family,
     get_substitute_mapping,
 )
 
 # from cemento.term_matching.transforms import substitute_term
+from cemento.utils.constants import RDFFormat
+from cemento.utils.io import is_path_source
 from cemento.utils.utils import get_graph_root_nodes, get_subgraphs
 
 
@@ -24,6 +39,7 @@ def get_properties_in_file(
     graph: DiGraph,
     defaults_folder: str | Path,
     inv_prefixes: dict[URIRef | Namespace, str],
+    prop_family: set[URIRef] = None,
 ) -> set[str]:
     # partially parse the graph matching subclasses and types to determine if something is an object property
     partially_substituted_values = get_substitute_mapping(
@@ -36,10 +52,12 @@ def get_properties_in_file(
         for subj, obj, data in graph.edges(data=True)
         if "label" in data and data["label"] in partially_substituted_values.keys()
     )
-    prop_family = get_entire_prop_family(defaults_folder, inv_prefixes)
+    if prop_family is None:
+        prop_family = get_entire_prop_family(defaults_folder, inv_prefixes)
 
-    partial_hierarchy_nodes = list(chain(*partial_hierarchy_edges))
-    partial_graph = graph.subgraph(partial_hierarchy_nodes).copy()
+    # only the hierarchy edges are kept, so other relations between the same terms,
+    # such as the domain of a property, do not join a class tree to a property tree
+    partial_graph = graph.edge_subgraph(partial_hierarchy_edges).copy()
     partial_graph_trees = get_subgraphs(partial_graph)
 
     prop_family_mapping = dict()
@@ -60,46 +78,318 @@ def get_properties_in_file(
     return predicate_terms
 
 
-def get_diagram_terms_iter_with_pred(
-    graph: DiGraph, property_terms: set[str]
-) -> Iterable[str, bool]:
-    graph_nodes = graph.nodes
-    edge_labels = nx.get_edge_attributes(graph, "label").values()
-    terms = unique_everseen(chain(graph_nodes, edge_labels))
-    return ((term, term in property_terms) for term in terms)
+def get_diagram_term_attrs(graph: DiGraph) -> dict[str, dict[str, any]]:
+    # resolutions that were read back from the diagram cells, by term
+    node_attrs = (
+        (term, data) for term, data in graph.nodes(data=True) if data.get("iri", None)
+    )
+    edge_attrs = (
+        (data["label"], data)
+        for _, _, data in graph.edges(data=True)
+        if "label" in data and data.get("iri", None)
+    )
+    return dict(chain(node_attrs, edge_attrs))
 
 
-def get_diagram_terms_iter(graph: DiGraph) -> Iterable[str]:
-    diagram_terms_from_edges = (
-        term
-        for subj, obj, data in graph.edges(data=True)
-        for term in (subj, data["label"], obj)
-        if term
+def get_substitute_log_entries(
+    original_term: str,
+    substitution_result: tuple[URIRef, Iterable[str], Iterable[tuple[str, int]]],
+) -> Iterable[tuple[str, str, str, int, URIRef]]:
+    matched_term, search_keys, matches = substitution_result
+    return (
+        (original_term, search_key, term, score, matched_term)
+        for (search_key, (term, score)) in zip(search_keys, matches, strict=False)
     )
-    return unique_everseen(chain(diagram_terms_from_edges, graph.nodes))
+
+
+def get_substitute_log_format(log_substitution_path: str | Path) -> tuple[str, bool]:
+    suffixes = [suffix.lower() for suffix in Path(log_substitution_path).suffixes]
+    compressed = bool(suffixes) and suffixes[-1] == ".gz"
+    if compressed:
+        suffixes = suffixes[:-1]
+    log_format = SUBSTITUTE_LOG_FORMATS.get(suffixes[-1], "csv") if suffixes else "csv"
+    return log_format, compressed
+
+
+@contextmanager
+def open_substitute_log(
+    log_substitution_path: str | Path,
+    log_format: str = None,
+    compressed: bool = None,
+) -> Iterator[Callable[[str, tuple[URIRef, Iterable[str], Iterable[str]]], None]]:
+    inferred_format, inferred_compressed = get_substitute_log_format(
+        log_substitution_path
+    )
+    log_format = inferred_format if log_format is None else log_format
+    compressed = inferred_compressed if compressed is None else compressed
+    if log_format not in set(SUBSTITUTE_LOG_FORMATS.values()):
+        raise ValueError(
+            f"Cannot write a substitution log with format {log_format}. Choose between csv or jsonl."
+        )
+
+    file_opener = gzip.open if compressed else open
+    with file_opener(
+        log_substitution_path, "wt", newline="", encoding="utf-8"
+    ) as log_file:
+        if log_format == "jsonl":
+
+            def write_entries(entries):
+                for entry in entries:
+                    log_file.write(
+                        json.dumps(
+                            dict(zip(SUBSTITUTE_LOG_COLUMNS, entry, strict=True))
+                        )
+                    )
+                    log_file.write("\n")
+
+        else:
+            csv_writer = csv.writer(log_file)
+            csv_writer.writerow(SUBSTITUTE_LOG_COLUMNS)
+            write_entries = csv_writer.writerows
+
+        yield lambda original_term, substitution_result: write_entries(
+            get_substitute_log_entries(original_term, substitution_result)
+        )
 
 
 def save_substitute_log(
     substitution_results: dict[str, tuple[URIRef, Iterable[str], Iterable[str]]],
     log_substitution_path: str | Path,
 ) -> None:
-    log_entries = [
-        (original_term, search_key, term, score, matched_term)
-        for original_term, (
-            matched_term,
-            search_keys,
-            matches,
-        ) in substitution_results.items()
-        for (search_key, (term, score)) in zip(search_keys, matches, strict=False)
-    ]
-    df = pd.DataFrame(
-        log_entries,
-        columns=[
-            "original_term",
-            "search_key",
-            "search_result",
-            "score",
-            "matched_term",
+    with open_substitute_log(log_substitution_path) as log_substitution_result:
+        for original_term, substitution_result in substitution_results.items():
+            log_substitution_result(original_term, substitution_result)
+
+
+def get_ntriples_literal(literal: Literal) -> str:
+    # same escaping as rdflib's N-Triples serializer
+    value = (
+        str(literal)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+        .replace("\r", "\\r")
+    )
+    if literal.language:
+        return f'"{value}"@{literal.language}'
+    if literal.datatype:
+        return f'"{value}"^^<{literal.datatype}>'
+    return f'"{value}"'
+
+
+def get_ntriples_row(triple: tuple[URIRef, URIRef, URIRef | Literal]) -> str:
+    subj, pred, obj = triple
+    obj = get_ntriples_literal(obj) if isinstance(obj, Literal) else obj.n3()
+    return f"{subj.n3()} {pred.n3()} {obj} .\n"
+
+
+class NTriplesWriter(TripleBuilder):
+    # writes the triples out as N-Triples rows as soon as they are added. Rows are
+    # deduplicated by a 128-bit digest of their encoded bytes, so the memory kept per
+    # row does not grow with long literals.
+    def __init__(self, output_file: BinaryIO, generic_property: URIRef = None):
+        super().__init__(generic_property=generic_property)
+        self.output_file = output_file
+        self._written_rows = set()
+        self._rows = []
+
+    def write(self, triple: tuple[URIRef, URIRef, URIRef | Literal]) -> bool:
+        row = get_ntriples_row(triple).encode("utf-8")
+        row_digest = blake2b(row, digest_size=16).digest()
+        if row_digest in self._written_rows:
+            return False
+        self._written_rows.add(row_digest)
+        self._rows.append(row)
+        if len(self._rows) >= NTRIPLES_BUFFER_ROWS:
+            self.flush()
+        return True
+
+    def flush(self) -> None:
+        self.output_file.write(b"".join(self._rows))
+        self._rows = []
+
+
+def get_rdf_stream_format(
+    output_path: str | Path | BinaryIO, file_format: str = None
+) -> tuple[RDFFormat, bool]:
+    suffixes = (
+        [suffix.lower() for suffix in Path(output_path).suffixes]
+        if is_path_source(output_path)
+        else []
+    )
+    compressed = bool(suffixes) and suffixes[-1] == ".gz"
+    if compressed:
+        suffixes = suffixes[:-1]
+    if file_format is not None:
+        return RDFFormat.from_input(file_format), compressed
+    # streams written to memory have no extension to go by, so they are N-Triples
+    rdf_format = RDFFormat.from_ext(suffixes[-1]) if suffixes else RDFFormat.NT
+    return rdf_format, compressed
+
+
+@contextmanager
+def open_ntriples_writer(
+    output_path: str | Path | BinaryIO,
+    compressed: bool = False,
+) -> Iterator[NTriplesWriter]:
+    if is_path_source(output_path):
+        file_opener = gzip.open if compressed else open
+        output_context = file_opener(output_path, "wb")
+    else:
+        output_context = (
+            gzip.GzipFile(fileobj=output_path, mode="wb")
+            if compressed
+            else nullcontext(output_path)
+        )
+    with output_context as output_file:
+        writer = NTriplesWriter(output_file)
+        yield writer
+        writer.commit()
+
+
+def get_rdf_fingerprint(rdf_graph: Graph) -> str:
+    # the triples without blank nodes are hashed one by one and summed, so their order
+    # does not matter. Only the triples with blank nodes go through rdflib's canonical
+    # labelling, which is slow but makes the hash independent of the blank node ids.
+    ground_digest = 0
+    bnode_graph = Graph()
+    for triple in rdf_graph:
+        if any(isinstance(term, BNode) for term in triple):
+            bnode_graph.add(triple)
+            continue
+        row = get_ntriples_row(triple).encode("utf-8")
+        ground_digest += int.from_bytes(blake2b(row, digest_size=16).digest())
+    bnode_digest = to_isomorphic(bnode_graph).graph_digest() if bnode_graph else 0
+    fingerprint = f"{ground_digest % 2**128:032x}:{bnode_digest:x}"
+    return blake2b(fingerprint.encode(), digest_size=16).hexdigest()
+
+
+def get_output_fingerprint_path(output_path: str | Path) -> Path:
+    output_path = Path(output_path)
+    return output_path.parent / f".{output_path.name}.fingerprint.json"
+
+
+def read_output_fingerprint(output_path: str | Path) -> dict[str, any]:
+    try:
+        with open(get_output_fingerprint_path(output_path), "r") as f:
+            record = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return dict()
+    if (
+        not isinstance(record, dict)
+        or record.get("version") != OUTPUT_FINGERPRINT_VERSION
+    ):
+        return dict()
+    return record
+
+
+def write_output_fingerprint(
+    output_path: str | Path, fingerprint: str, rdf_format: str
+) -> None:
+    # the size and modification time tell if the output was changed since
+    output_stat = Path(output_path).stat()
+    record = {
+        "version": OUTPUT_FINGERPRINT_VERSION,
+        "fingerprint": fingerprint,
+        "format": rdf_format,
+        "size": output_stat.st_size,
+        "mtime_ns": output_stat.st_mtime_ns,
+    }
+    with open(get_output_fingerprint_path(output_path), "w") as f:
+        json.dump(record, f)
+
+
+def is_rdf_output_unchanged(
+    output_path: str | Path, rdf_format: str, fingerprint: str
+) -> bool:
+    output_path = Path(output_path)
+    if not output_path.exists():
+        return False
+    record = read_output_fingerprint(output_path)
+    output_stat = output_path.stat()
+    if (
+        record.get("format") == rdf_format
+        and record.get("size") == output_stat.st_size
+        and record.get("mtime_ns") == output_stat.st_mtime_ns
+    ):
+        return record.get("fingerprint") == fingerprint
+    # without a record of the file as it is now, the file itself is read back
+    try:
+        existing_graph = Graph().parse(output_path, format=rdf_format)
+    except Exception:
+        # a file that cannot be read is simply written again
+        return False
+    return get_rdf_fingerprint(existing_graph) == fingerprint
+
+
+def get_match_cache_path(
+    input_path: str | Path, cache_location: bool | str | Path = True
+) -> Path:
+    input_path = Path(input_path)
+    if cache_location is True:
+        return input_path.parent / f".{input_path.name}.matches.json"
+    # diagrams in a shared cache folder are told apart by their full path
+    path_hash = blake2b(str(input_path.resolve()).encode(), digest_size=8).hexdigest()
+    return Path(cache_location) / f"{input_path.stem}-{path_hash}.matches.json"
+
+
+def serialize_term_resolution(resolution: TermResolution) -> list:
+    matched_term = resolution.matched_term
+    return [
+        str(matched_term) if matched_term is not None else None,
+        list(resolution.search_keys),
+        [
+            list(result) if result is not None else None
+            for result in resolution.search_results
         ],
+    ]
+
+
+def deserialize_term_resolution(term: str, record: list) -> TermResolution:
+    matched_term, search_keys, search_results = record
+    return TermResolution(
+        term,
+        URIRef(matched_term) if matched_term is not None else None,
+        search_keys,
+        [tuple(result) if result is not None else None for result in search_results],
     )
-    df.to_csv(log_substitution_path)
+
+
+def read_match_cache(
+    cache_path: str | Path, reference_fingerprint: str
+) -> dict[str, TermResolution]:
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return dict()
+    # terms matched against another reference set have to be matched again
+    if (
+        not isinstance(cache, dict)
+        or cache.get("version") != MATCH_CACHE_VERSION
+        or cache.get("references") != reference_fingerprint
+    ):
+        return dict()
+    return {
+        term: deserialize_term_resolution(term, record)
+        for term, record in cache.get("resolutions", dict()).items()
+    }
+
+
+def write_match_cache(
+    cache_path: str | Path,
+    reference_fingerprint: str,
+    resolutions: dict[str, TermResolution],
+) -> None:
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache = {
+        "version": MATCH_CACHE_VERSION,
+        "references": reference_fingerprint,
+        "resolutions": {
+            term: serialize_term_resolution(resolution)
+            for term, resolution in resolutions.items()
+        },
+    }
+    with open(cache_path, "w") as f:
+        json.dump(cache, f)
@@ -1,8 +1,14 @@
 import re
+from collections.abc import Callable, Iterable
+from itertools import chain
 
+from networkx import DiGraph
 from rdflib import Literal
 from rdflib.namespace import split_uri
 
+from cemento.rdf.constants import TermEntry, TermTable
+from cemento.utils.utils import fst, get_abbrev_term
+
 
 def clean_literal_string(literal_term: str) -> str:
     new_literal_term = literal_term.strip().replace('"', "")
@@ -25,6 +31,44 @@ def get_term_aliases(term: str) -> list[str]:
     return []
 
 
+def get_term_table(
+    graph: DiGraph,
+    get_search_keys: Callable[[str], list[str]],
+    predicate_labels: Iterable[str] = None,
+) -> TermTable:
+    # terms come in the order of the edges, then the remaining nodes, then the extra
+    # predicate labels, and each one is only processed the first time it is seen
+    predicate_labels = [] if predicate_labels is None else predicate_labels
+    edge_terms = (
+        term
+        for subj, obj, data in graph.edges(data=True)
+        for term in (subj, data["label"], obj)
+    )
+    term_table = TermTable()
+    for term in chain(edge_terms, graph.nodes):
+        add_term_entry(term_table, term, get_search_keys)
+    for term in predicate_labels:
+        add_term_entry(term_table, term, get_search_keys)
+    term_table.set_predicates(predicate_labels)
+    return term_table
+
+
+def add_term_entry(
+    term_table: TermTable, term: str, get_search_keys: Callable[[str], list[str]]
+) -> None:
+    if not term or term in term_table:
+        return
+    # TODO: assign literal terms IDs so identical values get treated separately
+    is_literal = '"' in term
+    term_table.entries[term] = TermEntry(
+        label=term,
+        aliases=get_term_aliases(term),
+        is_literal=is_literal,
+        search_keys=get_search_keys(term),
+        prefix=None if is_literal else fst(get_abbrev_term(term)),
+    )
+
+
 def format_literal(literal: Literal, prefix: str) -> str:
     if prefix is None:
         raise ValueError(
@@ -1,12 +1,14 @@
+from io import BytesIO
 from pathlib import Path
+from typing import BinaryIO
 
 from cemento.draw_io.write_diagram import draw_tree
 from cemento.rdf.rdf_to_graph import convert_rdf_to_graph
 from cemento.utils.constants import RDFFormat
 
 def convert_rdf_to_drawio(
-    input_path: str | Path,
-    output_path: str | Path,
+    input_path: str | Path | bytes | BinaryIO,
+    output_path: str | Path | BinaryIO,
     file_format: str  | RDFFormat = None,
     horizontal_tree: bool = False,
     classes_only: bool = False,
@@ -15,6 +17,7 @@ def convert_rdf_to_drawio(
     defaults_folder: str | Path = None,
     prefixes_path: str | Path = None,
     set_unique_literals: bool = False,
+    embed_terms: bool = False,
 ) -> None:
     graph = convert_rdf_to_graph(
         input_path,
@@ -31,4 +34,34 @@ def convert_rdf_to_drawio(
         classes_only=classes_only,
         demarcate_boxes=demarcate_boxes,
         horizontal_tree=horizontal_tree,
+        embed_terms=embed_terms,
     )
+
+
+def convert_rdf_to_drawio_bytes(
+    input_rdf: str | Path | bytes | BinaryIO,
+    file_format: str | RDFFormat = None,
+    horizontal_tree: bool = False,
+    classes_only: bool = False,
+    demarcate_boxes: bool = False,
+    onto_ref_folder: str | Path = None,
+    defaults_folder: str | Path = None,
+    prefixes_path: str | Path = None,
+    set_unique_literals: bool = False,
+    embed_terms: bool = False,
+) -> bytes:
+    output = BytesIO()
+    convert_rdf_to_drawio(
+        input_rdf,
+        output,
+        file_format=file_format,
+        horizontal_tree=horizontal_tree,
+        classes_only=classes_only,
+        demarcate_boxes=demarcate_boxes,
+        onto_ref_folder=onto_ref_folder,
+        defaults_folder=defaults_folder,
+        prefixes_path=prefixes_path,
+        set_unique_literals=set_unique_literals,
+        embed_terms=embed_terms,
+    )
+    return output.getvalue()
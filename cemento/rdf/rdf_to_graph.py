@@ -1,11 +1,13 @@
 from functools import reduce
 from itertools import chain
 from pathlib import Path
+from typing import BinaryIO
 
 import networkx as nx
 from networkx import DiGraph
 from rdflib import OWL, RDF, RDFS, SKOS, Literal, URIRef
 
+from cemento.draw_io.constants import ShapeType
 from cemento.rdf.transforms import (
     add_triples_to_digraph,
     assign_literal_ids,
@@ -31,11 +33,12 @@ from cemento.utils.io import (
     get_default_defaults_folder,
     get_default_prefixes_file,
     get_default_references_folder,
+    read_source,
 )
 
 
 def convert_rdf_to_graph(
-    input_path: str | Path,
+    input_path: str | Path | bytes | BinaryIO,
     file_format: str | RDFFormat = None,
     classes_only: bool = False,
     onto_ref_folder: str | Path = None,
@@ -50,11 +53,13 @@ def convert_rdf_to_graph(
         get_default_defaults_folder() if not defaults_folder else defaults_folder
     )
     prefixes_path = get_default_prefixes_file() if not prefixes_path else prefixes_path
+    # the input is parsed twice, so a stream is read into memory first
+    input_path = read_source(input_path)
     print("retrieving reference data...")
     file_strat_preds = set()
     ref_strat_preds = set()
     prefixes, inv_prefixes = get_prefixes(
-        prefixes_path, onto_ref_folder, input_file=input_path
+        prefixes_path, onto_ref_folder, input_file=input_path, file_format=file_format
     )
     default_terms = get_default_terms(defaults_folder)
 
@@ -186,6 +191,30 @@ def convert_rdf_to_graph(
             {node: {"is_instance": node in all_instances} for node in graph.nodes()},
         )
 
+        # keep the IRIs around once the terms are renamed to their labels
+        nx.set_node_attributes(
+            graph,
+            {
+                node: {
+                    "iri": str(node),
+                    "term_type": (
+                        ShapeType.CLASS.value
+                        if graph.nodes[node]["is_class"]
+                        else ShapeType.INSTANCE.value
+                    ),
+                }
+                for node in graph.nodes()
+                if isinstance(node, URIRef)
+            },
+        )
+        nx.set_edge_attributes(
+            graph,
+            {
+                (subj, obj): {"iri": str(data["label"])}
+                for subj, obj, data in graph.edges(data=True)
+            },
+        )
+
         print("renaming terms...")
         all_terms = all_classes | all_instances | all_predicates
         aliases = get_aliases(rdf_graph)
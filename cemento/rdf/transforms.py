@@ -1,13 +1,12 @@
 import re
+from collections import defaultdict
 from collections.abc import Callable, Iterable
-from functools import reduce
-from itertools import chain, groupby
+from itertools import chain
 from uuid import uuid4
 
 import networkx as nx
 from networkx import DiGraph
-from rdflib import OWL, RDF, RDFS, SKOS, XSD, BNode, Graph, Literal, Namespace, URIRef
-from rdflib.collection import Collection
+from rdflib import OWL, RDF, RDFS, SKOS, BNode, Graph, Literal, Namespace, URIRef
 from rdflib.namespace import split_uri
 
 from cemento.rdf.preprocessing import (
@@ -16,13 +15,11 @@ from cemento.rdf.preprocessing import (
     remove_suppression_key,
 )
 from cemento.term_matching.constants import RANK_PROPS
-from cemento.term_matching.transforms import substitute_term_multikey
+from cemento.term_matching.transforms import get_datatype_resolver
 from cemento.utils.constants import valid_collection_types
 from cemento.utils.utils import (
     enforce_camel_case,
     filter_graph,
-    fst,
-    snd,
 )
 
 
@@ -36,15 +33,6 @@ def construct_term_uri(
     return URIRef(f"{ns_uri}{abbrev_term}")
 
 
-def get_xsd_terms() -> dict[str, URIRef]:
-    terms = list(filter(lambda term: isinstance(term, URIRef), dir(XSD)))
-    abbrev_terms = map(lambda term: f"xsd:{snd(split_uri(term))}", terms)
-    return {
-        abbrev_term: term
-        for (abbrev_term, term) in zip(abbrev_terms, terms, strict=True)
-    }
-
-
 def construct_literal(term: str, lang="en", datatype=None) -> Literal:
     return Literal(clean_literal_string(term), lang=lang, datatype=datatype)
 
@@ -53,17 +41,21 @@ def get_literal_lang_annotation(literal_term: str, default=None) -> str:
     return res[0] if (res := re.findall(r"@(\w+)", literal_term)) else default
 
 
+def get_literal_datatype_annotation(literal_term: str) -> str | None:
+    return res[0] if (res := re.findall(r"\^\^(\w+:\w+)", literal_term)) else None
+
+
 def get_literal_data_type(
     literal_term: str,
-    search_terms: dict[str, URIRef],
+    search_terms: dict[str, URIRef] = None,
     score_cutoff=90,
+    datatype_resolver: Callable[[str], URIRef | None] = None,
 ) -> URIRef | None:
-    search_key = res[0] if (res := re.findall(r"\^\^(\w+:\w+)", literal_term)) else None
+    search_key = get_literal_datatype_annotation(literal_term)
     if search_key:
-        datatype = substitute_term_multikey(
-            [search_key], search_terms, score_cutoff=score_cutoff
-        )
-        return datatype
+        if datatype_resolver is None:
+            datatype_resolver = get_datatype_resolver(search_terms, score_cutoff)
+        return datatype_resolver(search_key)
     return None
 
 
@@ -95,7 +87,7 @@ def add_rdf_triples(
     triples: Iterable[tuple[URIRef | Literal, URIRef, URIRef | Literal]],
 ) -> Graph:
     # TODO: set to strictly immutable rdf_graph
-    return reduce(lambda graph, triple: graph.add(triple), triples, rdf_graph)
+    return rdf_graph.addN((*triple, rdf_graph) for triple in triples)
 
 
 def add_labels(rdf_graph: Graph, term: URIRef, labels: list[str]) -> Graph:
@@ -119,9 +111,48 @@ def get_term_range(term: URIRef, graph: DiGraph) -> Iterable[URIRef]:
     return (obj for _, obj, data in graph.edges(data=True) if data["label"] == term)
 
 
+def get_component_term_batches(
+    graph: DiGraph, terms: Iterable[str], batch_count: int
+) -> list[list[str]]:
+    # every term goes with the first weakly connected component it shows up in, and the
+    # components are handed out largest first to the smallest batch, so the batches get
+    # about the same number of terms. Terms outside of the graph are grouped together.
+    term_components = dict()
+    for index, component in enumerate(nx.weakly_connected_components(graph)):
+        term_components.update((node, index) for node in component)
+    for subj, _, data in graph.edges(data=True):
+        term_components.setdefault(data.get("label", None), term_components[subj])
+
+    component_terms = defaultdict(list)
+    for term in terms:
+        component_terms[term_components.get(term, None)].append(term)
+
+    batches = [[] for _ in range(batch_count)]
+    for group in sorted(component_terms.values(), key=len, reverse=True):
+        min(batches, key=len).extend(group)
+    return [batch for batch in batches if batch]
+
+
+def get_domains_ranges_index(
+    graph: DiGraph,
+) -> dict[URIRef, tuple[set[URIRef], set[URIRef]]]:
+    # collect the domains and ranges of every predicate in one pass over the edges
+    domains_ranges_index = defaultdict(lambda: (set(), set()))
+    for subj, obj, data in graph.edges(data=True):
+        domains, ranges = domains_ranges_index[data["label"]]
+        domains.add(subj)
+        ranges.add(obj)
+    return dict(domains_ranges_index)
+
+
 def get_domains_ranges(
-    predicate: Iterable[URIRef], graph: DiGraph
+    predicate: URIRef,
+    graph: DiGraph = None,
+    domains_ranges_index: dict[URIRef, tuple[set[URIRef], set[URIRef]]] = None,
 ) -> tuple[URIRef, set[URIRef], set[URIRef]]:
+    if domains_ranges_index is not None:
+        domains, ranges = domains_ranges_index.get(predicate, (set(), set()))
+        return predicate, set(domains), set(ranges)
     return (
         predicate,
         set(get_term_domain(predicate, graph)),
@@ -129,16 +160,28 @@ def get_domains_ranges(
     )
 
 
+def get_collection_list_triples(
+    collection_node: BNode, member_terms: Iterable[URIRef]
+) -> list[tuple[BNode, URIRef, URIRef]]:
+    # same rdf:first/rdf:rest chain as rdflib's Collection, without a graph to write to
+    member_terms = list(member_terms)
+    list_nodes = [collection_node] + [BNode() for _ in member_terms[1:]]
+    rest_nodes = list_nodes[1:] + [RDF.nil]
+    return [
+        triple
+        for list_node, member, rest_node in zip(list_nodes, member_terms, rest_nodes)
+        for triple in ((list_node, RDF.first, member), (list_node, RDF.rest, rest_node))
+    ]
+
+
 def get_term_collection_triples(
-    rdf_graph: Graph,
     head_term: URIRef,
     member_terms: Iterable[URIRef],
     member_rel: URIRef,
     term_collection_rel: URIRef,
 ) -> list[tuple[URIRef, URIRef, URIRef]]:
-    triples = []
     collection_node = BNode()
-    Collection(rdf_graph, collection_node, member_terms)
+    triples = get_collection_list_triples(collection_node, member_terms)
     # create class that points to the collection
     collection_class = BNode()
     triples.append((collection_class, RDF.type, OWL.Class))
@@ -148,50 +191,48 @@ def get_term_collection_triples(
     return triples
 
 
-def add_domains_ranges(
-    term_domains_ranges: [URIRef, Iterable[URIRef], Iterable[URIRef]],
-    rdf_graph: DiGraph,
-) -> Graph:
+def get_domains_ranges_triples(
+    term_domains_ranges: tuple[URIRef, Iterable[URIRef], Iterable[URIRef]],
+) -> list[tuple[URIRef, URIRef, URIRef]]:
     predicate_term, domains, ranges = term_domains_ranges
     # TODO: assume union for now but fix later
     domain_collection_triples = [(predicate_term, RDFS.domain, next(iter(domains)))]
     if len(domains) > 1:
         domain_collection_triples = get_term_collection_triples(
-            rdf_graph, predicate_term, domains, OWL.unionOf, RDFS.domain
+            predicate_term, domains, OWL.unionOf, RDFS.domain
         )
 
     range_collection_triples = [(predicate_term, RDFS.range, next(iter(ranges)))]
     if len(ranges) > 1:
         range_collection_triples = get_term_collection_triples(
-            rdf_graph, predicate_term, ranges, OWL.unionOf, RDFS.range
+            predicate_term, ranges, OWL.unionOf, RDFS.range
         )
-    return add_rdf_triples(
-        rdf_graph, domain_collection_triples + range_collection_triples
+    return domain_collection_triples + range_collection_triples
+
+
+def add_domains_ranges(
+    term_domains_ranges: tuple[URIRef, Iterable[URIRef], Iterable[URIRef]],
+    rdf_graph: Graph,
+) -> Graph:
+    rdf_graph.addN(
+        (*triple, rdf_graph)
+        for triple in get_domains_ranges_triples(term_domains_ranges)
     )
+    return rdf_graph
 
 
 def remove_generic_property(
     rdf_graph: Graph, default_property: URIRef = RDF.Property
 ) -> Graph:
     # TODO: implement immutable copy of rdf_graph here
-    generic_pred_subjects = list(rdf_graph.subjects(None, default_property))
-    subject_property_type_defs = rdf_graph.triples_choices(
-        (generic_pred_subjects, RDF.type, None)
-    )
-    sorted_property_defs = sorted(subject_property_type_defs, key=lambda x: fst(x))
-    subject_property_defs_ct = (
-        (subj, len(list(objs)))
-        for subj, objs in groupby(sorted_property_defs, key=lambda x: x[0])
-    )
-    rdf_graph = reduce(
-        lambda rdf_graph, subject_info: (
-            rdf_graph.remove((fst(subject_info), RDF.type, default_property))
-            if snd(subject_info) > 1
-            else rdf_graph
-        ),
-        subject_property_defs_ct,
-        rdf_graph,
-    )
+    generic_pred_subjects = set(rdf_graph.subjects(None, default_property))
+    redundant_triples = [
+        (subj, RDF.type, default_property)
+        for subj in generic_pred_subjects
+        if len(set(rdf_graph.objects(subj, RDF.type))) > 1
+    ]
+    for triple in redundant_triples:
+        rdf_graph.remove(triple)
     return rdf_graph
 
 
@@ -397,7 +438,6 @@ def get_collection_nodes_iter(
 def get_collection_triples_and_targets(
     collection_nodes: dict[str, str],
     collection_subgraph: DiGraph,
-    rdf_graph: Graph,
     term_mapping: dict[str, URIRef | Literal],
 ):
     container_refs = dict()
@@ -430,7 +470,9 @@ def get_collection_triples_and_targets(
         # create the collection and refer to the node
         if collection_type:
             collection_node = BNode()
-            Collection(rdf_graph, collection_node, members)
+            collection_triples.extend(
+                get_collection_list_triples(collection_node, members)
+            )
             collection_class = BNode()
             collection_triples.append(
                 (collection_class, collection_type, collection_node)
@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+
 from rdflib import DCTERMS, OWL, RDF, RDFS, SKOS, Namespace, URIRef
 
 default_namespaces = [RDF, RDFS, OWL, DCTERMS, SKOS]
@@ -19,6 +21,19 @@ FALLBACK_STRAT_TYPES = {
 }
 
 
+# datatypes outside of the xsd namespace that literals can be annotated with
+KNOWN_DATATYPES = {
+    "rdf:langString": RDF.langString,
+    "rdf:HTML": RDF.HTML,
+    "rdf:XMLLiteral": RDF.XMLLiteral,
+    "rdf:JSON": RDF.JSON,
+    "rdf:PlainLiteral": RDF.PlainLiteral,
+    "rdfs:Literal": RDFS.Literal,
+    "owl:real": OWL.real,
+    "owl:rational": OWL.rational,
+}
+
+
 def get_default_namespace_prefixes() -> tuple[str, URIRef | Namespace]:
     return {
         prefix: ns
@@ -26,3 +41,27 @@ def get_default_namespace_prefixes() -> tuple[str, URIRef | Namespace]:
             default_namespace_prefixes, default_namespaces, strict=True
         )
     }
+
+
+@dataclass(frozen=True)
+class TermResolution:
+    term: str
+    matched_term: URIRef | None
+    search_keys: list[str]
+    search_results: list[tuple[str, int]]
+
+    @property
+    def score(self) -> float | None:
+        if self.matched_term is None:
+            return None
+        return max(
+            (
+                result[1]
+                for result in self.search_results
+                if result is not None and result[1] is not None
+            ),
+            default=None,
+        )
+
+    def as_log_result(self) -> tuple[URIRef | None, list[str], list[tuple[str, int]]]:
+        return (self.matched_term, self.search_keys, self.search_results)
@@ -3,12 +3,13 @@ import os
 from collections.abc import Iterable
 from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO
 
 from rdflib import RDFS, SKOS, Graph, Namespace, URIRef
 from rdflib.namespace import split_uri
 
 from cemento.utils.constants import RDFFormat
-from cemento.utils.io import get_rdf_format
+from cemento.utils.io import get_rdf_format, open_source
 
 
 def get_rdf_file_iter(
@@ -23,17 +24,22 @@ def get_rdf_file_iter(
     )
 
 
-def get_rdf_graph(file_path: str | Path, file_format: str | RDFFormat) -> Graph | None:
+def get_rdf_graph(
+    file_path: str | Path | bytes | BinaryIO, file_format: str | RDFFormat
+) -> Graph | None:
     with read_rdf(file_path, file_format=file_format) as graph:
         return graph
 
 
 @contextmanager
-def read_rdf(file_path: str | Path, file_format: str | RDFFormat) -> Graph:
+def read_rdf(
+    file_path: str | Path | bytes | BinaryIO, file_format: str | RDFFormat
+) -> Graph:
     rdf_graph = Graph()
     try:
         rdf_graph.parse(
-            file_path, format=get_rdf_format(file_path, file_format=file_format)
+            open_source(file_path),
+            format=get_rdf_format(file_path, file_format=file_format),
         )
         yield rdf_graph
     finally:
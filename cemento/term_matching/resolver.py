@@ -0,0 +1,222 @@
+import hashlib
+import json
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from threading import Lock
+from typing import Self
+
+from more_itertools import unique_everseen
+from rdflib import Graph, Namespace, URIRef
+
+from cemento.term_matching.constants import TermResolution
+from cemento.term_matching.io import get_rdf_file_iter
+from cemento.term_matching.transforms import (
+    get_datatype_resolver,
+    get_entire_prop_family,
+    get_prefixes,
+    get_search_terms,
+    get_strat_predicates_str,
+    get_term_search_keys,
+    get_term_search_result,
+    substitute_term_multikey,
+)
+from cemento.utils.io import (
+    get_default_defaults_folder,
+    get_default_prefixes_file,
+    get_default_references_folder,
+)
+
+
+class TermResolver:
+    # reference data is never modified after construction, so instances can be shared
+    # across threads. Only the memoized results are written to, and always under a lock.
+    def __init__(
+        self,
+        prefixes: dict[str, URIRef | Namespace],
+        search_terms: dict[str, URIRef],
+        inv_prefixes: dict[URIRef | Namespace, str] = None,
+        onto_ref_folder: str | Path = None,
+        defaults_folder: str | Path = None,
+        prefixes_path: str | Path = None,
+        score_cutoff: int = 80,
+    ):
+        self.prefixes = dict(prefixes)
+        self.inv_prefixes = (
+            dict(inv_prefixes)
+            if inv_prefixes is not None
+            else {value: key for key, value in prefixes.items()}
+        )
+        self.search_terms = dict(search_terms)
+        self.onto_ref_folder = onto_ref_folder
+        self.defaults_folder = (
+            get_default_defaults_folder() if not defaults_folder else defaults_folder
+        )
+        self.prefixes_path = prefixes_path
+        self.score_cutoff = score_cutoff
+        self.resolve_datatype = get_datatype_resolver(self.search_terms)
+        self._lock = Lock()
+        self._search_keys = dict()
+        self._resolutions = dict()
+        self._reference_data = dict()
+
+    @classmethod
+    def from_folders(
+        cls,
+        prefixes_path: str | Path = None,
+        onto_ref_folder: str | Path = None,
+        defaults_folder: str | Path = None,
+        score_cutoff: int = 80,
+    ) -> Self:
+        onto_ref_folder = (
+            get_default_references_folder() if not onto_ref_folder else onto_ref_folder
+        )
+        defaults_folder = (
+            get_default_defaults_folder() if not defaults_folder else defaults_folder
+        )
+        prefixes_path = (
+            get_default_prefixes_file() if not prefixes_path else prefixes_path
+        )
+        prefixes, inv_prefixes = get_prefixes(prefixes_path, onto_ref_folder)
+        search_terms = get_search_terms(inv_prefixes, onto_ref_folder, defaults_folder)
+        return cls(
+            prefixes,
+            search_terms,
+            inv_prefixes=inv_prefixes,
+            onto_ref_folder=onto_ref_folder,
+            defaults_folder=defaults_folder,
+            prefixes_path=prefixes_path,
+            score_cutoff=score_cutoff,
+        )
+
+    def __getstate__(self) -> dict[str, any]:
+        # the lock and the datatype resolver cannot be pickled, and the reference
+        # graphs are left behind since copies sent to other processes only match terms
+        state = self.__dict__.copy()
+        del state["_lock"], state["resolve_datatype"]
+        state["_reference_data"] = dict()
+        return state
+
+    def __setstate__(self, state: dict[str, any]) -> None:
+        self.__dict__.update(state)
+        self.resolve_datatype = get_datatype_resolver(self.search_terms)
+        self._lock = Lock()
+
+    def _get_memoized(self, cache: dict, key: any, compute: Callable[[], any]) -> any:
+        if key in cache:
+            return cache[key]
+        value = compute()
+        with self._lock:
+            return cache.setdefault(key, value)
+
+    @property
+    def prop_family(self) -> set[URIRef]:
+        return self._get_memoized(
+            self._reference_data,
+            "prop_family",
+            lambda: get_entire_prop_family(self.defaults_folder, self.inv_prefixes),
+        )
+
+    @property
+    def strat_terms(self) -> set[str]:
+        return self._get_memoized(
+            self._reference_data,
+            "strat_terms",
+            lambda: get_strat_predicates_str(
+                self.onto_ref_folder, self.defaults_folder, self.inv_prefixes
+            ),
+        )
+
+    @property
+    def reference_graphs(self) -> tuple[Graph, ...]:
+        return self._get_memoized(
+            self._reference_data,
+            "reference_graphs",
+            lambda: (
+                tuple(get_rdf_file_iter(self.onto_ref_folder))
+                if self.onto_ref_folder
+                else tuple()
+            ),
+        )
+
+    @property
+    def reference_fingerprint(self) -> str:
+        # matching only depends on the search terms, the prefixes and the cutoff, so
+        # resolutions made under the same fingerprint can be reused as they are
+        def compute_fingerprint() -> str:
+            reference_data = json.dumps(
+                [
+                    sorted(
+                        (key, str(value)) for key, value in self.search_terms.items()
+                    ),
+                    sorted(
+                        (str(key), value) for key, value in self.inv_prefixes.items()
+                    ),
+                    self.score_cutoff,
+                ]
+            )
+            return hashlib.blake2b(reference_data.encode(), digest_size=16).hexdigest()
+
+        return self._get_memoized(
+            self._reference_data, "reference_fingerprint", compute_fingerprint
+        )
+
+    def get_search_keys(self, term: str) -> list[str]:
+        return self._get_memoized(
+            self._search_keys,
+            term,
+            lambda: get_term_search_keys(term, self.inv_prefixes),
+        )
+
+    def explain(self, term: str) -> TermResolution:
+        def compute_resolution() -> TermResolution:
+            matched_term, search_keys, search_results = substitute_term_multikey(
+                self.get_search_keys(term),
+                self.search_terms,
+                score_cutoff=self.score_cutoff,
+                log_results=True,
+            )
+            return TermResolution(term, matched_term, search_keys, search_results)
+
+        return self._get_memoized(self._resolutions, term, compute_resolution)
+
+    def explain_all(self, terms: Iterable[str]) -> dict[str, TermResolution]:
+        return {term: self.explain(term) for term in unique_everseen(terms)}
+
+    def get_unresolved_terms(self, terms: Iterable[str]) -> list[str]:
+        return [
+            term for term in unique_everseen(terms) if term not in self._resolutions
+        ]
+
+    def get_resolutions(self, terms: Iterable[str]) -> dict[str, TermResolution]:
+        return {
+            term: self._resolutions[term]
+            for term in unique_everseen(terms)
+            if term in self._resolutions
+        }
+
+    def add_resolutions(self, resolutions: dict[str, TermResolution]) -> None:
+        # resolutions made elsewhere, such as in another process, are kept like the
+        # ones made here, and an existing resolution is never replaced
+        with self._lock:
+            for term, resolution in resolutions.items():
+                self._resolutions.setdefault(term, resolution)
+
+    def resolve(
+        self,
+        terms: Iterable[str],
+        result_logger: Callable[[str, tuple[URIRef, list[str], list]], None] = None,
+    ) -> dict[str, URIRef]:
+        substitute_mapping = dict()
+        for term in unique_everseen(terms):
+            resolution = self.explain(term)
+            if result_logger is not None:
+                result_logger(term, resolution.as_log_result())
+            if resolution.matched_term is not None:
+                substitute_mapping[term] = resolution.matched_term
+        return substitute_mapping
+
+    def is_search_result(self, term: URIRef) -> bool:
+        return (
+            get_term_search_result(term, self.inv_prefixes, self.search_terms)
+            is not None
+        )
@@ -1,18 +1,21 @@
 import re
 from collections import defaultdict
-from collections.abc import Container, Iterable
-from functools import partial, reduce
+from collections.abc import Callable, Container, Iterable
+from functools import cache, partial, reduce
 from itertools import chain
+from operator import iadd
 from pathlib import Path
 
 import tldextract
 from more_itertools import unique_everseen
-from rdflib import OWL, RDF, RDFS, SKOS, Graph, Literal, Namespace, URIRef
+from rdflib import OWL, RDF, RDFS, SKOS, XSD, Graph, Literal, Namespace, URIRef
+from rdflib.graph import ReadOnlyGraphAggregate
 from rdflib.namespace import split_uri
 from thefuzz import fuzz, process
 
 from cemento.term_matching.constants import (
     FALLBACK_STRAT_TYPES,
+    KNOWN_DATATYPES,
     RANK_PROPS,
     get_default_namespace_prefixes,
 )
@@ -26,7 +29,7 @@ from cemento.term_matching.io import (
 )
 from cemento.term_matching.preprocessing import merge_dictionaries
 from cemento.utils.constants import RDFFormat
-from cemento.utils.utils import get_abbrev_term, remove_term_names
+from cemento.utils.utils import get_abbrev_term, remove_term_names, snd
 
 
 def search_similar_terms_multikey(
@@ -102,25 +105,64 @@ def substitute_term_multikey(
     return term_substitute
 
 
+def get_xsd_terms() -> dict[str, URIRef]:
+    terms = list(filter(lambda term: isinstance(term, URIRef), dir(XSD)))
+    abbrev_terms = map(lambda term: f"xsd:{snd(split_uri(term))}", terms)
+    return {
+        abbrev_term: term
+        for (abbrev_term, term) in zip(abbrev_terms, terms, strict=True)
+    }
+
+
+def get_datatype_terms() -> dict[str, URIRef]:
+    return get_xsd_terms() | KNOWN_DATATYPES
+
+
+def get_datatype_resolver(
+    search_terms: dict[str, URIRef] = None,
+    score_cutoff=90,
+) -> Callable[[str], URIRef | None]:
+    datatype_terms = get_datatype_terms()
+    exact_datatype_terms = {key.lower(): term for key, term in datatype_terms.items()}
+    search_terms = search_terms if search_terms else dict()
+
+    @cache
+    def resolve_datatype(search_key: str) -> URIRef | None:
+        if (datatype := exact_datatype_terms.get(search_key.lower())) is not None:
+            return datatype
+        if (datatype := search_terms.get(search_key)) is not None:
+            return datatype
+        # only unknown annotations get fuzzy matched, and only against datatypes
+        return substitute_term_multikey(
+            [search_key], datatype_terms, score_cutoff=score_cutoff
+        )
+
+    return resolve_datatype
+
+
 def get_substitute_mapping(
     search_keys: dict[str, list[str]],
     search_pool: dict[str, URIRef],
     terms: Iterable[str],
     log_results: bool = False,
+    result_logger: Callable[[str, tuple[URIRef, list[str], list]], None] = None,
 ):
-    return {
-        term: substituted_value
-        for term, substituted_value in map(
-            lambda term: (
-                term,
-                substitute_term_multikey(
-                    search_keys[term], search_pool, log_results=log_results
-                ),
-            ),
-            unique_everseen(terms),
+    substitute_mapping = dict()
+    for term in unique_everseen(terms):
+        substituted_value = substitute_term_multikey(
+            search_keys[term],
+            search_pool,
+            log_results=log_results or result_logger is not None,
         )
-        if substituted_value is not None
-    }
+        # stream the result out as soon as it is produced instead of keeping it around
+        if result_logger is not None:
+            result_logger(term, substituted_value)
+            substituted_value = (
+                substituted_value if log_results else substituted_value[0]
+            )
+        if substituted_value is not None:
+            substitute_mapping[term] = substituted_value
+    return substitute_mapping
 
 
 def get_term_search_keys(term: str, inv_prefix: dict[URIRef, str]) -> list[str]:
@@ -178,11 +220,17 @@ def get_aliases(rdf_graph: Graph) -> dict[URIRef, Literal]:
 
 
 def get_term_types(rdf_graph: Graph) -> dict[URIRef, URIRef]:
-    return {subj: obj for subj, pred, obj in rdf_graph if pred == RDF.type}
+    return dict(rdf_graph.subject_objects(RDF.type))
 
 
 def combine_graphs(graphs: Iterable[Graph]) -> Graph:
-    return reduce(lambda acc, graph: acc + graph, graphs, Graph())
+    # add in place, since every + would copy all the triples gathered so far
+    return reduce(iadd, graphs, Graph())
+
+
+def get_graph_union_view(graphs: Iterable[Graph]) -> ReadOnlyGraphAggregate:
+    # lookups go to the index of every graph in turn, nothing is copied
+    return ReadOnlyGraphAggregate(list(graphs))
 
 
 def generate_residual_prefixes(
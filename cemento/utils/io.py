@@ -1,5 +1,8 @@
+import os
 from importlib import resources
+from io import BytesIO
 from pathlib import Path
+from typing import BinaryIO
 
 from cemento.utils.constants import RDFFormat
 
@@ -23,13 +26,45 @@ def get_default_prefixes_file() -> Path:
     return get_default_path("default_prefixes.json")
 
 
-def get_rdf_format(file_path: str | Path, file_format: str | RDFFormat = None) -> str:
-    file_path = Path(file_path)
+def is_path_source(source: str | Path | bytes | BinaryIO) -> bool:
+    return isinstance(source, (str, os.PathLike))
 
+
+def read_source(source: str | Path | bytes | BinaryIO) -> str | Path | bytes:
+    # in-memory sources are read once up front, so they can be parsed more than once
+    if is_path_source(source) or isinstance(source, bytes):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    return source.read()
+
+
+def open_source(source: str | Path | bytes | BinaryIO) -> str | Path | BinaryIO:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return BytesIO(source)
+    return source
+
+
+def get_output_paths(
+    output_path: str | Path | BinaryIO | list[str | Path | BinaryIO],
+) -> list[str | Path | BinaryIO]:
+    # several outputs are passed as a list or a tuple of them
+    if isinstance(output_path, (list, tuple)):
+        return list(output_path)
+    return [output_path]
+
+
+def get_rdf_format(
+    file_path: str | Path | bytes | BinaryIO, file_format: str | RDFFormat = None
+) -> str:
     rdf_format = None
     if file_format is None:
-        file_ext = file_path.suffix
-        rdf_format = RDFFormat.from_ext(file_ext)
+        # in-memory data has no extension to go by, so it is taken as turtle
+        rdf_format = (
+            RDFFormat.from_ext(Path(file_path).suffix)
+            if is_path_source(file_path)
+            else RDFFormat.TURTLE
+        )
     elif isinstance(file_format, str):
         rdf_format = RDFFormat.from_input(file_format)
 
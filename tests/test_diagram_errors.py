@@ -1,11 +1,17 @@
 import re
+import shutil
 from collections import Counter
+from io import BytesIO
 from itertools import chain
 from os import scandir
 from pathlib import Path
 from pprint import pprint
 
+import pytest
+
+from cemento.draw_io import preprocessing, read_diagram
 from cemento.draw_io.constants import (
+    BadDiagramError,
     BidirectionalEdgeError,
     BlankEdgeLabelError,
     BlankTermLabelError,
@@ -18,15 +24,18 @@ from cemento.draw_io.constants import (
     MissingParentEdgeError,
     NestedSyntaxSugarError,
 )
+from cemento.draw_io.io import DrawioDocument, get_error_check_path
 from cemento.draw_io.preprocessing import (
     find_errors_diagram_content,
     get_diagram_error_exemptions,
 )
+from cemento.draw_io.read_diagram import read_drawio, validate_drawio
 from cemento.draw_io.transforms import (
     extract_elements,
     parse_containers,
     parse_elements,
 )
+from cemento.utils.utils import fst
 
 diagram_test_files = [
     file.path
@@ -182,3 +191,129 @@ def test_container_errors():
         FloatingContainerError: 2,
     }
     check_errors_by_count(errors, expected_error_types)
+
+
+def test_validate_drawio(tmp_path):
+    for input_path in diagram_test_files:
+        expected_errors = [
+            (elem_id, type(error), str(error))
+            for elem_id, error in get_diagram_errors(input_path)
+        ]
+        errors = validate_drawio(input_path)
+        assert [
+            (elem_id, type(error), str(error)) for elem_id, error in errors
+        ] == expected_errors
+
+    # the error diagram is the same one a failed conversion writes
+    input_path = tmp_path / "diagram.drawio"
+    shutil.copy(diagram_test_files[0], input_path)
+    with pytest.raises(BadDiagramError):
+        read_drawio(input_path, check_errors=True)
+    error_diagram = get_error_check_path(input_path).read_bytes()
+    get_error_check_path(input_path).unlink()
+    assert validate_drawio(input_path, write_error_diagram=True)
+    assert get_error_check_path(input_path).read_bytes() == error_diagram
+
+
+def test_multi_page_errors(tmp_path):
+    # a diagram with errors and a copy of it as the second page of one file
+    diagram = Path(diagram_test_files[0]).read_text()
+    page_start = diagram.index("<diagram ")
+    page_end = diagram.index("</diagram>") + len("</diagram>")
+    second_page = re.sub(
+        r'<diagram name="[^"]*" id="[^"]*"',
+        '<diagram name="Page-2" id="page-2"',
+        diagram[page_start:page_end],
+    )
+    input_path = tmp_path / "diagram.drawio"
+    input_path.write_text(diagram[:page_end] + second_page + diagram[page_end:])
+
+    page_errors = get_diagram_errors(diagram_test_files[0])
+    expected_errors = [
+        (elem_id, type(error), page_name, f"[{page_name}] {error}")
+        for page_name in ("Page-1", "Page-2")
+        for elem_id, error in page_errors
+    ]
+    # the errors keep their type, also when they come back from other processes
+    for max_workers in (1, 2):
+        errors = validate_drawio(input_path, max_workers=max_workers)
+        assert [
+            (elem_id, type(error), error.page_name, str(error))
+            for elem_id, error in errors
+        ] == expected_errors
+
+
+def test_error_diagram_parsed_on_errors_only(monkeypatch):
+    parsed_documents = []
+
+    def get_document(input_path):
+        parsed_documents.append(input_path)
+        return DrawioDocument(input_path)
+
+    monkeypatch.setattr(read_diagram, "DrawioDocument", get_document)
+    # a diagram without errors is checked from the streamed cells alone
+    read_drawio(
+        Path(__file__).parent / "test_files" / "read-diagram-03.drawio",
+        check_errors=True,
+    )
+    assert not parsed_documents
+
+    # the tree is only parsed to write the error diagram, streams included
+    with pytest.raises(BadDiagramError) as error_info:
+        read_drawio(
+            BytesIO(Path(diagram_test_files[0]).read_bytes()), check_errors=True
+        )
+    assert len(parsed_documents) == 1
+    assert b"strokeColor=#ff0000" in error_info.value.error_diagram
+
+
+def test_validation_cache(tmp_path, monkeypatch):
+    checked_ids = []
+
+    def find_index_errors(index, **kwargs):
+        checked_ids.append(kwargs["checked_ids"])
+        return preprocessing.find_index_errors(index, **kwargs)
+
+    monkeypatch.setattr(read_diagram, "find_index_errors", find_index_errors)
+
+    def get_errors(input_path, **kwargs):
+        errors = validate_drawio(input_path, write_error_diagram=True, **kwargs)
+        error_diagram = get_error_check_path(input_path).read_bytes()
+        return [
+            (elem_id, type(error), str(error)) for elem_id, error in errors
+        ], error_diagram
+
+    input_path = tmp_path / "diagram.drawio"
+    input_path.write_text(Path(diagram_test_files[2]).read_text())
+    expected_errors, expected_diagram = get_errors(input_path)
+    error_ids = set(map(fst, expected_errors))
+    # the first run checks everything, the next one only the elements with errors
+    for _ in range(2):
+        assert get_errors(input_path, validation_cache=True) == (
+            expected_errors,
+            expected_diagram,
+        )
+    assert checked_ids[-1] == error_ids
+    assert (tmp_path / ".diagram.drawio.validation.json").exists()
+
+    # a relabeled term is checked again, along with the edge that points to it
+    input_path.write_text(
+        input_path.read_text().replace('value="cco:Person"', 'value="cco:Agent"')
+    )
+    expected_errors, expected_diagram = get_errors(input_path)
+    assert get_errors(input_path, validation_cache=True) == (
+        expected_errors,
+        expected_diagram,
+    )
+    assert checked_ids[-1] == error_ids | {
+        "Au105vARhEtHX6xS6kwJ-1",
+        "Au105vARhEtHX6xS6kwJ-2",
+    }
+
+    # the cache can also be kept in a folder of its own
+    cache_folder = tmp_path / "cache"
+    assert get_errors(input_path, validation_cache=cache_folder) == (
+        expected_errors,
+        expected_diagram,
+    )
+    assert len(list(cache_folder.glob("diagram-*.validation.json"))) == 1
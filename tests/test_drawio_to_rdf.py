@@ -0,0 +1,129 @@
+import re
+from io import BytesIO
+from os import scandir
+from pathlib import Path
+
+import pytest
+import rdflib
+
+from cemento.draw_io.read_diagram import read_drawio
+from cemento.rdf.drawio_to_rdf import (
+    convert_drawio_to_rdf,
+    merge_drawio_to_rdf_graph,
+)
+from cemento.rdf.graph_to_rdf import (
+    convert_graph_to_rdf_graph,
+    write_rdf_outputs,
+)
+from cemento.term_matching.resolver import TermResolver
+
+diagram_test_files = [
+    file.path
+    for file in scandir(Path(__file__).parent / "test_files")
+    if re.fullmatch(r"read-diagram-(\d+)", Path(file.path).stem)
+]
+diagram_test_files = sorted(diagram_test_files)
+
+
+def get_corresponding_ref_file(input_file: str | Path):
+    input_file_path = Path(input_file)
+    ref_folder_path = Path(__file__).parent / "test_refs"
+    ref_paths = {
+        (file_path := Path(file.path)).suffix.replace(".", ""): file_path
+        for file in scandir(ref_folder_path)
+        if re.fullmatch(input_file_path.stem, Path(file.path).stem)
+    }
+    return ref_paths
+
+
+def test_multiple_outputs(tmp_path):
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+    ref_rdf_graph = rdflib.Graph()
+    ref_rdf_graph.parse(ref_path, format="turtle")
+
+    # the graph is built once and written in the format of every output
+    output_paths = [
+        tmp_path / f"output.{ext}" for ext in ("ttl", "nt", "jsonld", "xml")
+    ]
+    output_stream = BytesIO()
+    convert_drawio_to_rdf(
+        diagram_test_files[2],
+        [*output_paths, output_stream],
+        check_errors=True,
+        term_resolver=term_resolver,
+    )
+    output_formats = ["turtle", "nt", "json-ld", "xml"]
+    rdf_graphs = [
+        rdflib.Graph().parse(output_path, format=file_format)
+        for output_path, file_format in zip(output_paths, output_formats)
+    ]
+    rdf_graphs.append(rdflib.Graph().parse(data=output_stream.getvalue()))
+    for rdf_graph, file_format in zip(rdf_graphs, [*output_formats, "turtle"]):
+        # rdf/xml cannot hold the triples with literal subjects
+        if file_format == "xml":
+            assert set(rdf_graph) <= set(ref_rdf_graph)
+        else:
+            assert set(rdf_graph) == set(ref_rdf_graph)
+
+    # a process pool writes the same files
+    pool_output_paths = [tmp_path / f"pool_output.{ext}" for ext in ("ttl", "nt")]
+    write_rdf_outputs(rdf_graphs[0], pool_output_paths, ["turtle", "nt"], max_workers=2)
+    for output_path, file_format in zip(pool_output_paths, output_formats):
+        assert set(rdflib.Graph().parse(output_path, format=file_format)) == set(
+            ref_rdf_graph
+        )
+
+    with pytest.raises(ValueError):
+        convert_drawio_to_rdf(
+            diagram_test_files[2],
+            [tmp_path / "output.nt", tmp_path / "other.nt"],
+            term_resolver=term_resolver,
+            stream_output=True,
+        )
+
+
+def test_merge_drawio():
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+    input_paths = diagram_test_files[1:4]
+
+    def get_ground_triples(rdf_graph):
+        return {
+            triple
+            for triple in rdf_graph
+            if not any(isinstance(term, rdflib.BNode) for term in triple)
+            and triple[1] != rdflib.DCTERMS.source
+        }
+
+    # the merged graph holds the same triples as the diagrams converted one by one
+    rdf_graph = merge_drawio_to_rdf_graph(
+        input_paths,
+        check_errors=True,
+        term_resolver=term_resolver,
+        annotate_sources=True,
+    )
+    separate_rdf_graphs = [
+        convert_graph_to_rdf_graph(read_drawio(input_path), term_resolver=term_resolver)
+        for input_path in input_paths
+    ]
+    assert get_ground_triples(rdf_graph) == set().union(
+        *map(get_ground_triples, separate_rdf_graphs)
+    )
+
+    # every term is annotated with the diagrams it was drawn in
+    mds = rdflib.Namespace("https://cwrusdle.bitbucket.io/mds/")
+    lotr = rdflib.Namespace("http://example.com/lotr#")
+    term_sources = {
+        term: set(map(str, rdf_graph.objects(term, rdflib.DCTERMS.source)))
+        for term in (mds.Student, lotr.Frodo)
+    }
+    assert term_sources == {
+        mds.Student: {str(input_paths[0])},
+        lotr.Frodo: {str(input_paths[1])},
+    }
+    assert (None, rdflib.DCTERMS.source, None) not in merge_drawio_to_rdf_graph(
+        input_paths, term_resolver=term_resolver
+    )
@@ -0,0 +1,231 @@
+import csv
+import gzip
+import json
+import re
+import shutil
+from functools import partial
+from io import BytesIO
+from itertools import chain
+from os import scandir
+from pathlib import Path
+
+import pytest
+import rdflib
+from rdflib import Literal, URIRef
+from rdflib.compare import isomorphic
+
+from cemento.draw_io.read_diagram import read_drawio
+from cemento.rdf.constants import SUBSTITUTE_LOG_COLUMNS
+from cemento.rdf.drawio_to_rdf import (
+    convert_drawio_to_rdf,
+    get_source_terms,
+)
+from cemento.rdf.graph_to_rdf import (
+    convert_graph_to_rdf_file,
+    convert_graph_to_rdf_graph,
+)
+from cemento.rdf.io import (
+    NTriplesWriter,
+    get_match_cache_path,
+    get_output_fingerprint_path,
+    get_rdf_fingerprint,
+    read_match_cache,
+)
+from cemento.term_matching.resolver import TermResolver
+
+diagram_test_files = [
+    file.path
+    for file in scandir(Path(__file__).parent / "test_files")
+    if re.fullmatch(r"read-diagram-(\d+)", Path(file.path).stem)
+]
+diagram_test_files = sorted(diagram_test_files)
+
+
+def get_corresponding_ref_file(input_file: str | Path):
+    input_file_path = Path(input_file)
+    ref_folder_path = Path(__file__).parent / "test_refs"
+    ref_paths = {
+        (file_path := Path(file.path)).suffix.replace(".", ""): file_path
+        for file in scandir(ref_folder_path)
+        if re.fullmatch(input_file_path.stem, Path(file.path).stem)
+    }
+    return ref_paths
+
+
+def test_substitution_log_formats(tmp_path):
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+
+    log_paths = [
+        tmp_path / "substitution_log.csv",
+        tmp_path / "substitution_log.jsonl",
+        tmp_path / "substitution_log.jsonl.gz",
+    ]
+    for log_path in log_paths:
+        convert_graph_to_rdf_graph(
+            read_drawio(diagram_test_files[2]),
+            term_resolver=term_resolver,
+            log_substitution_path=log_path,
+        )
+
+    with open(log_paths[0], newline="") as f:
+        csv_rows = list(csv.reader(f))
+    assert tuple(csv_rows[0]) == SUBSTITUTE_LOG_COLUMNS
+    assert len(csv_rows) > 1
+    assert log_paths[2].read_bytes()[:2] == b"\x1f\x8b"
+    with gzip.open(log_paths[2], "rt") as f:
+        assert f.read() == log_paths[1].read_text()
+    # every csv row is in the jsonl log, with the columns as keys
+    jsonl_rows = [json.loads(line) for line in log_paths[1].read_text().splitlines()]
+    assert all(tuple(row.keys()) == SUBSTITUTE_LOG_COLUMNS for row in jsonl_rows)
+    assert [
+        ["" if value is None else str(value) for value in row.values()]
+        for row in jsonl_rows
+    ] == csv_rows[1:]
+
+
+def test_streamed_rdf_output(tmp_path):
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+
+    for collect_domains_ranges in (False, True):
+        rdf_graph = convert_graph_to_rdf_graph(
+            read_drawio(diagram_test_files[2]),
+            collect_domains_ranges=collect_domains_ranges,
+            term_resolver=term_resolver,
+        )
+        output_path = tmp_path / "output.nt.gz"
+        convert_graph_to_rdf_file(
+            read_drawio(diagram_test_files[2]),
+            output_path,
+            collect_domains_ranges=collect_domains_ranges,
+            term_resolver=term_resolver,
+            stream_output=True,
+        )
+        rows = gzip.decompress(output_path.read_bytes()).splitlines()
+        assert len(rows) == len(set(rows))
+        streamed_rdf_graph = rdflib.Graph()
+        streamed_rdf_graph.parse(data=b"\n".join(rows), format="nt")
+        assert isomorphic(streamed_rdf_graph, rdf_graph)
+
+    with pytest.raises(ValueError):
+        convert_graph_to_rdf_file(
+            read_drawio(diagram_test_files[2]),
+            tmp_path / "output.ttl",
+            term_resolver=term_resolver,
+            stream_output=True,
+        )
+
+
+def test_ntriples_writer_deduplication():
+    output = BytesIO()
+    writer = NTriplesWriter(output)
+    subj, pred = URIRef("http://example.org/a"), URIRef("http://example.org/b")
+    # long literals only leave a fixed-size digest behind
+    long_literal = Literal("x" * 100_000)
+    assert writer.write((subj, pred, long_literal))
+    assert not writer.write((subj, pred, long_literal))
+    assert writer.write((subj, pred, Literal("x" * 99_999)))
+    writer.flush()
+    assert len(output.getvalue().splitlines()) == 2
+
+
+def test_skip_unchanged_outputs(tmp_path):
+    diagram_path = diagram_test_files[3]
+    ref_path = get_corresponding_ref_file(diagram_path)["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+    convert_diagram = partial(
+        convert_drawio_to_rdf,
+        diagram_path,
+        term_resolver=term_resolver,
+        skip_unchanged=True,
+    )
+
+    # the collections get new blank nodes on every conversion, but the same fingerprint
+    rdf_graphs = [
+        convert_graph_to_rdf_graph(
+            read_drawio(diagram_path), term_resolver=term_resolver
+        )
+        for _ in range(2)
+    ]
+    assert any(isinstance(term, rdflib.BNode) for term in chain(*rdf_graphs[0]))
+    assert set(rdf_graphs[0]) != set(rdf_graphs[1])
+    assert get_rdf_fingerprint(rdf_graphs[0]) == get_rdf_fingerprint(rdf_graphs[1])
+    rdf_graphs[1].remove(next(iter(rdf_graphs[1])))
+    assert get_rdf_fingerprint(rdf_graphs[0]) != get_rdf_fingerprint(rdf_graphs[1])
+
+    output_path = tmp_path / "output.ttl"
+    assert convert_diagram(output_path)
+    output_mtime = output_path.stat().st_mtime_ns
+    assert not convert_diagram(output_path)
+    assert output_path.stat().st_mtime_ns == output_mtime
+
+    # without a fingerprint record, the existing output is read back and compared
+    get_output_fingerprint_path(output_path).unlink()
+    assert not convert_diagram(output_path)
+    assert output_path.stat().st_mtime_ns == output_mtime
+
+    # outputs that were changed or are missing are written again
+    output_path.write_text("")
+    other_output_path = tmp_path / "output.nt"
+    assert convert_diagram([output_path, other_output_path])
+    assert other_output_path.exists()
+    assert isomorphic(
+        rdflib.Graph().parse(output_path), rdflib.Graph().parse(other_output_path)
+    )
+    assert not convert_diagram([output_path, other_output_path])
+
+    with pytest.raises(ValueError):
+        convert_diagram(tmp_path / "streamed.nt", stream_output=True)
+
+
+def test_match_cache(tmp_path):
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    diagram_path = tmp_path / "diagram.drawio"
+    shutil.copy(diagram_test_files[2], diagram_path)
+    cache_path = get_match_cache_path(diagram_path)
+
+    def convert_diagram(output_path, term_resolver=None):
+        convert_drawio_to_rdf(
+            diagram_path,
+            output_path,
+            prefixes_path=prefixes_path,
+            term_resolver=term_resolver,
+            match_cache=True,
+        )
+        return rdflib.Graph().parse(output_path)
+
+    def rebuild_diagram():
+        return convert_graph_to_rdf_graph(
+            read_drawio(diagram_path),
+            term_resolver=TermResolver.from_folders(prefixes_path=prefixes_path),
+        )
+
+    # the first run matches every term and keeps the matches
+    assert isomorphic(convert_diagram(tmp_path / "first.ttl"), rebuild_diagram())
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+    resolutions = read_match_cache(cache_path, term_resolver.reference_fingerprint)
+    diagram_terms = sorted(resolutions.keys())
+    assert "lotr:Wizard (Wizard)" in diagram_terms
+    assert resolutions == term_resolver.explain_all(diagram_terms)
+
+    # the next run skips matching for the terms that kept their label
+    diagram_path.write_text(
+        diagram_path.read_text().replace("Wizard (Wizard)", "Sorcerer (Sorcerer)")
+    )
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+    term_resolver.add_resolutions(resolutions)
+    assert term_resolver.get_unresolved_terms(
+        get_source_terms(read_drawio(diagram_path))
+    ) == ["lotr:Sorcerer (Sorcerer)"]
+    assert isomorphic(convert_diagram(tmp_path / "second.ttl"), rebuild_diagram())
+    resolutions = read_match_cache(cache_path, term_resolver.reference_fingerprint)
+    assert "lotr:Sorcerer (Sorcerer)" in resolutions
+    assert "lotr:Wizard (Wizard)" not in resolutions
+
+    # matches against another reference set are not reused
+    assert read_match_cache(cache_path, "other references") == dict()
@@ -0,0 +1,156 @@
+import re
+from itertools import chain
+from os import scandir
+from pathlib import Path
+
+import networkx as nx
+import pytest
+import rdflib
+
+from cemento.draw_io.read_diagram import read_drawio
+from cemento.rdf.builder import GraphTripleBuilder, TripleBuilder
+from cemento.rdf.graph_to_rdf import convert_graph_to_rdf_graph
+from cemento.rdf.preprocessing import get_term_aliases, get_term_table
+from cemento.rdf.transforms import get_component_term_batches
+from cemento.term_matching.resolver import TermResolver
+from cemento.utils.utils import fst, get_abbrev_term
+
+diagram_test_files = [
+    file.path
+    for file in scandir(Path(__file__).parent / "test_files")
+    if re.fullmatch(r"read-diagram-(\d+)", Path(file.path).stem)
+]
+diagram_test_files = sorted(diagram_test_files)
+
+
+def get_corresponding_ref_file(input_file: str | Path):
+    input_file_path = Path(input_file)
+    ref_folder_path = Path(__file__).parent / "test_refs"
+    ref_paths = {
+        (file_path := Path(file.path)).suffix.replace(".", ""): file_path
+        for file in scandir(ref_folder_path)
+        if re.fullmatch(input_file_path.stem, Path(file.path).stem)
+    }
+    return ref_paths
+
+
+def test_graph_triple_builder():
+    ex = rdflib.Namespace("http://example.com/")
+    rdf_builder = GraphTripleBuilder(generic_property=rdflib.OWL.ObjectProperty)
+    rdf_builder.excluded_subjects = {ex.excluded}
+    rdf_builder.add((ex.a, ex.rel, ex.b))
+    rdf_builder.add((ex.a, ex.rel, ex.b))
+    rdf_builder.add((ex.excluded, ex.rel, ex.b))
+    rdf_builder.addN(
+        (pred, rdflib.RDF.type, prop_type, None)
+        for pred, prop_type in (
+            (ex.rel, rdflib.OWL.ObjectProperty),
+            (ex.rel, rdflib.OWL.DatatypeProperty),
+            (ex.other, rdflib.OWL.ObjectProperty),
+        )
+    )
+    # nothing reaches the graph until the builder commits
+    assert not len(rdf_builder.rdf_graph)
+    rdf_builder.commit()
+
+    assert set(rdf_builder.rdf_graph) == {
+        (ex.a, ex.rel, ex.b),
+        (ex.rel, rdflib.RDF.type, rdflib.OWL.DatatypeProperty),
+        (ex.other, rdflib.RDF.type, rdflib.OWL.ObjectProperty),
+    }
+    # the excluded subject and the replaced property type are counted as removed
+    assert rdf_builder.added == 3
+    assert rdf_builder.removed == 2
+    assert rdf_builder.deduplicated == 1
+
+    # triples of excluded subjects that were already in the graph are removed too
+    rdf_graph = rdflib.Graph()
+    rdf_graph.add((ex.excluded, ex.rel, ex.a))
+    rdf_graph.add((ex.excluded, ex.rel, ex.b))
+    rdf_builder = GraphTripleBuilder(rdf_graph)
+    rdf_builder.excluded_subjects = {ex.excluded}
+    rdf_builder.add((ex.a, ex.rel, ex.b))
+    rdf_builder.commit()
+    assert set(rdf_graph) == {(ex.a, ex.rel, ex.b)}
+    assert rdf_builder.removed == 2
+
+    with pytest.raises(TypeError):
+        TripleBuilder()
+
+
+def test_graph_without_default_terms():
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    graph = nx.DiGraph()
+    graph.add_edge("lotr:Frodo", "lotr:Sam", label="lotr:friendOf")
+
+    # no term is in a default namespace, so none of the triples are removed
+    rdf_graph = convert_graph_to_rdf_graph(graph, prefixes_path=prefixes_path)
+    lotr = rdflib.Namespace("http://example.com/lotr#")
+    assert (lotr.Frodo, None, lotr.Sam) in rdf_graph
+
+
+def test_term_table():
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+    graph = read_drawio(diagram_test_files[2])
+
+    term_table = get_term_table(
+        graph, term_resolver.get_search_keys, predicate_labels=["mds:extraRel"]
+    )
+    diagram_terms = {
+        term
+        for subj, obj, data in graph.edges(data=True)
+        for term in (subj, data["label"], obj)
+    } | set(graph.nodes)
+    assert set(term_table) == (diagram_terms | {"mds:extraRel"}) - {""}
+    for term in term_table:
+        entry = term_table[term]
+        assert entry.label == term
+        assert entry.aliases == get_term_aliases(term)
+        assert entry.search_keys == term_resolver.get_search_keys(term)
+        assert entry.is_literal == (term in term_table.literal_terms)
+        assert entry.is_literal or entry.prefix == fst(get_abbrev_term(term))
+    assert term_table["mds:extraRel"].is_predicate
+
+
+def test_component_parallel_conversion(tmp_path):
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+
+    def get_graph():
+        graph = nx.DiGraph()
+        for idx in range(40):
+            graph.add_edge(
+                f"lotr:hobbit{idx}", f"lotr:Family{idx % 8}", label="rdf:type"
+            )
+            graph.add_edge(
+                f"lotr:hobbit{idx}", f'"Hobbit {idx}"', label="lotr:hasNickname"
+            )
+        return graph
+
+    graph = get_graph()
+    terms = list(graph.nodes) + ["rdf:type", "lotr:hasNickname", "lotr:extraRel"]
+    batches = get_component_term_batches(graph, terms, 3)
+    assert len(batches) == 3
+    assert sorted(chain.from_iterable(batches)) == sorted(terms)
+    # a component is never split between batches
+    for component in nx.weakly_connected_components(graph):
+        assert sum(1 for batch in batches if component & set(batch)) == 1
+
+    # the terms are matched in other processes, but the output is the same
+    rdf_graphs, logs = [], []
+    for max_workers in (1, 2):
+        log_path = tmp_path / f"substitution_log_{max_workers}.csv"
+        rdf_graphs.append(
+            convert_graph_to_rdf_graph(
+                get_graph(),
+                prefixes_path=prefixes_path,
+                log_substitution_path=log_path,
+                max_workers=max_workers,
+            )
+        )
+        logs.append(log_path.read_text())
+    assert set(rdf_graphs[0]) == set(rdf_graphs[1])
+    assert logs[0] == logs[1]
@@ -1,20 +1,48 @@
 import json
 import re
+import shutil
+from io import BytesIO
 from collections.abc import Iterable
 from functools import partial
+from itertools import chain
 from os import scandir
 from pathlib import Path
 from pprint import pprint
 
+import pytest
 import rdflib
+from bs4 import BeautifulSoup
+from defusedxml import ElementTree
+from rdflib.collection import Collection
 from rdflib.compare import isomorphic
 
-from cemento.draw_io.read_diagram import read_drawio
+from cemento.draw_io.constants import DiagramElement
+from cemento.draw_io.io import (
+    DecodedDiagramStream,
+    DrawioDocument,
+    decode_diagram_payload,
+    iter_decoded_diagram_chunks,
+    iter_diagram_cells,
+)
+from cemento.draw_io.preprocessing import get_label_text
+from cemento.draw_io.read_diagram import read_drawio, read_drawio_pages
 from cemento.draw_io.transforms import (
     extract_elements,
     parse_elements,
 )
-from cemento.rdf.graph_to_rdf import convert_graph_to_rdf_graph
+from cemento.rdf.drawio_to_rdf import (
+    convert_drawio_to_rdf,
+    convert_drawio_to_rdf_bytes,
+)
+from cemento.rdf.graph_to_rdf import (
+    convert_graph_to_rdf_file,
+    convert_graph_to_rdf_graph,
+)
+from cemento.rdf.rdf_to_drawio import (
+    convert_rdf_to_drawio,
+    convert_rdf_to_drawio_bytes,
+)
+from cemento.term_matching.resolver import TermResolver
 from cemento.utils.utils import fst
 
 diagram_test_files = [
@@ -74,6 +102,24 @@ def test_file_read():
     assert actual_rels == expected_rels
 
 
+def test_shared_style_attrs():
+    elements = parse_elements(diagram_test_files[0])
+    styled = [element for element in elements.values() if element.style]
+    # cells with the same style string share one read-only parse of it
+    for element in styled:
+        same_style = next(other for other in styled if other.style == element.style)
+        assert element.style_attrs is same_style.style_attrs
+        with pytest.raises(TypeError):
+            element.style_attrs["strokeColor"] = "#ff0000"
+
+    # adding tags to one cell leaves the others with the same style alone
+    element = styled[0]
+    shared_tags = DiagramElement.parse_style(element.style)[1]
+    element.add_tags(["edgeLabel"])
+    assert element.tags == (*shared_tags, "edgeLabel")
+    assert DiagramElement.parse_style(element.style)[1] == shared_tags
+
+
 def remove_attr(input_dict: dict[str, any], remove_key: str) -> dict[str, any]:
     return {key: value for key, value in input_dict.items() if key != remove_key}
 
@@ -167,3 +213,293 @@ def test_container_rdf_graph_generation():
     ref_rdf_graph = rdflib.Graph()
     ref_rdf_graph.parse(ref_path, format="turtle")
     assert isomorphic(rdf_graph, ref_rdf_graph)
+
+
+def test_collect_domains_ranges(tmp_path):
+    graph = read_drawio(diagram_test_files[2], check_errors=True)
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+
+    output_path = tmp_path / "output.ttl"
+    convert_graph_to_rdf_file(
+        graph,
+        output_path,
+        collect_domains_ranges=True,
+        prefixes_path=prefixes_path,
+    )
+    rdf_graph = rdflib.Graph()
+    rdf_graph.parse(output_path, format="turtle")
+
+    def get_members(term):
+        union_node = rdf_graph.value(term, rdflib.OWL.unionOf)
+        if union_node is None:
+            return {term}
+        return set(Collection(rdf_graph, union_node))
+
+    predicates = set(rdf_graph.subjects(rdflib.RDFS.domain, None))
+    assert predicates
+    for predicate in predicates:
+        domains = rdf_graph.objects(predicate, rdflib.RDFS.domain)
+        ranges = rdf_graph.objects(predicate, rdflib.RDFS.range)
+        # the domains and ranges are every subject and object the predicate connects
+        subjects = set(rdf_graph.subjects(predicate, None))
+        objects = set(rdf_graph.objects(None, predicate))
+        assert any(get_members(domain) == subjects for domain in domains)
+        assert any(get_members(range_term) == objects for range_term in ranges)
+
+
+def test_compressed_diagram_read():
+    compressed_file = (
+        Path(__file__).parent / "test_files" / "compressed-diagram-01.drawio"
+    )
+    assert parse_elements(compressed_file) == parse_elements(diagram_test_files[1])
+
+    # decoding in small chunks should split base64 quanta and url escapes
+    payload = next(ElementTree.parse(compressed_file).getroot().iter("diagram")).text
+    assert b"".join(
+        iter_decoded_diagram_chunks(payload, chunk_size=8)
+    ) == decode_diagram_payload(payload)
+
+    # the decoded stream never returns more than it is asked for
+    stream = DecodedDiagramStream(iter_decoded_diagram_chunks(payload, chunk_size=8))
+    reads = [stream.read(5) for _ in range(20)]
+    assert all(len(data) == 5 for data in reads)
+    assert b"".join(reads) + stream.read() == decode_diagram_payload(payload)
+    assert stream.read(5) == b"" and stream.read() == b""
+
+
+def test_compressed_diagram_write(tmp_path):
+    compressed_file = (
+        Path(__file__).parent / "test_files" / "compressed-diagram-01.drawio"
+    )
+    document = DrawioDocument(compressed_file)
+    output_path = document.write(tmp_path / "compressed-diagram.drawio")
+
+    # pages that were read compressed are written compressed
+    diagram_tag = next(ElementTree.parse(output_path).getroot().iter("diagram"))
+    assert len(diagram_tag) == 0 and diagram_tag.text.strip()
+    assert parse_elements(output_path) == parse_elements(compressed_file)
+
+    # edits end up inside the compressed page, and the document stays inflated
+    cell_id = next(
+        cell["id"] for cell in document.iter_page_cells(0) if cell.get("vertex")
+    )
+    document.set_error_styles([cell_id])
+    diagram_tag = next(ElementTree.fromstring(document.to_bytes()).iter("diagram"))
+    graph_model_tag = ElementTree.fromstring(decode_diagram_payload(diagram_tag.text))
+    cell_tag = next(
+        cell_tag
+        for cell_tag in graph_model_tag.iter("mxCell")
+        if cell_tag.get("id") == cell_id
+    )
+    assert "strokeColor=#ff0000" in cell_tag.get("style")
+    assert document.pages[0].find("mxGraphModel") is not None
+
+
+def test_multi_page_read():
+    multi_page_file = (
+        Path(__file__).parent / "test_files" / "multi-page-diagram-01.drawio"
+    )
+    page_files = diagram_test_files[1:3]
+    page_graphs = read_drawio_pages(multi_page_file, check_errors=True)
+    ref_graphs = [read_drawio(file, check_errors=True) for file in page_files]
+    assert len(page_graphs) == len(ref_graphs)
+    for page_graph, ref_graph in zip(page_graphs, ref_graphs):
+        assert dict(page_graph.nodes(data=True)) == dict(ref_graph.nodes(data=True))
+        assert set(page_graph.edges) == set(ref_graph.edges)
+
+    # terms shared between pages should end up as a single node
+    graph = read_drawio(multi_page_file, check_errors=True)
+    assert set(graph.nodes) == set().union(*map(lambda g: g.nodes, ref_graphs))
+    assert set(graph.edges) == set().union(*map(lambda g: g.edges, ref_graphs))
+    assert graph.graph["pages"] == ["Page-1", "Page-2"]
+
+    # the pages are read in the same process unless a pool is asked for
+    pool_graph = read_drawio(multi_page_file, check_errors=True, max_workers=2)
+    assert dict(pool_graph.nodes(data=True)) == dict(graph.nodes(data=True))
+    assert set(pool_graph.edges) == set(graph.edges)
+
+
+def test_multi_page_containers():
+    # the second page is a copy of the first with other terms, so the cell ids repeat
+    multi_page_file = (
+        Path(__file__).parent / "test_files" / "multi-page-diagram-02.drawio"
+    )
+    term_resolver = TermResolver.from_folders()
+    graph = read_drawio(multi_page_file, check_errors=True, term_resolver=term_resolver)
+    page_graphs = read_drawio_pages(
+        multi_page_file, check_errors=True, term_resolver=term_resolver
+    )
+
+    # every page keeps its own collections, the same as converting the pages apart
+    rdf_graph = convert_graph_to_rdf_graph(graph, term_resolver=term_resolver)
+    page_rdf_graphs = [
+        convert_graph_to_rdf_graph(page_graph, term_resolver=term_resolver)
+        for page_graph in page_graphs
+    ]
+    assert isomorphic(rdf_graph, page_rdf_graphs[0] + page_rdf_graphs[1])
+
+
+def test_label_text_matches_soup():
+    labels = [
+        cell["value"]
+        for file in (Path(__file__).parent / "test_files").glob("*.drawio")
+        for cell in iter_diagram_cells(file)
+        if "value" in cell
+    ]
+    labels += [
+        '<span style="font-weight: bold;">cco:Person </span><br>',
+        "a <b>b</b> <i> c</i>",
+        "a </ b> &foo; <!-- note --> c",
+        "<div>x<script>y</script></div>",
+        "unclosed <b",
+    ]
+    for label in labels:
+        assert get_label_text(label) == BeautifulSoup(label, "html.parser").get_text(
+            separator="", strip=True
+        )
+
+
+def get_matched_terms(term_resolver: TermResolver) -> set[str]:
+    return {term for term in term_resolver._resolutions.keys() if '"' not in term}
+
+
+def test_embedded_terms(tmp_path):
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    ref_rdf_graph = rdflib.Graph()
+    ref_rdf_graph.parse(ref_path, format="turtle")
+    input_path = tmp_path / "diagram.drawio"
+    shutil.copy(diagram_test_files[2], input_path)
+
+    convert_drawio_to_rdf(
+        input_path,
+        tmp_path / "first.ttl",
+        prefixes_path=prefixes_path,
+        check_errors=True,
+        embed_terms=True,
+    )
+    # the wrapped cells read the same as the plain ones, with their IRIs on top
+    graph = read_drawio(input_path, check_errors=True)
+    ref_graph = read_drawio(diagram_test_files[2], check_errors=True)
+    assert set(graph.nodes) == set(ref_graph.nodes)
+    assert set(graph.edges) == set(ref_graph.edges)
+    assert all(
+        "iri" in data for term, data in graph.nodes(data=True) if not data["is_literal"]
+    )
+
+    # embedded terms are not matched again, and give the same triples
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+    convert_drawio_to_rdf(
+        input_path,
+        tmp_path / "second.ttl",
+        check_errors=True,
+        term_resolver=term_resolver,
+    )
+    assert not get_matched_terms(term_resolver)
+    for output_file in ("first.ttl", "second.ttl"):
+        rdf_graph = rdflib.Graph()
+        rdf_graph.parse(tmp_path / output_file, format="turtle")
+        assert set(rdf_graph) == set(ref_rdf_graph)
+
+    # an edited label is matched again instead of keeping the stale IRI
+    diagram = input_path.read_text()
+    elf_cell = '<UserObject label="lotr:Elf (Elf)"'
+    assert diagram.count(elf_cell) == 1
+    input_path.write_text(diagram.replace(elf_cell, '<UserObject label="lotr:Elf"'))
+    graph = read_drawio(input_path, check_errors=True)
+    assert "iri" not in graph.nodes["lotr:Elf"]
+    assert "iri" in graph.nodes["lotr:Hobbit (Hobbit)"]
+
+
+def test_conversion_keeps_input_graph(tmp_path):
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    other_prefixes_path = tmp_path / "prefixes.json"
+    prefixes = json.loads(prefixes_path.read_text())
+    other_prefixes_path.write_text(
+        json.dumps({**prefixes, "lotr": "http://other.org/lotr#"})
+    )
+
+    def get_graph_data(graph):
+        return (
+            {term: dict(data) for term, data in graph.nodes(data=True)},
+            {(subj, obj): dict(data) for subj, obj, data in graph.edges(data=True)},
+        )
+
+    for diagram_path in diagram_test_files[2:4]:
+        graph = read_drawio(diagram_path)
+        graph_data = get_graph_data(graph)
+        convert_graph_to_rdf_graph(graph, prefixes_path=prefixes_path)
+        assert get_graph_data(graph) == graph_data
+
+    # the same graph converted again against other prefixes gets the other IRIs
+    graph = read_drawio(diagram_test_files[2])
+    convert_graph_to_rdf_graph(graph, prefixes_path=prefixes_path)
+    rdf_graph = convert_graph_to_rdf_graph(graph, prefixes_path=other_prefixes_path)
+    rdf_terms = set(chain(*rdf_graph))
+    assert rdflib.URIRef("http://other.org/lotr#Hobbit") in rdf_terms
+    assert not any(str(term).startswith(prefixes["lotr"]) for term in rdf_terms)
+
+
+def test_embedded_terms_round_trip(tmp_path):
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    convert_rdf_to_drawio(
+        ref_path,
+        tmp_path / "diagram.drawio",
+        prefixes_path=prefixes_path,
+        embed_terms=True,
+    )
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+    convert_drawio_to_rdf(
+        tmp_path / "diagram.drawio",
+        tmp_path / "diagram.ttl",
+        check_errors=True,
+        term_resolver=term_resolver,
+    )
+    assert not get_matched_terms(term_resolver)
+
+
+def test_in_memory_conversion(tmp_path):
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+    ref_rdf_graph = rdflib.Graph()
+    ref_rdf_graph.parse(ref_path, format="turtle")
+    diagram = Path(diagram_test_files[2]).read_bytes()
+
+    # bytes and streams read the same as the file they came from
+    assert parse_elements(diagram) == parse_elements(diagram_test_files[2])
+    for input_diagram, file_format in ((diagram, "turtle"), (BytesIO(diagram), "xml")):
+        output = convert_drawio_to_rdf_bytes(
+            input_diagram,
+            file_format=file_format,
+            check_errors=True,
+            term_resolver=term_resolver,
+        )
+        rdf_graph = rdflib.Graph()
+        rdf_graph.parse(data=output, format=file_format)
+        assert set(rdf_graph) == set(ref_rdf_graph)
+
+    # a diagram drawn in memory converts back the same as one drawn to a file
+    convert_rdf_to_drawio(
+        ref_path, tmp_path / "diagram.drawio", prefixes_path=prefixes_path
+    )
+    convert_drawio_to_rdf(
+        tmp_path / "diagram.drawio",
+        tmp_path / "diagram.ttl",
+        check_errors=True,
+        term_resolver=term_resolver,
+    )
+    file_rdf_graph = rdflib.Graph()
+    file_rdf_graph.parse(tmp_path / "diagram.ttl", format="turtle")
+    output_diagram = convert_rdf_to_drawio_bytes(
+        BytesIO(Path(ref_path).read_bytes()), prefixes_path=prefixes_path
+    )
+    output = convert_drawio_to_rdf_bytes(
+        output_diagram, check_errors=True, term_resolver=term_resolver
+    )
+    rdf_graph = rdflib.Graph()
+    rdf_graph.parse(data=output, format="turtle")
+    assert isomorphic(rdf_graph, file_rdf_graph)
@@ -0,0 +1,76 @@
+import re
+from os import scandir
+from pathlib import Path
+
+import rdflib
+
+from cemento.draw_io.read_diagram import read_drawio
+from cemento.rdf.graph_to_rdf import convert_graph_to_rdf_graph
+from cemento.term_matching.resolver import TermResolver
+from cemento.term_matching.transforms import (
+    get_datatype_resolver,
+    get_datatype_terms,
+)
+
+diagram_test_files = [
+    file.path
+    for file in scandir(Path(__file__).parent / "test_files")
+    if re.fullmatch(r"read-diagram-(\d+)", Path(file.path).stem)
+]
+diagram_test_files = sorted(diagram_test_files)
+
+
+def get_corresponding_ref_file(input_file: str | Path):
+    input_file_path = Path(input_file)
+    ref_folder_path = Path(__file__).parent / "test_refs"
+    ref_paths = {
+        (file_path := Path(file.path)).suffix.replace(".", ""): file_path
+        for file in scandir(ref_folder_path)
+        if re.fullmatch(input_file_path.stem, Path(file.path).stem)
+    }
+    return ref_paths
+
+
+def test_datatype_resolver():
+    lotr = rdflib.Namespace("http://example.com/lotr#")
+    resolve_datatype = get_datatype_resolver({"lotr:Hobbit": lotr.Hobbit})
+    xsd = rdflib.XSD
+
+    # known datatypes are looked up exactly, in any case
+    assert resolve_datatype("xsd:integer") == xsd.integer
+    assert resolve_datatype("XSD:Integer") == xsd.integer
+    assert resolve_datatype("xsd:datetime") == xsd.dateTime
+    assert resolve_datatype("rdf:langstring") == rdflib.RDF.langString
+    # other reference terms only match exactly
+    assert resolve_datatype("lotr:Hobbit") == lotr.Hobbit
+    # the fuzzy fallback only returns datatypes
+    datatype_terms = set(get_datatype_terms().values())
+    assert resolve_datatype("xsd:integr") == xsd.integer
+    assert resolve_datatype("xsd:strng") in datatype_terms
+    assert resolve_datatype("lotr:Hobbitt") is None
+    assert resolve_datatype("xsd:Hobbit") is None
+
+
+def test_shared_term_resolver():
+    ref_path = get_corresponding_ref_file(diagram_test_files[2])["ttl"]
+    prefixes_path = Path(ref_path).parent / "prefixes.json"
+    term_resolver = TermResolver.from_folders(prefixes_path=prefixes_path)
+
+    # the same resolver should give the same results across several diagrams
+    for _ in range(2):
+        graph = read_drawio(
+            diagram_test_files[2], check_errors=True, term_resolver=term_resolver
+        )
+        rdf_graph = convert_graph_to_rdf_graph(graph, term_resolver=term_resolver)
+
+        ref_rdf_graph = rdflib.Graph()
+        ref_rdf_graph.parse(ref_path, format="turtle")
+        assert set(rdf_graph) == set(ref_rdf_graph)
+
+    # the reference ontologies are parsed once and reused by every conversion
+    assert term_resolver.reference_graphs is term_resolver.reference_graphs
+    assert term_resolver.reference_graphs
+
+    resolution = term_resolver.explain("rdfs:subClassOf")
+    assert resolution.matched_term == rdflib.RDFS.subClassOf
+    assert resolution.search_keys == term_resolver.get_search_keys("rdfs:subClassOf")